@@ -1,26 +1,28 @@
+import sys
+
 from pytouhou.formats.ecl import ECL
 from math import pi
 
 # Frame, sub, opcode, args
-main = [(120, 0, 0, (-30.0, 80.0, 0.0, 160, 0, 0, 0)),
-        (140, 0, 0, (-30.0, 130.0, 0.0, 160, 0, 0, 0)),
+main = [(120, 0, 0, (-30.0, 80.0, 0.0, 160, 0, 0)),
+        (140, 0, 0, (-30.0, 130.0, 0.0, 160, 0, 0)),
 
-        (160, 0, 2, (192*2+30.0, 80.0, 0.0, 160, 0, 0, 0)),
-        (180, 0, 2, (192*2+30.0, 130.0, 0.0, 160, 0, 0, 0)),
+        (160, 0, 2, (192*2+30.0, 80.0, 0.0, 160, 0, 0)),
+        (180, 0, 2, (192*2+30.0, 130.0, 0.0, 160, 0, 0)),
 
-        (220, 0, 0, (-30.0, 80.0, 0.0, 16, 0, 0, 0)),
-        (220, 0, 0, (-30.0, 130.0, 0.0, 16, 0, 0, 0)),
+        (220, 0, 0, (-30.0, 80.0, 0.0, 16, 0, 0)),
+        (220, 0, 0, (-30.0, 130.0, 0.0, 16, 0, 0)),
 
-        (260, 0, 2, (192*2+30.0, 80.0, 0.0, 16, 0, 0, 0)),
-        (260, 0, 2, (192*2+30.0, 130.0, 0.0, 16, 0, 0, 0)),
+        (260, 0, 2, (192*2+30.0, 80.0, 0.0, 16, 0, 0)),
+        (260, 0, 2, (192*2+30.0, 130.0, 0.0, 16, 0, 0)),
 
-        (560, 2, 0, (0, -10, 0.0, 120, 0, 0, 0)),
-        (780, 2, 0, (0, -10, 0.0, 120, 0, 0, 0)),
-        (900, 2, 0, (0, -10, 0.0, 120, 0, 0, 0)),
+        (560, 2, 0, (0, -10, 0.0, 120, 0, 0)),
+        (780, 2, 0, (0, -10, 0.0, 120, 0, 0)),
+        (900, 2, 0, (0, -10, 0.0, 120, 0, 0)),
 
-        (1500, 3, 0, (192, -10, 0.0, 2000, 0, 0, 0)),
+        (1500, 3, 0, (192, -10, 0.0, 2000, 0, 0)),
 
-        (2100, 4, 0, (-30.0, 80.0, 0.0, 6500, 0, 0, 0))]
+        (2100, 4, 0, (-30.0, 80.0, 0.0, 6500, 0, 0))]
 
 
 subs = [
@@ -127,9 +129,129 @@ subs = [
     ]
 ]
 
-ecl = ECL()
-ecl.subs = subs
-ecl.main = main
 
-with open('ecldata1.ecl', 'wb') as file:
-    ecl.write(file)
+
+# Stress scenarios for pytouhou-bench, one ECL each, built from how many
+# bullets (or lasers) each enemy fires at once, and how many enemies there
+# are.  The enemies can’t be killed, so they keep the same load on the game
+# all along.
+
+BULLET_FLAGS = {'plain': (0, None),
+                'speedup': (1, None),
+                'launch': (2, None),
+                'accelerate': (16, (60, 0, 0, 0, 0.02, -999., 0., 0.)),
+                'rotate': (32, (120, 0, 0, 0, 0.01, 0.01, 0., 0.)),
+                'redirect': (64, (30, 3, 0, 0, 0.5, -999., 0., 0.)),
+                'aim': (128, (30, 3, 0, 0, 0., 1.5, 0., 0.)),
+                'bounce': (1024, (2, 0, 0, 0, 0., 0., 0., 0.))}
+
+
+def spawn(x, y, sub, life=1000):
+    return (0, sub, 0, (x, y, 0., life, -1, 0))
+
+
+def abscissa(i, nb_enemies):
+    """Abscissa of the i-th of nb_enemies enemies, spread across the
+    screen, or at its middle for a single one."""
+    if nb_enemies == 1:
+        return 192.
+    return 32. + 320. * i / (nb_enemies - 1)
+
+
+def emitter(per_shot, interval, speed, flags=0, extended=None, anim=0):
+    """Sub firing a ring of per_shot bullets every interval frames, from a
+    still enemy."""
+    sub = [(0, 97, 0xff00, 256, (0,)),
+           (0, 105, 0xff00, 256, (0,))]
+    if extended is not None:
+        sub.append((0, 82, 0xff00, 256, extended))
+    sub += [(0, 70, 0xff00, 256, (anim, 0, per_shot, 1, speed, speed, 0., 0., flags)),
+            (0, 76, 0xff00, 256, (interval,))]
+    return sub
+
+
+def bullets(flags, extended):
+    def scenario(nb_bullets, nb_enemies):
+        return ([spawn(abscissa(i, nb_enemies), 160., 0) for i in range(nb_enemies)],
+                [emitter(nb_bullets, 8, 1.5, flags, extended)])
+    return scenario
+
+
+# Enemies in a row, each firing its own rings.
+def rings(nb_bullets, nb_enemies):
+    return ([spawn(abscissa(i, nb_enemies), 64. + 32. * (i % 2), 0) for i in range(nb_enemies)],
+            [emitter(nb_bullets, 40, 1.5, anim=3)])
+
+
+# Lasers aimed next to the player, who keeps grazing them.
+def lasers(nb_lasers, nb_enemies):
+    return ([spawn(abscissa(i, nb_enemies), 48., i) for i in range(nb_enemies)],
+            [[(0, 97, 0xff00, 256, (0,)),
+              (0, 105, 0xff00, 256, (0,))] +
+             [(20, 86, 0xff00, 256, (0, 1, 0.02 * (i - nb_enemies // 2) + 0.05 * (j - (nb_lasers - 1) / 2.),
+                                     0., 0., 400., 400., 16., 30, 60, 20, 30, 30, 0))
+              for j in range(nb_lasers)] +
+             [(110, 2, 0xff00, 256, (20, 2))]
+             for i in range(nb_enemies)])
+
+
+# Dense rings, regularly converted into star items.
+def star_items(nb_bullets, nb_enemies):
+    sub = emitter(nb_bullets, 6, 1., anim=1)
+    sub += [(90, 83, 0xff00, 256, ()),
+            (90, 2, 0xff00, 256, (0, len(sub)))]
+    return [spawn(abscissa(i, nb_enemies), 160., 0) for i in range(nb_enemies)], [sub]
+
+
+# Every scenario, with its default numbers of bullets and enemies, which
+# pytouhou.benchmark.SCENARIOS repeats.
+scenarios = {'bullets-' + name: (bullets(flags, extended), 32, 1)
+             for name, (flags, extended) in BULLET_FLAGS.items()}
+scenarios['rings'] = rings, 12, 12
+scenarios['lasers'] = lasers, 1, 8
+scenarios['star-items'] = star_items, 48, 1
+
+
+def stress(name, nb_bullets=None, nb_enemies=None):
+    """Return the main and subs of a scenario, with its default numbers
+    unless given."""
+    build, default_bullets, default_enemies = scenarios[name]
+    return build(default_bullets if nb_bullets is None else nb_bullets,
+                 default_enemies if nb_enemies is None else nb_enemies)
+
+
+def stress_file(name, nb_bullets=None, nb_enemies=None):
+    """Name of the ECL file of a scenario, which tells its numbers unless
+    they are the default ones."""
+    _, default_bullets, default_enemies = scenarios[name]
+    if nb_bullets in (None, default_bullets) and nb_enemies in (None, default_enemies):
+        return 'bench-%s.ecl' % name
+    return 'bench-%s-%dx%d.ecl' % (name,
+                                   default_bullets if nb_bullets is None else nb_bullets,
+                                   default_enemies if nb_enemies is None else nb_enemies)
+
+
+def write(name, main, subs):
+    ecl = ECL()
+    ecl.subs = subs
+    ecl.mains = [main]
+
+    with open(name, 'wb') as file:
+        ecl.write(file)
+
+
+if __name__ == '__main__':
+    # Without arguments, everything with the default numbers, else the
+    # scenarios given as SCENARIO BULLETS ENEMIES, such as “rings 24 6” for
+    # bench-rings-24x6.ecl.
+    if len(sys.argv) > 1:
+        arguments = sys.argv[1:]
+        if len(arguments) % 3:
+            sys.exit('Usage: %s [SCENARIO BULLETS ENEMIES]...' % sys.argv[0])
+        for i in range(0, len(arguments), 3):
+            name, nb_bullets, nb_enemies = arguments[i], int(arguments[i + 1]), int(arguments[i + 2])
+            write(stress_file(name, nb_bullets, nb_enemies), *stress(name, nb_bullets, nb_enemies))
+    else:
+        write('ecldata1.ecl', main, subs)
+        for name in scenarios:
+            write(stress_file(name), *stress(name))
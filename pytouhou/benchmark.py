@@ -0,0 +1,309 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+"""Synthetic stress benchmarks.
+
+Every scenario is an ECL file generated by data/ST/make_ecl.py, named after
+it, which is run headlessly on the sample game in place of its stage.  The
+player stays idle and invulnerable, so each scenario reproduces the same
+load on every run, whatever the engine does to the timing of collisions.
+
+The load of a scenario is set by two numbers: the bullets (or lasers) each
+of its enemies fires at once, and the enemies.  make_ecl.py writes the
+defaults into bench-<scenario>.ecl, and other numbers into
+bench-<scenario>-<bullets>x<enemies>.ecl when asked to, for instance with
+“python3 make_ecl.py rings 24 6”.
+
+Results are plain dicts, which can be saved as JSON and compared with a
+baseline from an earlier run.
+"""
+
+import gc
+import json
+import sys
+import tracemalloc
+from time import perf_counter
+
+from pytouhou.game import NextStage, GameOver
+from pytouhou.headless import HeadlessRunner
+from pytouhou.utils.random import Random
+from pytouhou.vm import ECLMainRunner
+
+FORMAT_VERSION = 3
+
+INVULNERABLE = 1 << 30
+
+# Scenario names, and their default numbers of bullets and enemies, the same
+# as in make_ecl.py.  The sample stage has none.
+SCENARIOS = {name: (32, 1)
+             for name in ('bullets-plain', 'bullets-speedup', 'bullets-launch',
+                          'bullets-accelerate', 'bullets-rotate',
+                          'bullets-redirect', 'bullets-aim', 'bullets-bounce')}
+SCENARIOS['rings'] = 12, 12
+SCENARIOS['lasers'] = 1, 8
+SCENARIOS['star-items'] = 48, 1
+SCENARIOS['sample-stage'] = None
+
+
+def get_parameters(scenario, nb_bullets=None, nb_enemies=None):
+    """Return the numbers of bullets and enemies of a scenario, its default
+    ones unless given, or None for the sample stage."""
+    defaults = SCENARIOS[scenario]
+    if defaults is None:
+        return None
+    return {'bullets': defaults[0] if nb_bullets is None else nb_bullets,
+            'enemies': defaults[1] if nb_enemies is None else nb_enemies}
+
+
+def get_ecl_name(scenario, parameters):
+    """Return the name of the ECL file make_ecl.py writes a scenario into."""
+    if parameters is None:
+        return 'ecldata1.ecl'
+    if (parameters['bullets'], parameters['enemies']) == SCENARIOS[scenario]:
+        return 'bench-%s.ecl' % scenario
+    return 'bench-%s-%dx%d.ecl' % (scenario, parameters['bullets'],
+                                   parameters['enemies'])
+
+
+def percentile(values, fraction):
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+
+class Benchmark:
+    """Run scenarios on the sample game, and measure them.
+
+    nb_bullets and nb_enemies replace the default numbers of every scenario
+    but the sample stage, when given.
+    """
+
+    def __init__(self, resource_loader, frames=1200, warmup=120, seed=0,
+                 repeat=3, allocation_samples=20, nb_bullets=None,
+                 nb_enemies=None):
+        self.resource_loader = resource_loader
+        self.frames = frames
+        self.warmup = warmup
+        self.seed = seed
+        self.repeat = repeat
+        self.allocation_samples = allocation_samples
+        self.nb_bullets = nb_bullets
+        self.nb_enemies = nb_enemies
+        self.runner = HeadlessRunner(resource_loader, 'sample', 'sample')
+
+
+    def get_parameters(self, scenario):
+        return get_parameters(scenario, self.nb_bullets, self.nb_enemies)
+
+
+    def new_game(self, scenario):
+        name = get_ecl_name(scenario, self.get_parameters(scenario))
+        try:
+            ecl = self.resource_loader.get_ecl(name)
+        except (KeyError, IOError):
+            raise ValueError('Scenario %s needs %s, which make_ecl.py writes.' % (scenario, name))
+        common = self.runner.new_common([0])
+        game = self.runner.new_game(common, 1, 0, 16, Random(self.seed))
+        game.ecl_runners = [ECLMainRunner(ecl.mains[0], ecl.subs, game)]
+        return game
+
+
+    def run(self, scenario):
+        """Measure a scenario repeat times, and keep the fastest run, the
+        others being more likely to have been disturbed, then count its
+        allocations."""
+        result = min((self.measure(scenario) for _ in range(self.repeat)),
+                     key=lambda result: result['frame_time']['mean'])
+        if self.allocation_samples:
+            result['allocations'] = self.measure_allocations(scenario)
+        return result
+
+
+    def measure(self, scenario):
+        game = self.new_game(scenario)
+        run_iter = game.run_iter
+        keystates = [0] * len(game.players)
+        status = None
+
+        frame_times = []
+        nb_bullets = []
+        nb_lasers = nb_items = nb_particles = 0
+        try:
+            for frame in range(self.warmup + self.frames):
+                if frame == self.warmup:
+                    misses = sum(stats[1] for stats in game.pools.stats().values())
+                    collections = sum(stats['collections'] for stats in gc.get_stats())
+                for player in game.players:
+                    player.invulnerable_time = INVULNERABLE
+                start = perf_counter()
+                run_iter(keystates)
+                end = perf_counter()
+                if frame >= self.warmup:
+                    frame_times.append(end - start)
+                    nb_bullets.append(len(game.bullets))
+                    nb_lasers += len(game.lasers)
+                    nb_items += len(game.items)
+                    nb_particles += len(game.particles)
+        except (NextStage, GameOver) as exception:
+            status = type(exception).__name__
+        if not frame_times:
+            raise ValueError('Scenario %s ended during its warmup.' % scenario)
+
+        nb_frames = len(frame_times)
+        misses = sum(stats[1] for stats in game.pools.stats().values()) - misses
+        collections = sum(stats['collections'] for stats in gc.get_stats()) - collections
+        total_time = sum(frame_times)
+        frame_times.sort()
+        return {'parameters': self.get_parameters(scenario),
+                'frames': nb_frames,
+                'status': status or 'running',
+                'time': total_time,
+                'frame_time': {'mean': total_time / nb_frames,
+                               'p50': percentile(frame_times, .5),
+                               'p90': percentile(frame_times, .9),
+                               'p99': percentile(frame_times, .99),
+                               'max': frame_times[-1]},
+                'bullets': {'mean': sum(nb_bullets) / nb_frames,
+                            'peak': max(nb_bullets)},
+                'bullets_per_second': sum(nb_bullets) / total_time if total_time else 0.,
+                'lasers': nb_lasers / nb_frames,
+                'items': nb_items / nb_frames,
+                'particles': nb_particles / nb_frames,
+                'pool_misses_per_frame': misses / nb_frames,
+                'gc_collections': collections}
+
+
+    def measure_allocations(self, scenario):
+        """Run a scenario again with tracemalloc, which makes it too slow to
+        be timed, and return what its frames leave allocated, on average.
+
+        Memory is only traced during allocation_samples frames spread over
+        the measured ones.  The difference between the snapshots taken
+        before and after each of them counts every block allocated during
+        that frame and still there after it.
+        """
+        game = self.new_game(scenario)
+        run_iter = game.run_iter
+        keystates = [0] * len(game.players)
+        step = max(self.frames // self.allocation_samples, 1)
+        # Don’t count the snapshots themselves.
+        filters = (tracemalloc.Filter(False, tracemalloc.__file__),)
+        blocks = size = samples = 0
+
+        try:
+            for frame in range(self.warmup + self.frames):
+                for player in game.players:
+                    player.invulnerable_time = INVULNERABLE
+                if frame < self.warmup or (frame - self.warmup) % step:
+                    run_iter(keystates)
+                    continue
+                tracemalloc.start()
+                try:
+                    before = tracemalloc.take_snapshot().filter_traces(filters)
+                    run_iter(keystates)
+                    after = tracemalloc.take_snapshot().filter_traces(filters)
+                finally:
+                    tracemalloc.stop()
+                for stat in after.compare_to(before, 'filename'):
+                    blocks += stat.count_diff
+                    size += stat.size_diff
+                samples += 1
+        except (NextStage, GameOver):
+            pass
+
+        return {'sampled_frames': samples,
+                'blocks_per_frame': blocks / samples if samples else 0.,
+                'bytes_per_frame': size / samples if samples else 0.}
+
+
+    def run_all(self, scenarios=None):
+        results = {'version': FORMAT_VERSION,
+                   'python': sys.version.split()[0],
+                   'frames': self.frames,
+                   'repeat': self.repeat,
+                   'scenarios': {}}
+        for scenario in scenarios or SCENARIOS:
+            results['scenarios'][scenario] = self.run(scenario)
+        return results
+
+
+
+# Shown for the results measured without allocation samples.
+NO_ALLOCATIONS = {'blocks_per_frame': float('nan'),
+                  'bytes_per_frame': float('nan')}
+
+
+def format_results(results):
+    lines = ['scenario'.ljust(20) + 'load'.rjust(8) + 'mean ms'.rjust(9) + 'p50'.rjust(8) +
+             'p99'.rjust(8) + 'max'.rjust(8) + 'bullets'.rjust(9) +
+             'bullets/s'.rjust(11) + 'blocks'.rjust(8) + 'bytes'.rjust(9) +
+             'misses'.rjust(8)]
+    for name, result in results['scenarios'].items():
+        frame_time = result['frame_time']
+        allocations = result.get('allocations', NO_ALLOCATIONS)
+        parameters = result['parameters']
+        lines.append(name.ljust(20) +
+                     ('-' if parameters is None else
+                      '%(bullets)dx%(enemies)d' % parameters).rjust(8) +
+                     ('%.3f' % (frame_time['mean'] * 1000)).rjust(9) +
+                     ''.join(('%.3f' % (frame_time[key] * 1000)).rjust(8)
+                             for key in ('p50', 'p99', 'max')) +
+                     ('%.0f' % result['bullets']['mean']).rjust(9) +
+                     ('%.0f' % result['bullets_per_second']).rjust(11) +
+                     ('%.1f' % allocations['blocks_per_frame']).rjust(8) +
+                     ('%.0f' % allocations['bytes_per_frame']).rjust(9) +
+                     ('%.2f' % result['pool_misses_per_frame']).rjust(8))
+    return '\n'.join(lines)
+
+
+def compare_results(baseline, results, threshold=.1):
+    """Compare the frame times of every scenario present in both results,
+    with the same numbers of bullets and enemies.
+
+    Return a list of (scenario, metric, baseline, current, ratio, regressed)
+    tuples, a regression being a ratio over 1 + threshold.
+    """
+    comparison = []
+    for name, result in results['scenarios'].items():
+        reference = baseline['scenarios'].get(name)
+        if reference is None or reference['parameters'] != result['parameters']:
+            continue
+        for metric in ('mean', 'p50', 'p99'):
+            old, new = reference['frame_time'][metric], result['frame_time'][metric]
+            ratio = new / old if old else 1.
+            comparison.append((name, metric, old, new, ratio, ratio > 1. + threshold))
+    return comparison
+
+
+def format_comparison(comparison):
+    lines = ['scenario'.ljust(20) + 'metric'.ljust(8) + 'baseline'.rjust(10) +
+             'current'.rjust(10) + 'change'.rjust(9)]
+    for name, metric, old, new, ratio, regressed in comparison:
+        lines.append(name.ljust(20) + metric.ljust(8) +
+                     ('%.3f' % (old * 1000)).rjust(10) +
+                     ('%.3f' % (new * 1000)).rjust(10) +
+                     ('%+.1f%%' % ((ratio - 1.) * 100)).rjust(9) +
+                     ('  REGRESSION' if regressed else ''))
+    return '\n'.join(lines)
+
+
+def load_results(file):
+    results = json.load(file)
+    if results.get('version') != FORMAT_VERSION:
+        raise ValueError('Unsupported benchmark results version %r.' % results.get('version'))
+    return results
+
+
+def save_results(file, results):
+    json.dump(results, file, indent=2, sort_keys=True)
+    file.write('\n')
@@ -99,7 +99,7 @@ class T6RP:
             decrypted_file = BytesIO()
             file.seek(0)
             decrypted_file.write(file.read(15))
-            decrypted_file.write(b''.join(chr((ord(c) - replay.key - 7*i) & 0xff) for i, c in enumerate(file.read())))
+            decrypted_file.write(bytes((c - replay.key - 7*i) & 0xff for i, c in enumerate(file.read())))
             file = decrypted_file
             file.seek(15)
 
@@ -107,7 +107,7 @@ class T6RP:
         if verify:
             data = file.read()
             file.seek(15)
-            real_sum = (sum(ord(c) for c in data) + 0x3f000318 + replay.key) & 0xffffffff
+            real_sum = (sum(data) + 0x3f000318 + replay.key) & 0xffffffff
             if checksum != real_sum:
                 raise ChecksumError(checksum, real_sum)
 
@@ -32,10 +32,29 @@ class Background:
         self.fog_interpolator = Interpolator((0, 0, 0, 0, 0))
         self.position2_interpolator = Interpolator((0, 0, 0))
 
+        self.build_script()
         self.build_models()
         self.build_object_instances()
 
 
+    def rewind(self):
+        """Go back to the start of the stage, to be updated from there."""
+        self.__init__(self.stage, self.anm)
+
+
+    def build_script(self):
+        # Events are played from a cursor into the script sorted by frame,
+        # knowing for each of them where the next position keyframe is.
+        self.script = sorted(self.stage.script, key=lambda event: event[0])
+        self.script_cursor = 0
+        self.next_positions = [None] * len(self.script)
+        next_position = None
+        for i in reversed(range(len(self.script))):
+            if self.script[i][1] == 0:
+                next_position = self.script[i]
+            self.next_positions[i] = next_position
+
+
     def build_object_instances(self):
         self.object_instances = []
         for model_id, ox, oy, oz in self.stage.object_instances:
@@ -60,32 +79,48 @@ class Background:
 
 
     def update(self, frame):
-        for frame_num, message_type, args in self.stage.script:
-            if self.last_frame < frame_num <= frame:
-                if message_type == 0:
-                    self.position_interpolator.set_interpolation_start(frame_num, args)
-                elif message_type == 1:
-                    self.fog_interpolator.set_interpolation_end_values(args)
-                elif message_type == 2:
-                    self.position2_interpolator.set_interpolation_end_values(args)
-                elif message_type == 3:
-                    duration, = args
-                    self.position2_interpolator.set_interpolation_end_frame(frame_num + duration)
-                elif message_type == 4:
-                    duration, = args
-                    self.fog_interpolator.set_interpolation_end_frame(frame_num + duration)
-            if frame_num > frame and message_type == 0:
+        script = self.script
+        start = cursor = self.script_cursor
+        while cursor < len(script) and script[cursor][0] <= frame:
+            frame_num, message_type, args = script[cursor]
+            if message_type == 0:
+                self.position_interpolator.set_interpolation_start(frame_num, args)
+            elif message_type == 1:
+                self.fog_interpolator.set_interpolation_end_values(args)
+            elif message_type == 2:
+                self.position2_interpolator.set_interpolation_end_values(args)
+            elif message_type == 3:
+                duration, = args
+                self.position2_interpolator.set_interpolation_end_frame(frame_num + duration)
+            elif message_type == 4:
+                duration, = args
+                self.fog_interpolator.set_interpolation_end_frame(frame_num + duration)
+            cursor += 1
+        self.script_cursor = cursor
+
+        if (cursor != start or self.last_frame < 0) and cursor < len(script):
+            next_position = self.next_positions[cursor]
+            if next_position is not None:
+                frame_num, message_type, args = next_position
                 self.position_interpolator.set_interpolation_end(frame_num, args)
-                break
 
+        # Runners are dropped once they stopped, or once nothing will change
+        # their sprite anymore, by swapping them with the last one.
+        anm_runners = self.anm_runners
         for i in range(frame - self.last_frame):
-            for anm_runner in tuple(self.anm_runners):
-                if not anm_runner.run_frame():
-                    self.anm_runners.remove(anm_runner)
+            j = 0
+            while j < len(anm_runners):
+                anm_runner = anm_runners[j]
+                if anm_runner.run_frame() and not anm_runner.is_idle():
+                    j += 1
+                else:
+                    anm_runners[j] = anm_runners[-1]
+                    anm_runners.pop()
+            if not anm_runners:
+                break
 
         self.position2_interpolator.update(frame)
         self.fog_interpolator.update(frame)
         self.position_interpolator.update(frame)
 
         self.last_frame = frame
-
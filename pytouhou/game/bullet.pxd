@@ -1,30 +1,97 @@
 from pytouhou.game.element cimport Element
+from pytouhou.game.sprite cimport Sprite
 from pytouhou.game.game cimport Game
 from pytouhou.game.bullettype cimport BulletType
-from pytouhou.utils.interpolator cimport Interpolator
+from pytouhou.vm.anmtable cimport ANMTable
 
 
 cdef enum State:
     LAUNCHING, LAUNCHED, CANCELLED
 
 
-cdef class Bullet(Element):
-    cdef public State state
-    cdef public unsigned long flags, frame, sprite_idx_offset, damage
-    cdef public double dx, dy, angle, speed
-    cdef public bint was_visible, grazed
+# Extended attributes of a bullet, four integers and four floats.
+cdef struct Attributes:
+    long integers[4]
+    double floats[4]
+
+
+# Speed of a bullet, computed as by an Interpolator of a single value.
+cdef struct SpeedInterpolation:
+    bint active
+    unsigned long start_frame, end_frame, frame
+    double value, start_value, end_value
+
+
+# Everything of a bullet but the objects it references, as a row of its list.
+cdef struct BulletState:
+    State state
+    unsigned long flags, frame, sprite_idx_offset, damage, anm_frame
+    long player
+    double x, y, dx, dy, angle, speed
+    double hitbox[2]
+    float sprite_width, sprite_height
+    bint removed, was_visible, grazed, animated
+    Attributes attributes
+    SpeedInterpolation speed_interpolation
+
+
+# What is left to do with the GIL on a bullet after BulletList.move().
+cdef enum:
+    ORIENT = 1
+    REDIRECT = 2
+
+
+cdef struct Pending:
+    long index
+    int work
+
+
+cdef class Bullet:
+    cdef public Sprite sprite
+    cdef public object anmrunner
     cdef public Element target
     cdef public BulletType _bullet_type
-    cdef public list attributes
 
-    cdef double hitbox[2]
-    cdef Interpolator speed_interpolator
+    cdef BulletList _list
+    cdef long _index
+    cdef ANMTable animation
     cdef Game _game
-    cdef long player
 
-    cdef bint is_visible(self, unsigned int screen_width, unsigned int screen_height) nogil
+    cdef BulletState *row(self) except NULL
+    cdef bint reset(self, pos, BulletType bullet_type, unsigned long sprite_idx_offset,
+                    double angle, double speed, attributes, unsigned long flags, target, Game game,
+                    long player=*, unsigned long damage=*, tuple hitbox=*) except True
+    cdef bint update_sprite_size(self) except True
+    cdef bint release_anm(self) except True
+    cdef bint release(self) except True
     cpdef set_anim(self, sprite_idx_offset=*)
+    cdef bint start_anm(self, anm, long script, long sprite_index_offset) except True
+    cdef bint unshare_anm(self) except True
     cdef bint launch(self) except True
     cdef bint collide(self) except True
     cdef bint cancel(self) except True
-    cdef bint update(self) except True
+    cdef bint update_anm(self) except True
+    cdef int redirect(self, int width, int height) except -1
+
+
+cdef class BulletList(list):
+    cdef long size
+    cdef BulletState *rows
+    cdef Pending *pending
+
+    cdef bint reserve(self, long size) except True
+    cdef long add(self, Bullet bullet) except -1
+    cdef int move(self, long i, int width, int height) nogil
+    cdef bint update(self, int width, int height) except True
+    cpdef compact(self)
+    cdef bint sort(self, BulletList cancelled_bullets) except True
+    cdef bint release_all(self) except True
+
+
+cdef Bullet new_bullet(BulletList bullets, pos, BulletType bullet_type,
+                       unsigned long sprite_idx_offset, double angle, double speed,
+                       attributes, unsigned long flags, target, Game game,
+                       long player=*, unsigned long damage=*, tuple hitbox=*)
+
+cdef tuple pack_bullets(BulletList bullets)
+cdef BulletList unpack_bullets(Game game, bytes data, list refs)
@@ -15,46 +15,237 @@
 cimport cython
 
 from libc.math cimport cos, sin, atan2, M_PI as pi
+from libc.stdlib cimport realloc, free
+from libc.string cimport memset
+from cpython.bytes cimport PyBytes_FromStringAndSize, PyBytes_AS_STRING
 
-from pytouhou.vm import ANMRunner
-from pytouhou.game.sprite cimport Sprite
+from pytouhou.game.sprite cimport SpriteState
+from pytouhou.game.pools cimport Pools
+from pytouhou.vm.anmrunner cimport ANMRunner
+from pytouhou.vm.anmtable cimport get_table
 
 
-cdef class Bullet(Element):
-    def __init__(self, pos, BulletType bullet_type, unsigned long sprite_idx_offset,
-                       double angle, double speed, attributes, unsigned long flags, target, Game game,
+cdef Bullet new_bullet(BulletList bullets, pos, BulletType bullet_type,
+                       unsigned long sprite_idx_offset, double angle, double speed,
+                       attributes, unsigned long flags, target, Game game,
                        long player=-1, unsigned long damage=0, tuple hitbox=None):
+    """Add a bullet at the end of this list, reusing a released one when
+    possible."""
+    cdef Bullet bullet
+
+    bullet = game.pools.bullets.acquire()
+    if bullet is None:
+        bullet = Bullet()
+    bullets.add(bullet)
+    bullet.reset(pos, bullet_type, sprite_idx_offset, angle, speed,
+                 attributes, flags, target, game, player, damage, hitbox)
+    return bullet
+
+
+cdef void interpolate(SpeedInterpolation *interpolation, unsigned long frame) nogil:
+    # Same computation as Interpolator.update().
+    cdef double coeff
+
+    interpolation.frame = frame
+    if frame + 1 >= interpolation.end_frame: #XXX: skip the last interpolation step
+        # This bug is replicated from the original game
+        interpolation.value = interpolation.end_value
+        interpolation.start_value = interpolation.end_value
+        interpolation.start_frame = frame
+    else:
+        coeff = <double>(frame - interpolation.start_frame) / <double>(interpolation.end_frame - interpolation.start_frame)
+        interpolation.value = interpolation.start_value + coeff * (interpolation.end_value - interpolation.start_value)
+
+
+cdef bint is_visible(const BulletState *bullet, unsigned int screen_width,
+                     unsigned int screen_height) nogil:
+    cdef float max_x, max_y
+
+    x, y = bullet.x, bullet.y
+
+    max_x = bullet.sprite_width / 2
+    max_y = bullet.sprite_height / 2
+
+    if (max_x < x - screen_width
+        or max_x < -x
+        or max_y < y - screen_height
+        or max_y < -y):
+        return False
+    return True
+
+
+cdef void advance(BulletState *bullet) nogil:
+    cdef SpeedInterpolation *interpolation = &bullet.speed_interpolation
+    cdef double speed
+
+    if interpolation.active and interpolation.frame < interpolation.end_frame:
+        interpolate(interpolation, bullet.frame)
+        speed = interpolation.value
+        bullet.dx = cos(bullet.angle) * speed
+        bullet.dy = sin(bullet.angle) * speed
+
+    bullet.x += bullet.dx
+    bullet.y += bullet.dy
+
+    bullet.frame += 1
+
+
+cdef int check_bounds(BulletState *bullet, int game_width, int game_height) nogil:
+    # Filter out-of-screen bullets and handle special flags
+    if bullet.flags & 448:
+        bullet.was_visible = False
+    elif is_visible(bullet, game_width, game_height):
+        bullet.was_visible = True
+    elif bullet.was_visible:
+        bullet.removed = True
+        if bullet.flags & (1024 | 2048) and bullet.attributes.integers[0] > 0:
+            # Bounce!
+            if bullet.x < 0 or bullet.x > game_width:
+                bullet.angle = pi - bullet.angle
+                bullet.removed = False
+            if bullet.y < 0 or ((bullet.flags & 1024) and bullet.y > game_height):
+                bullet.angle = -bullet.angle
+                bullet.removed = False
+            bullet.dx = cos(bullet.angle) * bullet.speed
+            bullet.dy = sin(bullet.angle) * bullet.speed
+            bullet.attributes.integers[0] -= 1
+            return ORIENT
+    return 0
+
+
+cdef class Bullet:
+    """Handle on a bullet, whose numbers are stored in a row of its list.
+
+    Only the objects a bullet references are kept here, along with its list
+    and its index in it, which change when the list is compacted.
+    """
+
+    cdef BulletState *row(self) except NULL:
+        if self._list is None:
+            raise ReferenceError('This bullet has been released.')
+        return &self._list.rows[self._index]
+
+
+    property x:
+        def __get__(self):
+            return self.row().x
+        def __set__(self, double value):
+            self.row().x = value
+
+    property y:
+        def __get__(self):
+            return self.row().y
+        def __set__(self, double value):
+            self.row().y = value
+
+    property dx:
+        def __get__(self):
+            return self.row().dx
+        def __set__(self, double value):
+            self.row().dx = value
+
+    property dy:
+        def __get__(self):
+            return self.row().dy
+        def __set__(self, double value):
+            self.row().dy = value
+
+    property angle:
+        def __get__(self):
+            return self.row().angle
+        def __set__(self, double value):
+            self.row().angle = value
+
+    property speed:
+        def __get__(self):
+            return self.row().speed
+        def __set__(self, double value):
+            self.row().speed = value
+
+    property flags:
+        def __get__(self):
+            return self.row().flags
+        def __set__(self, unsigned long value):
+            self.row().flags = value
+
+    property frame:
+        def __get__(self):
+            return self.row().frame
+
+    property state:
+        def __get__(self):
+            return self.row().state
+
+    property damage:
+        def __get__(self):
+            return self.row().damage
+
+    property removed:
+        def __get__(self):
+            return self.row().removed
+        def __set__(self, bint value):
+            self.row().removed = value
+
+    property grazed:
+        def __get__(self):
+            return self.row().grazed
+
+    property attributes:
+        def __get__(self):
+            cdef Attributes *attributes = &self.row().attributes
+            return [attributes.integers[0], attributes.integers[1],
+                    attributes.integers[2], attributes.integers[3],
+                    attributes.floats[0], attributes.floats[1],
+                    attributes.floats[2], attributes.floats[3]]
+        def __set__(self, values):
+            cdef Attributes *attributes = &self.row().attributes
+            cdef long i
+
+            for i in range(4):
+                attributes.integers[i] = values[i]
+                attributes.floats[i] = values[i+4]
+
+    property objects:
+        def __get__(self):
+            return [self]
+
+
+    cdef bint reset(self, pos, BulletType bullet_type, unsigned long sprite_idx_offset,
+                    double angle, double speed, attributes, unsigned long flags, target, Game game,
+                    long player=-1, unsigned long damage=0, tuple hitbox=None) except True:
+        cdef BulletState *bullet = self.row()
         cdef double launch_mult
 
-        Element.__init__(self, pos)
+        memset(bullet, 0, sizeof(BulletState))
+        bullet.x, bullet.y = pos
+        self.sprite = None
+        self.anmrunner = None
 
         self._game = game
         self._bullet_type = bullet_type
-        self.state = LAUNCHING
-        self.was_visible = True
+        bullet.state = LAUNCHING
+        bullet.was_visible = True
 
         if hitbox is not None:
-            self.hitbox[:] = [hitbox[0], hitbox[1]]
+            bullet.hitbox[0], bullet.hitbox[1] = hitbox[0], hitbox[1]
         else:
-            self.hitbox[:] = [bullet_type.hitbox_size, bullet_type.hitbox_size]
+            bullet.hitbox[0] = bullet.hitbox[1] = bullet_type.hitbox_size
 
-        self.speed_interpolator = None
-        self.frame = 0
-        self.grazed = False
+        self.animation = None
 
         self.target = target
 
-        self.sprite_idx_offset = sprite_idx_offset
+        bullet.sprite_idx_offset = sprite_idx_offset
 
-        self.flags = flags
-        self.attributes = list(attributes)
+        bullet.flags = flags
+        self.attributes = attributes
 
-        self.angle = angle
-        self.speed = speed
-        self.dx, self.dy = cos(angle) * speed, sin(angle) * speed
+        bullet.angle = angle
+        bullet.speed = speed
+        bullet.dx, bullet.dy = cos(angle) * speed, sin(angle) * speed
 
-        self.player = player
-        self.damage = damage
+        bullet.player = player
+        bullet.damage = damage
 
         #TODO
         if flags & 14:
@@ -67,196 +258,498 @@ cdef class Bullet(Element):
             else:
                 index = bullet_type.launch_anim8_index
                 launch_mult = bullet_type.launch_anim_penalties[2]
-            self.dx, self.dy = self.dx * launch_mult, self.dy * launch_mult
-            self.sprite = Sprite()
-            self.anmrunner = ANMRunner(bullet_type.anm,
-                                        index, self.sprite,
-                                        bullet_type.launch_anim_offsets[sprite_idx_offset])
+            bullet.dx, bullet.dy = bullet.dx * launch_mult, bullet.dy * launch_mult
+            self.sprite = game.pools.new_sprite()
+            self.start_anm(bullet_type.anm, index,
+                           bullet_type.launch_anim_offsets[sprite_idx_offset])
         else:
             self.launch()
 
-        if self.player >= 0:
+        if player >= 0:
             self.sprite.angle = angle - pi
         else:
             self.sprite.angle = angle
 
 
-    cdef bint is_visible(self, unsigned int screen_width, unsigned int screen_height) nogil:
-        tw, th = self.sprite._texcoords[2], self.sprite._texcoords[3]
-        x, y = self.x, self.y
+    cdef bint update_sprite_size(self) except True:
+        # Keep in the row what the bounds checks need from the animation.
+        cdef BulletState *bullet = self.row()
 
-        max_x = tw / 2
-        max_y = th / 2
-
-        if (max_x < x - screen_width
-            or max_x < -x
-            or max_y < y - screen_height
-            or max_y < -y):
-            return False
-        return True
+        bullet.animated = self.animation is not None or self.anmrunner is not None
+        if self.sprite is not None:
+            bullet.sprite_width = self.sprite._texcoords[2]
+            bullet.sprite_height = self.sprite._texcoords[3]
 
 
     cpdef set_anim(self, sprite_idx_offset=None):
+        cdef BulletState *bullet = self.row()
+
         if sprite_idx_offset is not None:
-            self.sprite_idx_offset = sprite_idx_offset
+            bullet.sprite_idx_offset = sprite_idx_offset
 
         bt = self._bullet_type
-        self.sprite = Sprite()
-        if self.player >= 0:
-            self.sprite.angle = self.angle - pi
+        self.release_anm()
+        self.sprite = self._game.pools.new_sprite()
+        if bullet.player >= 0:
+            self.sprite.angle = bullet.angle - pi
         else:
-            self.sprite.angle = self.angle
-        self.anmrunner = ANMRunner(bt.anm, bt.anim_index,
-                                   self.sprite, self.sprite_idx_offset)
+            self.sprite.angle = bullet.angle
+        self.start_anm(bt.anm, bt.anim_index, bullet.sprite_idx_offset)
+
+
+    cdef bint start_anm(self, anm, long script, long sprite_index_offset) except True:
+        """Run this animation on the sprite, shared with the other bullets
+        when possible."""
+        self.animation = get_table(anm, script, sprite_index_offset)
+        if self.animation is None:
+            self.anmrunner = self._game.pools.new_anmrunner(anm, script, self.sprite,
+                                                            sprite_index_offset)
+        else:
+            self.row().anm_frame = 0
+            self.animation.apply(self.sprite, 0)
+        self.update_sprite_size()
+
+
+    cdef bint unshare_anm(self) except True:
+        # The animation went on past the end of its table, it now needs its
+        # own runner, brought to the same frame on a sprite of its own.
+        cdef Pools pools = self._game.pools
+        cdef Sprite sprite
+
+        sprite = pools.new_sprite()
+        sprite.angle = self.sprite.angle
+        self.anmrunner = self.animation.replay(sprite, self.row().anm_frame)
+        self.animation = None
+        pools.release_sprite(self.sprite)
+        self.sprite = sprite
+
+
+    cdef bint release_anm(self) except True:
+        cdef Pools pools = self._game.pools
+
+        self.animation = None
+        if self.anmrunner is not None:
+            pools.release_anmrunner(self.anmrunner)
+            self.anmrunner = None
+        if self.sprite is not None:
+            pools.release_sprite(self.sprite)
+            self.sprite = None
+
+
+    cdef bint release(self) except True:
+        self.release_anm()
+        self.target = None
+        self._list = None
+        self._game.pools.bullets.release(self)
 
 
     cdef bint launch(self) except True:
-        self.state = LAUNCHED
-        self.frame = 0
+        cdef BulletState *bullet = self.row()
+        cdef SpeedInterpolation *interpolation = &bullet.speed_interpolation
+
+        bullet.state = LAUNCHED
+        bullet.frame = 0
         self.set_anim()
-        self.dx, self.dy = cos(self.angle) * self.speed, sin(self.angle) * self.speed
+        bullet.dx, bullet.dy = cos(bullet.angle) * bullet.speed, sin(bullet.angle) * bullet.speed
 
-        if self.flags & 1:
-            self.speed_interpolator = Interpolator((self.speed + 5.,), 0,
-                                                   (self.speed,), 16)
+        if bullet.flags & 1:
+            interpolation.active = True
+            interpolation.start_frame = 0
+            interpolation.end_frame = 16
+            interpolation.frame = 0
+            interpolation.value = interpolation.start_value = bullet.speed + 5.
+            interpolation.end_value = bullet.speed
 
 
     cdef bint collide(self) except True:
+        cdef BulletState *bullet = self.row()
+
         self.cancel()
-        self._game.new_particle((self.x, self.y), 10, 256) #TODO: find the real size.
+        self._game.new_particle((bullet.x, bullet.y), 10, 256) #TODO: find the real size.
 
 
     @cython.cdivision(True)
     cdef bint cancel(self) except True:
+        cdef BulletState *bullet = self.row()
+
         # Cancel animation
         bt = self._bullet_type
-        self.sprite = Sprite()
-        if self.player >= 0:
-            self.sprite.angle = self.angle - pi
+        self.release_anm()
+        self.sprite = self._game.pools.new_sprite()
+        if bullet.player >= 0:
+            self.sprite.angle = bullet.angle - pi
             divisor = 8.
         else:
-            self.sprite.angle = self.angle
+            self.sprite.angle = bullet.angle
             divisor = 2.
-        self.anmrunner = ANMRunner(bt.anm, bt.cancel_anim_index,
-                                   self.sprite, bt.launch_anim_offsets[self.sprite_idx_offset])
-        self.dx /= divisor
-        self.dy /= divisor
+        self.start_anm(bt.anm, bt.cancel_anim_index,
+                       bt.launch_anim_offsets[bullet.sprite_idx_offset])
+        bullet.dx /= divisor
+        bullet.dy /= divisor
+
+        bullet.state = CANCELLED
 
-        self.state = CANCELLED
 
+    cdef bint update_anm(self) except True:
+        cdef BulletState *bullet = self.row()
+        cdef bint running
 
-    cdef bint update(self) except True:
-        cdef int frame, count, game_width, game_height
-        cdef double length, angle, speed, acceleration, angular_speed
+        if self.animation is not None:
+            bullet.anm_frame += 1
+            if self.animation.covers(bullet.anm_frame):
+                running = self.animation.apply(self.sprite, bullet.anm_frame)
+            else:
+                self.unshare_anm()
+                running = (<ANMRunner>self.anmrunner).running
+        elif self.anmrunner is not None:
+            running = (<ANMRunner>self.anmrunner).run_frame()
+        else:
+            return False
 
-        if self.anmrunner is not None and not self.anmrunner.run_frame():
-            if self.state == LAUNCHING:
+        if not running:
+            if bullet.state == LAUNCHING:
                 #TODO: check if it doesn't skip a frame
                 self.launch()
-            elif self.state == CANCELLED:
-                self.removed = True
-            else:
+            elif bullet.state == CANCELLED:
+                bullet.removed = True
+            elif self.anmrunner is not None:
+                self._game.pools.release_anmrunner(self.anmrunner)
                 self.anmrunner = None
+            else:
+                self.animation = None
+
+        self.update_sprite_size()
+
+
+    cdef int redirect(self, int width, int height) except -1:
+        # Motion of the bullets changing direction, which happens every few
+        # frames, and may need the position of their target.
+        cdef BulletState *bullet = self.row()
+        cdef SpeedInterpolation *interpolation = &bullet.speed_interpolation
+        cdef int frame, count
+        cdef double angle, speed
+
+        #TODO: check
+        frame, count = bullet.attributes.integers[0], bullet.attributes.integers[1]
+        angle, speed = bullet.attributes.floats[0], bullet.attributes.floats[1]
+        if bullet.frame % frame == 0:
+            count -= 1
+
+            if bullet.frame != 0:
+                bullet.speed = bullet.speed if speed < -900 else speed
+
+                if bullet.flags & 64:
+                    bullet.angle += angle
+                elif bullet.flags & 128:
+                    bullet.angle = atan2(self.target.y - bullet.y,
+                                         self.target.x - bullet.x) + angle
+                elif bullet.flags & 256:
+                    bullet.angle = angle
+
+                bullet.dx = cos(bullet.angle) * bullet.speed
+                bullet.dy = sin(bullet.angle) * bullet.speed
+                self.sprite.angle = bullet.angle
+                if self.sprite.automatic_orientation:
+                    self.sprite.changed = True
 
-        if self.state == LAUNCHING:
+            if count >= 0:
+                interpolation.active = True
+                interpolation.start_frame = bullet.frame
+                interpolation.end_frame = bullet.frame + frame - 1
+                interpolation.frame = 0
+                interpolation.value = interpolation.start_value = bullet.speed
+                interpolation.end_value = 0.
+            else:
+                bullet.flags &= ~448
+
+            bullet.attributes.integers[1] = count
+
+        advance(bullet)
+        return check_bounds(bullet, width, height)
+
+
+
+cdef void *grow(void *data, long size) except NULL:
+    data = realloc(data, size)
+    if data is NULL:
+        raise MemoryError
+    return data
+
+
+cdef class BulletList(list):
+    """List of bullets, backed by an array of their states.
+
+    Each Bullet of the list is a handle on the row of the same index, which
+    holds all of its numbers.  update() moves every bullet in a single pass
+    without the GIL, only going through the objects for their animations,
+    and for the few bullets which change direction or orientation.
+
+    Like ElementList, removed bullets are dropped in a single pass, keeping
+    the order of the other ones.
+    """
+
+    def __dealloc__(self):
+        free(self.rows)
+        free(self.pending)
+
+
+    cdef bint reserve(self, long size) except True:
+        if size <= self.size:
+            return False
+        size = max(size, 2 * self.size, 256)
+        self.rows = <BulletState*>grow(self.rows, size * sizeof(BulletState))
+        self.pending = <Pending*>grow(self.pending, size * sizeof(Pending))
+        self.size = size
+
+
+    cdef long add(self, Bullet bullet) except -1:
+        cdef long index = len(self)
+
+        self.reserve(index + 1)
+        list.append(self, bullet)
+        bullet._list = self
+        bullet._index = index
+        return index
+
+
+    @cython.cdivision(True)
+    cdef int move(self, long i, int width, int height) nogil:
+        cdef BulletState *bullet = &self.rows[i]
+        cdef SpeedInterpolation *interpolation = &bullet.speed_interpolation
+        cdef unsigned long period
+        cdef double length, angle, acceleration, angular_speed
+        cdef int work = 0
+
+        if bullet.state == LAUNCHING:
             pass
-        elif self.state == CANCELLED:
+        elif bullet.state == CANCELLED:
             pass
-        elif self.flags & 1:
+        elif bullet.flags & 1:
             # Initial speed burst
             #TODO: use frame instead of interpolator?
-            if not self.speed_interpolator:
-                self.flags &= ~1
-        elif self.flags & 16:
+            if not (interpolation.active and interpolation.frame < interpolation.end_frame):
+                bullet.flags &= ~1
+        elif bullet.flags & 16:
             # Each frame, add a vector to the speed vector
-            length, angle = self.attributes[4:6]
-            angle = self.angle if angle < -900.0 else angle #TODO: is that right?
-            self.dx += cos(angle) * length
-            self.dy += sin(angle) * length
-            self.speed = (self.dx ** 2 + self.dy ** 2) ** 0.5
-            self.angle = self.sprite.angle = atan2(self.dy, self.dx)
-            if self.sprite.automatic_orientation:
-                self.sprite.changed = True
-            if self.frame == self.attributes[0]: #TODO: include last frame, or not?
-                self.flags &= ~16
-        elif self.flags & 32:
+            length, angle = bullet.attributes.floats[0], bullet.attributes.floats[1]
+            angle = bullet.angle if angle < -900.0 else angle #TODO: is that right?
+            bullet.dx += cos(angle) * length
+            bullet.dy += sin(angle) * length
+            bullet.speed = (bullet.dx ** 2 + bullet.dy ** 2) ** 0.5
+            bullet.angle = atan2(bullet.dy, bullet.dx)
+            work = ORIENT
+            if <long>bullet.frame == bullet.attributes.integers[0]: #TODO: include last frame, or not?
+                bullet.flags &= ~16
+        elif bullet.flags & 32:
             # Each frame, accelerate and rotate
             #TODO: check
-            acceleration, angular_speed = self.attributes[4:6]
-            self.speed += acceleration
-            self.angle += angular_speed
-            self.dx = cos(self.angle) * self.speed
-            self.dy = sin(self.angle) * self.speed
-            self.sprite.angle = self.angle
-            if self.sprite.automatic_orientation:
-                self.sprite.changed = True
-            if self.frame == self.attributes[0]:
-                self.flags &= ~32
-        elif self.flags & 448:
-            #TODO: check
-            frame, count = self.attributes[0:2]
-            angle, speed = self.attributes[4:6]
-            if self.frame % frame == 0:
-                count -= 1
-
-                if self.frame != 0:
-                    self.speed = self.speed if speed < -900 else speed
-
-                    if self.flags & 64:
-                        self.angle += angle
-                    elif self.flags & 128:
-                        self.angle = atan2(self.target.y - self.y,
-                                           self.target.x - self.x) + angle
-                    elif self.flags & 256:
-                        self.angle = angle
-
-                    self.dx = cos(self.angle) * self.speed
-                    self.dy = sin(self.angle) * self.speed
-                    self.sprite.angle = self.angle
-                    if self.sprite.automatic_orientation:
-                        self.sprite.changed = True
-
-                if count >= 0:
-                    self.speed_interpolator = Interpolator((self.speed,), self.frame,
-                                                           (0.,), self.frame + frame - 1)
-                else:
-                    self.flags &= ~448
-
-                self.attributes[1] = count
-
-        # Common updates
-
-        if self.speed_interpolator:
-            self.speed_interpolator.update(self.frame)
-            speed, = self.speed_interpolator.values
-            self.dx = cos(self.angle) * speed
-            self.dy = sin(self.angle) * speed
-
-        self.x += self.dx
-        self.y += self.dy
-
-        self.frame += 1
-
-        game_width, game_height = self._game.width, self._game.height
-
-        # Filter out-of-screen bullets and handle special flags
-        if self.flags & 448:
-            self.was_visible = False
-        elif self.is_visible(game_width, game_height):
-            self.was_visible = True
-        elif self.was_visible:
-            self.removed = True
-            if self.flags & (1024 | 2048) and self.attributes[0] > 0:
-                # Bounce!
-                if self.x < 0 or self.x > game_width:
-                    self.angle = pi - self.angle
-                    self.removed = False
-                if self.y < 0 or ((self.flags & 1024) and self.y > game_height):
-                    self.angle = -self.angle
-                    self.removed = False
-                self.sprite.angle = self.angle
-                if self.sprite.automatic_orientation:
-                    self.sprite.changed = True
-                self.dx = cos(self.angle) * self.speed
-                self.dy = sin(self.angle) * self.speed
-                self.attributes[0] -= 1
+            acceleration, angular_speed = bullet.attributes.floats[0], bullet.attributes.floats[1]
+            bullet.speed += acceleration
+            bullet.angle += angular_speed
+            bullet.dx = cos(bullet.angle) * bullet.speed
+            bullet.dy = sin(bullet.angle) * bullet.speed
+            work = ORIENT
+            if <long>bullet.frame == bullet.attributes.integers[0]:
+                bullet.flags &= ~32
+        elif bullet.flags & 448:
+            # Left to Bullet.redirect() on the frames it changes direction.
+            period = <int>bullet.attributes.integers[0]
+            if period == 0 or bullet.frame % period == 0:
+                return REDIRECT
+
+        advance(bullet)
+        return work | check_bounds(bullet, width, height)
+
+
+    cdef bint update(self, int width, int height) except True:
+        cdef list bullets = self
+        cdef Bullet bullet
+        cdef Sprite sprite
+        cdef long i, j, length, nb_pending = 0
+        cdef int work
+
+        length = len(bullets)
+        for i in range(length):
+            if self.rows[i].animated:
+                bullet = bullets[i]
+                bullet.update_anm()
+
+        with nogil:
+            for i in range(length):
+                work = self.move(i, width, height)
+                if work:
+                    self.pending[nb_pending].index = i
+                    self.pending[nb_pending].work = work
+                    nb_pending += 1
+
+        for j in range(nb_pending):
+            i = self.pending[j].index
+            work = self.pending[j].work
+            bullet = bullets[i]
+            if work & REDIRECT:
+                work = bullet.redirect(width, height)
+            if work & ORIENT:
+                sprite = bullet.sprite
+                sprite.angle = self.rows[i].angle
+                if sprite.automatic_orientation:
+                    sprite.changed = True
+
+
+    cpdef compact(self):
+        cdef list bullets = self
+        cdef Bullet bullet
+        cdef long i, length = 0
+
+        for i in range(len(bullets)):
+            if self.rows[i].removed:
+                continue
+            if i != length:
+                bullet = bullets[i]
+                self.rows[length] = self.rows[i]
+                bullets[length] = bullet
+                bullet._index = length
+            length += 1
+        del bullets[length:]
+
+
+    cdef bint sort(self, BulletList cancelled_bullets) except True:
+        # Drop the removed bullets, and move the cancelled ones to their own
+        # list, if there is one.
+        cdef list bullets = self
+        cdef Bullet bullet
+        cdef long i, j, length = 0
+
+        for i in range(len(bullets)):
+            bullet = bullets[i]
+            if self.rows[i].removed:
+                bullet.release()
+            elif cancelled_bullets is not None and self.rows[i].state == CANCELLED:
+                j = cancelled_bullets.add(bullet)
+                cancelled_bullets.rows[j] = self.rows[i]
+            else:
+                if i != length:
+                    self.rows[length] = self.rows[i]
+                    bullets[length] = bullet
+                    bullet._index = length
+                length += 1
+        del bullets[length:]
+
+
+    cdef bint release_all(self) except True:
+        cdef Bullet bullet
+
+        for bullet in self:
+            bullet.release()
+        del self[:]
+
+
+# Objects a bullet can reference, saved next to the block of numbers.  Only
+# those which aren’t None are, the bits of its mask telling which ones.
+cdef enum:
+    REF_BULLET_TYPE, REF_TARGET, REF_RUNNER, REF_ANM, REF_SCALE_INTERPOLATOR,
+    REF_FADE_INTERPOLATOR, REF_OFFSET_INTERPOLATOR, REF_ROTATION_INTERPOLATOR,
+    REF_COLOR_INTERPOLATOR, REF_ANIMATION
+
+
+cdef struct PackedBullet:
+    BulletState bullet
+    SpriteState sprite
+    bint has_sprite
+    unsigned int refs
+
+
+cdef inline bint add_ref(list refs, object obj, PackedBullet *packed, int ref) except True:
+    if obj is not None:
+        refs.append(obj)
+        packed.refs |= 1 << ref
+
+
+cdef inline object get_ref(list refs, Py_ssize_t *j, const PackedBullet *packed, int ref):
+    if not packed.refs & (1 << ref):
+        return None
+    j[0] += 1
+    return refs[j[0] - 1]
+
+
+cdef tuple pack_bullets(BulletList bullets):
+    """Save a list of bullets as a single block of numbers, and a flat list of
+    the objects they reference, a lot faster than pickling each of them."""
+    cdef Bullet bullet
+    cdef Sprite sprite
+    cdef PackedBullet *packed
+    cdef bytes data
+    cdef list refs
+    cdef Py_ssize_t i
+
+    data = PyBytes_FromStringAndSize(NULL, len(bullets) * sizeof(PackedBullet))
+    refs = []
+    for i in range(len(bullets)):
+        bullet = bullets[i]
+        packed = &(<PackedBullet*>PyBytes_AS_STRING(data))[i]
+        memset(packed, 0, sizeof(PackedBullet))
+        packed.bullet = bullets.rows[i]
+        add_ref(refs, bullet._bullet_type, packed, REF_BULLET_TYPE)
+        add_ref(refs, bullet.target, packed, REF_TARGET)
+
+        # The animation runner references the sprite, which is already there.
+        runner = bullet.anmrunner
+        if runner is not None:
+            runner_state = runner.__getstate__()
+            add_ref(refs, runner_state[:1] + runner_state[2:], packed, REF_RUNNER)
+
+        sprite = bullet.sprite
+        packed.has_sprite = sprite is not None
+        if sprite is not None:
+            sprite.get_state(&packed.sprite)
+            add_ref(refs, sprite.anm, packed, REF_ANM)
+            add_ref(refs, sprite.scale_interpolator, packed, REF_SCALE_INTERPOLATOR)
+            add_ref(refs, sprite.fade_interpolator, packed, REF_FADE_INTERPOLATOR)
+            add_ref(refs, sprite.offset_interpolator, packed, REF_OFFSET_INTERPOLATOR)
+            add_ref(refs, sprite.rotation_interpolator, packed, REF_ROTATION_INTERPOLATOR)
+            add_ref(refs, sprite.color_interpolator, packed, REF_COLOR_INTERPOLATOR)
+
+        add_ref(refs, bullet.animation, packed, REF_ANIMATION)
+    return data, refs
+
+
+cdef BulletList unpack_bullets(Game game, bytes data, list refs):
+    """Recreate a list of bullets saved by pack_bullets()."""
+    cdef Bullet bullet
+    cdef Sprite sprite
+    cdef const PackedBullet *packed
+    cdef BulletList bullets
+    cdef Py_ssize_t i, j = 0, length
+
+    length = len(data) // sizeof(PackedBullet)
+    assert len(data) == length * sizeof(PackedBullet)
+    bullets = BulletList()
+    bullets.reserve(length)
+    for i in range(length):
+        packed = &(<const PackedBullet*>PyBytes_AS_STRING(data))[i]
+        bullet = Bullet()
+        bullets.add(bullet)
+        bullets.rows[i] = packed.bullet
+        bullet._game = game
+        bullet._bullet_type = get_ref(refs, &j, packed, REF_BULLET_TYPE)
+        bullet.target = get_ref(refs, &j, packed, REF_TARGET)
+        runner_state = get_ref(refs, &j, packed, REF_RUNNER)
+
+        if packed.has_sprite:
+            sprite = Sprite.__new__(Sprite)
+            sprite.set_state(&packed.sprite)
+            sprite.anm = get_ref(refs, &j, packed, REF_ANM)
+            sprite.scale_interpolator = get_ref(refs, &j, packed, REF_SCALE_INTERPOLATOR)
+            sprite.fade_interpolator = get_ref(refs, &j, packed, REF_FADE_INTERPOLATOR)
+            sprite.offset_interpolator = get_ref(refs, &j, packed, REF_OFFSET_INTERPOLATOR)
+            sprite.rotation_interpolator = get_ref(refs, &j, packed, REF_ROTATION_INTERPOLATOR)
+            sprite.color_interpolator = get_ref(refs, &j, packed, REF_COLOR_INTERPOLATOR)
+            bullet.sprite = sprite
+
+        if runner_state is not None:
+            runner = ANMRunner.__new__(ANMRunner)
+            runner.__setstate__(runner_state[:1] + (bullet.sprite,) + runner_state[1:])
+            bullet.anmrunner = runner
+
+        bullet.animation = get_ref(refs, &j, packed, REF_ANIMATION)
+    assert j == len(refs)
+    return bullets
@@ -1,4 +1,8 @@
 from pytouhou.game.element cimport Element
+from pytouhou.vm.anmtable cimport ANMTable
 
 cdef class Effect(Element):
+    cdef ANMTable table
+    cdef long anm_frame
+
     cpdef update(self)
@@ -13,18 +13,35 @@
 ##
 
 from pytouhou.game.sprite cimport Sprite
+from pytouhou.vm.anmtable cimport get_table
 from pytouhou.vm import ANMRunner
 
 
 cdef class Effect(Element):
-    def __init__(self, pos, index, anm):
+    def __init__(self, pos, index, anm, bint baked=False):
+        """With baked, the animation is looked up in its table, if it has
+        one, which is only possible if nothing else but its age changes the
+        sprite."""
         Element.__init__(self, pos)
         self.sprite = Sprite()
-        self.anmrunner = ANMRunner(anm, index, self.sprite)
+        self.table = get_table(anm, index) if baked else None
+        if self.table is None:
+            self.anmrunner = ANMRunner(anm, index, self.sprite)
+        else:
+            self.anm_frame = 0
+            self.table.apply(self.sprite, 0)
 
 
     cpdef update(self):
-        if self.anmrunner is not None and not self.anmrunner.run_frame():
+        if self.table is not None:
+            self.anm_frame += 1
+            if not self.table.covers(self.anm_frame):
+                self.sprite = Sprite()
+                self.anmrunner = self.table.replay(self.sprite, self.anm_frame)
+                self.table = None
+            elif not self.table.apply(self.sprite, self.anm_frame):
+                self.table = None
+        elif self.anmrunner is not None and not self.anmrunner.run_frame():
             self.anmrunner = None
 
         if self.sprite is not None:
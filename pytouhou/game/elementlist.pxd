@@ -0,0 +1,2 @@
+cdef class ElementList(list):
+    cpdef compact(self)
@@ -0,0 +1,45 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+from pytouhou.game.element cimport Element
+
+
+cdef class ElementList(list):
+    """List of elements, meant to be filtered in place.
+
+    Removing an element is only setting its removed flag, and compact() then
+    drops every removed element in a single pass, keeping the order of the
+    other ones since updates have to happen in the same order as in the
+    original game.  Contrary to rebuilding the list, this doesn’t allocate
+    anything.
+    """
+
+    def __reduce__(self):
+        return ElementList, (), None, iter(self)
+
+
+    cpdef compact(self):
+        cdef list elements = self
+        cdef Element element
+        cdef Py_ssize_t i, length
+
+        length = 0
+        for i in range(len(elements)):
+            element = elements[i]
+            if element.removed:
+                continue
+            if i != length:
+                elements[length] = element
+            length += 1
+        del elements[length:]
@@ -3,6 +3,18 @@ from pytouhou.game.game cimport Game
 from pytouhou.game.player cimport Player
 from pytouhou.utils.interpolator cimport Interpolator
 
+# Numeric part of an enemy, saved as a single block in snapshots.
+cdef struct EnemyState:
+    double x, y, z, angle, speed, rotation_speed, acceleration
+    double hitbox_half_size[2]
+    long type, bonus_dropped, die_score, frame, life, death_flags
+    long current_laser_id, low_life_trigger, timeout, remaining_lives
+    long bullet_launch_interval, bullet_launch_timer, death_anim, direction
+    long update_mode
+    bint removed, visible, was_visible, touchable, collidable, damageable
+    bint boss, automatic_orientation, delay_attack
+
+
 cdef class Callback:
     cdef function
     cdef public tuple args  # XXX: public only for ECL’s copy_callbacks.
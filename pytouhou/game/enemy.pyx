@@ -13,12 +13,17 @@
 ##
 
 from libc.math cimport cos, sin, atan2, M_PI as pi
+from libc.string cimport memcpy, memset
+
+from copyreg import __newobj__
 
 from pytouhou.vm import ANMRunner
 from pytouhou.game.sprite import Sprite
-from pytouhou.game.bullet cimport Bullet, LAUNCHED
+from pytouhou.game.bullet cimport (Bullet, BulletList, BulletState, LAUNCHED,
+                                    new_bullet)
 from pytouhou.game.laser cimport Laser, PlayerLaser
 from pytouhou.game.effect cimport Effect
+from pytouhou.utils.grid cimport Grid
 
 
 cdef class Callback:
@@ -108,6 +113,103 @@ cdef class Enemy(Element):
             return [self] + [anm for anm in self.aux_anm if anm is not None]
 
 
+    def __reduce__(self):
+        cdef EnemyState state
+
+        # Zero the padding too, so that equal enemies give equal bytes.
+        memset(&state, 0, sizeof(EnemyState))
+        state.x, state.y, state.z = self.x, self.y, self.z
+        state.angle = self.angle
+        state.speed = self.speed
+        state.rotation_speed = self.rotation_speed
+        state.acceleration = self.acceleration
+        memcpy(state.hitbox_half_size, self.hitbox_half_size, sizeof(self.hitbox_half_size))
+        state.type = self._type
+        state.bonus_dropped = self.bonus_dropped
+        state.die_score = self.die_score
+        state.frame = self.frame
+        state.life = self.life
+        state.death_flags = self.death_flags
+        state.current_laser_id = self.current_laser_id
+        state.low_life_trigger = self.low_life_trigger
+        state.timeout = self.timeout
+        state.remaining_lives = self.remaining_lives
+        state.bullet_launch_interval = self.bullet_launch_interval
+        state.bullet_launch_timer = self.bullet_launch_timer
+        state.death_anim = self.death_anim
+        state.direction = self.direction
+        state.update_mode = self.update_mode
+        state.removed = self.removed
+        state.visible = self.visible
+        state.was_visible = self.was_visible
+        state.touchable = self.touchable
+        state.collidable = self.collidable
+        state.damageable = self.damageable
+        state.boss = self.boss
+        state.automatic_orientation = self.automatic_orientation
+        state.delay_attack = self.delay_attack
+
+        return __newobj__, (Enemy,), ((<char*>&state)[:sizeof(EnemyState)],
+                                      self.sprite, self.objects, self.anmrunner,
+                                      self.difficulty_coeffs,
+                                      self.extended_bullet_attributes,
+                                      self.bullet_attributes,
+                                      self.bullet_launch_offset,
+                                      self.movement_dependant_sprites,
+                                      self.screen_box, self.death_callback,
+                                      self.boss_callback, self.low_life_callback,
+                                      self.timeout_callback, self.laser_by_id,
+                                      self.aux_anm, self.interpolator,
+                                      self.speed_interpolator, self._anms,
+                                      self.process, self._game)
+
+
+    def __setstate__(self, tuple state):
+        cdef bytes data
+        cdef const EnemyState *enemy
+
+        (data, self.sprite, self.objects, self.anmrunner, self.difficulty_coeffs,
+         self.extended_bullet_attributes, self.bullet_attributes,
+         self.bullet_launch_offset, self.movement_dependant_sprites,
+         self.screen_box, self.death_callback, self.boss_callback,
+         self.low_life_callback, self.timeout_callback, self.laser_by_id,
+         self.aux_anm, self.interpolator, self.speed_interpolator, self._anms,
+         self.process, self._game) = state
+
+        assert len(data) == sizeof(EnemyState)
+        enemy = <const EnemyState*><char*>data
+        self.x, self.y, self.z = enemy.x, enemy.y, enemy.z
+        self.angle = enemy.angle
+        self.speed = enemy.speed
+        self.rotation_speed = enemy.rotation_speed
+        self.acceleration = enemy.acceleration
+        memcpy(self.hitbox_half_size, enemy.hitbox_half_size, sizeof(self.hitbox_half_size))
+        self._type = enemy.type
+        self.bonus_dropped = enemy.bonus_dropped
+        self.die_score = enemy.die_score
+        self.frame = enemy.frame
+        self.life = enemy.life
+        self.death_flags = enemy.death_flags
+        self.current_laser_id = enemy.current_laser_id
+        self.low_life_trigger = enemy.low_life_trigger
+        self.timeout = enemy.timeout
+        self.remaining_lives = enemy.remaining_lives
+        self.bullet_launch_interval = enemy.bullet_launch_interval
+        self.bullet_launch_timer = enemy.bullet_launch_timer
+        self.death_anim = enemy.death_anim
+        self.direction = enemy.direction
+        self.update_mode = enemy.update_mode
+        self.removed = enemy.removed
+        self.visible = enemy.visible
+        self.was_visible = enemy.was_visible
+        self.touchable = enemy.touchable
+        self.collidable = enemy.collidable
+        self.damageable = enemy.damageable
+        self.boss = enemy.boss
+        self.automatic_orientation = enemy.automatic_orientation
+        self.delay_attack = enemy.delay_attack
+
+
     cpdef play_sound(self, index):
         name = {
             5: 'power0',
@@ -209,10 +311,10 @@ cdef class Enemy(Element):
                     bullet_angle = self._game.prng.rand_double() * (launch_angle - angle) + angle
                 if type_ in (74, 75): # 102h.exe@0x4138cf
                     shot_speed = self._game.prng.rand_double() * (speed - speed2) + speed2
-                bullets.append(Bullet(launch_pos, bullet_type, sprite_idx_offset,
-                                      bullet_angle, shot_speed,
-                                      self.extended_bullet_attributes,
-                                      flags, player, self._game))
+                new_bullet(bullets, launch_pos, bullet_type, sprite_idx_offset,
+                           bullet_angle, shot_speed,
+                           self.extended_bullet_attributes,
+                           flags, player, self._game)
 
                 if type_ in (69, 70, 71, 74):
                     bullet_angle += 2. * pi / bullets_per_shot
@@ -245,7 +347,7 @@ cdef class Enemy(Element):
 
     cpdef Player select_player(self, list players=None):
         if players is None:
-            players = self._game.players
+            return self._game.nearest_player(self.x, self.y)
         return min(players, key=self.select_player_key)
 
 
@@ -339,10 +441,12 @@ cdef class Enemy(Element):
 
 
     cdef bint check_collisions(self) except True:
-        cdef Bullet bullet
+        cdef BulletState *bullet
         cdef Player player
         cdef PlayerLaser laser
-        cdef long damages
+        cdef Grid grid
+        cdef BulletList bullets
+        cdef long damages, i, nb_candidates
         cdef double half_size[2]
         cdef double phalf_size
 
@@ -355,8 +459,13 @@ cdef class Enemy(Element):
 
         damages = 0
 
-        # Check for enemy-bullet collisions
-        for bullet in self._game.players_bullets:
+        # Check for enemy-bullet collisions, using the index built by the
+        # game for this frame.
+        bullets = self._game.players_bullets
+        grid = self._game.players_bullets_grid
+        nb_candidates = grid.query(ex1, ey1, ex2, ey2)
+        for i in range(nb_candidates):
+            bullet = &bullets.rows[grid.results[i]]
             if bullet.state != LAUNCHED:
                 continue
             half_size[0] = bullet.hitbox[0]
@@ -367,8 +476,8 @@ cdef class Enemy(Element):
 
             if not (bx2 < ex1 or bx1 > ex2
                     or by2 < ey1 or by1 > ey2):
-                bullet.collide()
                 damages += bullet.damage
+                (<Bullet>bullets[grid.results[i]]).collide()
                 self._game.sfx_player.play('damage00.wav')
 
         # Check for enemy-laser collisions
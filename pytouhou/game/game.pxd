@@ -1,27 +1,55 @@
 from pytouhou.game.effect cimport Effect
+from pytouhou.game.elementlist cimport ElementList
+from pytouhou.game.bullet cimport BulletList
+from pytouhou.game.item cimport ItemList
 from pytouhou.game.player cimport Player
 from pytouhou.game.text cimport Text, NativeText
 from pytouhou.game.music cimport MusicPlayer
 from pytouhou.utils.random cimport Random
+from pytouhou.utils.grid cimport Grid
+from pytouhou.game.particle cimport ParticleSystem
+from pytouhou.game.pools cimport Pools
+from pytouhou.utils.timings cimport Timings
+from libc.stdint cimport uint64_t
+
+# Position of a player, as used for targeting.
+cdef struct Target:
+    double x, y
+    long character
+
 
 cdef class Game:
     cdef public long width, height, nb_bullets_max, stage, rank, difficulty, difficulty_min, difficulty_max, frame
-    cdef public list bullet_types, laser_types, item_types, players, enemies, effects, bullets, lasers, cancelled_bullets, players_bullets, players_lasers, items, labels, faces, hints, bonus_list
+    cdef public list bullet_types, laser_types, item_types, players, players_lasers, faces, hints, bonus_list
+    cdef public ElementList enemies, effects, lasers, labels
+    cdef public BulletList bullets, cancelled_bullets, players_bullets
+    cdef public ItemList items
     cdef public object interface, boss, msg_runner
     cdef public dict texts
     cdef public MusicPlayer sfx_player
     cdef public Random prng
+    cdef public Pools pools
+    cdef public ParticleSystem particles
+    cdef public Timings timings
     cdef public double continues
     cdef public Effect spellcard_effect
     cdef public tuple spellcard
-    cdef public bint time_stop, msg_wait
+    cdef public bint time_stop, msg_wait, hash_states
+    cdef public uint64_t state_hash
     cdef public unsigned short deaths_count, next_bonus
 
     cdef long difficulty_counter, last_keystate
     cdef bint friendly_fire
+    cdef Grid bullets_grid, players_bullets_grid
+    cdef object snapshotter
+    cdef Target *targets
+    cdef long nb_targets
 
     cdef list msg_sprites(self)
     cdef list lasers_sprites(self)
+    cdef bint update_targets(self) except True
+    cdef Player nearest_player(self, double x, double y)
+    cdef Player lowest_score_player(self)
     cdef void modify_difficulty(self, long diff) nogil
     cpdef enable_spellcard_effect(self)
     cpdef disable_spellcard_effect(self)
@@ -50,5 +78,10 @@ cdef class Game:
     cdef bint update_effects(self) except True
     cdef bint update_hints(self) except True
     cdef bint update_faces(self) except True
+    cdef bint index_bullets(self, Grid grid, BulletList bullets) except True
     cdef bint update_bullets(self) except True
     cpdef cleanup(self)
+    cdef bint update_state_hash(self) except True
+    cdef list shared_objects(self)
+    cpdef bytes snapshot(self)
+    cpdef restore(self, bytes data)
@@ -14,13 +14,21 @@
 
 from pytouhou.vm import MSGRunner
 
+from libc.stdlib cimport realloc, free
+from libc.math cimport M_PI as pi
+
 from pytouhou.game.element cimport Element
-from pytouhou.game.bullet cimport Bullet, LAUNCHED, CANCELLED
+from pytouhou.game.bullet cimport (Bullet, BulletList, BulletState, LAUNCHED,
+                                    pack_bullets, unpack_bullets)
 from pytouhou.game.enemy cimport Enemy
-from pytouhou.game.item cimport Item
-from pytouhou.game.particle cimport Particle
-from pytouhou.game.laser cimport Laser, PlayerLaser
+from pytouhou.game.item cimport Item, ItemList, new_item, pack_items, unpack_items
+from pytouhou.game.laser cimport Laser, PlayerLaser, Contact, COLLISION, GRAZING
 from pytouhou.game.face import Face
+from pytouhou.game.snapshot import Snapshotter, get_state
+from pytouhou.utils.checksum cimport mix, mix_double
+from pytouhou.utils.timings cimport (Timings, VMS, COMPACTION, BACKGROUND, MSG,
+                                     PLAYERS, ENEMIES, EFFECTS, BULLETS, LASERS,
+                                     INTERFACE, TEXTS, CLEANUP)
 
 
 cdef class Game:
@@ -36,15 +44,16 @@ cdef class Game:
         self.item_types = item_types
 
         self.players = players
-        self.enemies = []
-        self.effects = []
-        self.bullets = []
-        self.lasers = []
-        self.cancelled_bullets = []
-        self.players_bullets = []
+        self.enemies = ElementList()
+        self.effects = ElementList()
+        self.particles = ParticleSystem()
+        self.bullets = BulletList()
+        self.lasers = ElementList()
+        self.cancelled_bullets = BulletList()
+        self.players_bullets = BulletList()
         self.players_lasers = [None, None]
-        self.items = []
-        self.labels = []
+        self.items = ItemList()
+        self.labels = ElementList()
         self.faces = [None, None]
         self.texts = {}
         self.interface = interface
@@ -76,6 +85,75 @@ cdef class Game:
         self.friendly_fire = friendly_fire
         self.last_keystate = 0
 
+        # Objects to reuse instead of allocating new ones.
+        self.pools = Pools()
+
+        # Broadphases for enemy and player bullets, rebuilt every frame.
+        self.bullets_grid = Grid(-32., -32., width + 64., height + 64.)
+        self.players_bullets_grid = Grid(-32., -32., width + 64., height + 64.)
+
+        # Positions of the players, for the enemies to target them.
+        self.update_targets()
+
+
+    def __dealloc__(self):
+        free(self.targets)
+
+
+    cdef bint update_targets(self) except True:
+        # Players only move in their own update, so this is done after it,
+        # and before the VMs in case the state was restored in-between.
+        cdef Player player
+        cdef Target *targets
+        cdef long i, nb_targets
+
+        nb_targets = len(self.players)
+        if nb_targets > self.nb_targets:
+            targets = <Target*>realloc(self.targets, nb_targets * sizeof(Target))
+            if targets is NULL:
+                raise MemoryError
+            self.targets = targets
+        self.nb_targets = nb_targets
+
+        for i in range(nb_targets):
+            player = self.players[i]
+            self.targets[i].x = player.x
+            self.targets[i].y = player.y
+            self.targets[i].character = player.character
+
+
+    cdef Player nearest_player(self, double x, double y):
+        """Return the player closest to (x, y), or the one with the lowest
+        character in case of a tie."""
+        cdef Target *target
+        cdef double dx, dy, distance, nearest_distance = 0.
+        cdef long i, nearest = 0
+
+        for i in range(self.nb_targets):
+            target = &self.targets[i]
+            dx = target.x - x
+            dy = target.y - y
+            distance = dx * dx + dy * dy
+            if (i == 0 or distance < nearest_distance
+                    or (distance == nearest_distance
+                        and target.character < self.targets[nearest].character)):
+                nearest = i
+                nearest_distance = distance
+        return self.players[nearest]
+
+
+    cdef Player lowest_score_player(self):
+        """Return the player with the lowest score, or the one with the
+        lowest character in case of a tie."""
+        cdef Player player, lowest = None
+
+        for player in self.players:
+            if (lowest is None or player.score < lowest.score
+                    or (player.score == lowest.score
+                        and player.character < lowest.character)):
+                lowest = player
+        return lowest
+
 
     cdef list msg_sprites(self):
         return [face for face in self.faces if face is not None] if self.msg_runner is not None and not self.msg_runner.ended else []
@@ -136,15 +214,13 @@ cdef class Game:
         if len(self.items) >= self.nb_bullets_max:
             return #TODO: check
         item_type = self.item_types[_type]
-        self.items.append(Item((x, y), _type, item_type, self, end_pos=end_pos,
-                               player=player))
+        new_item(self.items, (x, y), _type, item_type, self, pi/2, player,
+                 end_pos)
 
 
     cdef bint autocollect(self, Player player) except True:
-        cdef Item item
-
-        for item in self.items:
-            item.autocollect(player)
+        self.items.autocollect(0, len(self.items), self.players.index(player),
+                               player.sht.autocollection_speed)
 
 
     cdef bint cancel_bullets(self) except True:
@@ -165,35 +241,37 @@ cdef class Game:
 
     cpdef change_bullets_into_star_items(self):
         cdef Player player
-        cdef Bullet bullet
+        cdef BulletList bullets = self.bullets
+        cdef ItemList items = self.items
         cdef Laser laser
-        cdef Item item
+        cdef long i, start
 
-        player = min(self.players, key=select_player_key)
+        player = self.lowest_score_player()
         item_type = self.item_types[6]
-        items = [Item((bullet.x, bullet.y), 6, item_type, self)
-                 for bullet in self.bullets]
+        start = len(items)
+        for i in range(len(bullets)):
+            new_item(items, (bullets.rows[i].x, bullets.rows[i].y), 6, item_type, self)
         for laser in self.lasers:
-            items.extend([Item(pos, 6, item_type, self)
-                          for pos in laser.get_bullets_pos()])
+            for pos in laser.get_bullets_pos():
+                new_item(items, pos, 6, item_type, self)
             laser.cancel()
-        for item in items:
-            item.autocollect(player)
-        self.items.extend(items)
-        self.bullets = []
+        items.autocollect(start, len(items), self.players.index(player),
+                          player.sht.autocollection_speed)
+        bullets.release_all()
 
 
     cpdef change_bullets_into_bonus(self):
         cdef Player player
-        cdef Bullet bullet
+        cdef BulletList bullets = self.bullets
+        cdef long i
 
         score = 0
         bonus = 2000
-        for bullet in self.bullets:
-            self.new_label((bullet.x, bullet.y), str(bonus).encode())
+        for i in range(len(bullets)):
+            self.new_label((bullets.rows[i].x, bullets.rows[i].y), str(bonus).encode())
             score += bonus
             bonus += 10
-        self.bullets = []
+        bullets.release_all()
         #TODO: display the final bonus score.
 
         #TODO: do we really want to give it to each player?
@@ -215,15 +293,28 @@ cdef class Game:
 
 
     cpdef new_effect(self, pos, long anim, anm=None, long number=1):
-        number = min(number, self.nb_bullets_max - len(self.effects))
+        number = min(number, self.nb_bullets_max - len(self.effects) - len(self.particles))
         for i in range(number):
-            self.effects.append(Effect(pos, anim, anm or self.etama[1]))
+            self.effects.append(Effect(pos, anim, anm or self.etama[1], True))
 
 
     cpdef new_particle(self, pos, long anim, long amp, long number=1, bint reverse=False, long duration=24):
-        number = min(number, self.nb_bullets_max - len(self.effects))
+        cdef double x, y, end_x, end_y
+        cdef long kind
+
+        number = min(number, self.nb_bullets_max - len(self.effects) - len(self.particles))
+        if number <= 0:
+            return
+
+        x, y = pos
+        kind = self.particles.get_kind(self.etama[1], anim)
         for i in range(number):
-            self.effects.append(Particle(pos, anim, self.etama[1], amp, self, reverse=reverse, duration=duration))
+            end_x = x + amp * self.prng.rand_double() - amp / 2
+            end_y = y + amp * self.prng.rand_double() - amp / 2
+            if not reverse:
+                self.particles.add(kind, x, y, end_x, end_y, duration)
+            else:
+                self.particles.add(kind, end_x, end_y, x, y, duration)
 
 
     cpdef new_enemy(self, pos, life, instr_type, bonus_dropped, die_score):
@@ -271,21 +362,32 @@ cdef class Game:
     cpdef run_iter(self, list keystates):
         cdef Laser laser
         cdef long i
+        cdef Timings timings = self.timings
+
+        if timings is not None:
+            timings.begin()
+
+        self.update_targets()
 
         # 1. VMs.
         for runner in self.ecl_runners:
             runner.run_iter()
+        if timings is not None:
+            timings.mark(VMS)
 
         # 2. Modify difficulty
         if self.frame % (32*60) == (32*60): #TODO: check if that is really that frame.
             self.modify_difficulty(+100)
 
         # 3. Filter out destroyed enemies
-        self.enemies = filter_removed(self.enemies)
-        self.effects = filter_removed(self.effects)
-        self.bullets = filter_removed(self.bullets)
-        self.cancelled_bullets = filter_removed(self.cancelled_bullets)
-        self.items = filter_removed(self.items)
+        self.enemies.compact()
+        self.effects.compact()
+        self.particles.compact()
+        self.bullets.compact()
+        self.cancelled_bullets.compact()
+        self.items.compact()
+        if timings is not None:
+            timings.mark(COMPACTION)
 
         # 4. Let's play!
         # In the original game, updates are done in prioritized functions called "chains"
@@ -293,17 +395,34 @@ cdef class Game:
 
         # Pri 6 is background
         self.update_background() #TODO: Pri unknown
+        if timings is not None:
+            timings.mark(BACKGROUND)
         if self.msg_runner is not None:
             self.update_msg(keystates[0]) # Pri ?
             for i in range(len(keystates)):
                 keystates[i] &= ~3 # Remove the ability to attack (keystates 1 and 2).
+            if timings is not None:
+                timings.mark(MSG)
         self.update_players(keystates) # Pri 7
+        self.update_targets()
+        if timings is not None:
+            timings.mark(PLAYERS)
         self.update_enemies() # Pri 9
+        if timings is not None:
+            timings.mark(ENEMIES)
         self.update_effects() # Pri 10
+        if timings is not None:
+            timings.mark(EFFECTS)
         self.update_bullets() # Pri 11
+        if timings is not None:
+            timings.mark(BULLETS)
         for laser in self.lasers: #TODO: what priority is it?
             laser.update()
+        if timings is not None:
+            timings.mark(LASERS)
         self.interface.update() # Pri 12
+        if timings is not None:
+            timings.mark(INTERFACE)
         if self.hints:
             self.update_hints() # Not from this game, so unknown.
         for label in self.labels: #TODO: what priority is it?
@@ -312,11 +431,17 @@ cdef class Game:
             if text is not None:
                 text.update()
         self.update_faces() # Pri XXX
+        if timings is not None:
+            timings.mark(TEXTS)
 
         # 5. Clean up
         self.cleanup()
+        if timings is not None:
+            timings.mark(CLEANUP)
 
         self.frame += 1
+        if self.hash_states:
+            self.update_state_hash()
 
 
     cdef bint update_background(self) except True:
@@ -330,6 +455,9 @@ cdef class Game:
     cdef bint update_enemies(self) except True:
         cdef Enemy enemy
 
+        # Player bullets won’t move nor be fired again until the next frame.
+        self.index_bullets(self.players_bullets_grid, self.players_bullets)
+
         for enemy in self.enemies:
             enemy.update()
 
@@ -347,15 +475,13 @@ cdef class Game:
 
 
     cdef bint update_players(self, list keystates) except True:
-        cdef Bullet bullet
         cdef Player player
         cdef long keystate
 
         if self.time_stop:
             return False
 
-        for bullet in self.players_bullets:
-            bullet.update()
+        self.players_bullets.update(self.width, self.height)
 
         for player, keystate in zip(self.players, keystates):
             player.update(keystate) #TODO: differentiate keystates (multiplayer mode)
@@ -378,6 +504,7 @@ cdef class Game:
 
         for effect in self.effects:
             effect.update()
+        self.particles.update()
 
 
     cdef bint update_hints(self) except True:
@@ -392,37 +519,61 @@ cdef class Game:
                 face.update()
 
 
+    cdef bint index_bullets(self, Grid grid, BulletList bullets) except True:
+        # Index every launched bullet once, so that each player or enemy only
+        # has to test the few ones sharing a cell with its hitbox.  Candidates
+        # come back in list order, so collisions still happen in that order.
+        cdef BulletState *bullet
+        cdef double bhalf_width, bhalf_height
+        cdef long i
+
+        grid.clear()
+        for i in range(len(bullets)):
+            bullet = &bullets.rows[i]
+            if bullet.state != LAUNCHED:
+                continue
+            bhalf_width = bullet.hitbox[0]
+            bhalf_height = bullet.hitbox[1]
+            grid.insert(i, bullet.x - bhalf_width, bullet.y - bhalf_height,
+                        bullet.x + bhalf_width, bullet.y + bhalf_height)
+
+
     cdef bint update_bullets(self) except True:
         cdef Player player
-        cdef Bullet bullet
-        cdef Item item
+        cdef BulletState *bullet
         cdef PlayerLaser player_laser
         cdef Laser laser
         cdef PlayerLaser plaser
-        cdef double player_pos[2]
+        cdef ItemList items = self.items
+        cdef Grid grid = self.bullets_grid
+        cdef BulletList bullets = None
+        cdef Contact contact
+        cdef double px, py, phalf_size, px1, px2, py1, py2
+        cdef double ghalf_size, gx1, gx2, gy1, gy2, qhalf_size
+        cdef double bx, by, bhalf_width, bhalf_height, bx1, bx2, by1, by2
+        cdef double ihalf_size
+        cdef long i, j, nb_candidates, nb_indexed = 0
 
         if self.time_stop:
             return False
 
-        for bullet in self.cancelled_bullets:
-            bullet.update()
-
-        for bullet in self.bullets:
-            bullet.update()
+        self.cancelled_bullets.update(self.width, self.height)
+        self.bullets.update(self.width, self.height)
 
         for player_laser in self.players_lasers:
             if player_laser is not None:
                 player_laser.update()
 
-        for item in self.items:
-            item.update()
+        items.update(self.targets)
+
+        for laser in self.lasers:
+            laser.prepare_collisions()
 
         for player in self.players:
             if not player.touchable:
                 continue
 
             px, py = player.x, player.y
-            player_pos[:] = [px, py]
             phalf_size = <double>player.sht.hitbox
             px1, px2 = px - phalf_size, px + phalf_size
             py1, py2 = py - phalf_size, py + phalf_size
@@ -432,17 +583,29 @@ cdef class Game:
             gy1, gy2 = py - ghalf_size, py + ghalf_size
 
             for laser in self.lasers:
-                if laser.check_collision(player_pos):
+                contact = laser.check_player(px, py)
+                if contact == COLLISION:
                     if player.invulnerable_time == 0:
                         player.collide()
-                elif laser.check_grazing(player_pos):
+                elif contact == GRAZING:
                     player.graze += 1 #TODO
                     player.score += 500 #TODO
                     player.play_sound('graze')
                     self.modify_difficulty(+6) #TODO
                     self.new_particle((px, py), 9, 192) #TODO
 
-            for bullet in self.bullets:
+            # Collecting a star item can empty the bullet list, in which case
+            # the next players have to see it.
+            if bullets is not self.bullets or len(bullets) != nb_indexed:
+                bullets = self.bullets
+                nb_indexed = len(bullets)
+                self.index_bullets(grid, bullets)
+
+            qhalf_size = max(phalf_size, ghalf_size)
+            nb_candidates = grid.query(px - qhalf_size, py - qhalf_size,
+                                       px + qhalf_size, py + qhalf_size)
+            for i in range(nb_candidates):
+                bullet = &bullets.rows[grid.results[i]]
                 if bullet.state != LAUNCHED:
                     continue
 
@@ -454,7 +617,7 @@ cdef class Game:
 
                 if not (bx2 < px1 or bx1 > px2
                         or by2 < py1 or by1 > py2):
-                    bullet.collide()
+                    (<Bullet>bullets[grid.results[i]]).collide()
                     if player.invulnerable_time == 0:
                         player.collide()
 
@@ -471,7 +634,8 @@ cdef class Game:
 
             # Check for friendly-fire only if there are multiple players.
             if self.friendly_fire and len(self.players) > 1:
-                for bullet in self.players_bullets:
+                for j in range(len(self.players_bullets)):
+                    bullet = &self.players_bullets.rows[j]
                     if bullet.state != LAUNCHED:
                         continue
 
@@ -486,7 +650,7 @@ cdef class Game:
 
                     if not (bx2 < px1 or bx1 > px2
                             or by2 < py1 or by1 > py2):
-                        bullet.collide()
+                        (<Bullet>self.players_bullets[j]).collide()
                         if player.invulnerable_time == 0:
                             player.collide()
 
@@ -507,21 +671,17 @@ cdef class Game:
             if py < 128 and player.power >= 128: #TODO: check py.
                 self.autocollect(player)
 
+            # Collecting an item can convert bullets into new ones, which
+            # this loop sees too.
             ihalf_size = <double>player.sht.item_hitbox
-            for item in self.items:
-                bx, by = item.x, item.y
-                bx1, bx2 = bx - ihalf_size, bx + ihalf_size
-                by1, by2 = by - ihalf_size, by + ihalf_size
-
-                if not (bx2 < px1 or bx1 > px2
-                        or by2 < py1 or by1 > py2):
-                    item.on_collect(player)
+            i = items.collect(0, len(items), px1, py1, px2, py2, ihalf_size)
+            while i >= 0:
+                (<Item>items[i]).on_collect(player)
+                i = items.collect(i + 1, len(items), px1, py1, px2, py2, ihalf_size)
 
 
     cpdef cleanup(self):
         cdef Enemy enemy
-        cdef Bullet bullet
-        cdef Item item
         cdef PlayerLaser laser
         cdef long i
 
@@ -533,69 +693,134 @@ cdef class Game:
                 # Filter out-of-screen enemy
                 enemy.removed = True
 
-        self.enemies = filter_removed(self.enemies)
+        self.enemies.compact()
 
         # Filter out-of-scren bullets
-        cancelled_bullets = []
-        bullets = []
-        players_bullets = []
-
-        for bullet in self.cancelled_bullets:
-            if bullet.state == CANCELLED and not bullet.removed:
-                cancelled_bullets.append(bullet)
-
-        for bullet in self.bullets:
-            if not bullet.removed:
-                if bullet.state == CANCELLED:
-                    cancelled_bullets.append(bullet)
-                else:
-                    bullets.append(bullet)
-
-        for bullet in self.players_bullets:
-            if not bullet.removed:
-                if bullet.state == CANCELLED:
-                    cancelled_bullets.append(bullet)
-                else:
-                    players_bullets.append(bullet)
-
-        self.cancelled_bullets = cancelled_bullets
-        self.bullets = bullets
-        self.players_bullets = players_bullets
+        self.cancelled_bullets.sort(None)
+        self.bullets.sort(self.cancelled_bullets)
+        self.players_bullets.sort(self.cancelled_bullets)
 
         # Filter “timed-out” lasers
         for i, laser in enumerate(self.players_lasers):
             if laser is not None and laser.removed:
                 self.players_lasers[i] = None
 
-        self.lasers = filter_removed(self.lasers)
+        self.lasers.compact()
 
-        # Filter out-of-scren items
-        items = []
-        for item in self.items:
-            if item.y < self.height:
-                items.append(item)
-            else:
-                self.modify_difficulty(-3)
-        self.items = items
+        # Filter out-of-scren items, without dropping the collected ones yet.
+        for i in range(self.items.filter(self.height)):
+            self.modify_difficulty(-3)
+
+        self.effects.compact()
+        self.particles.compact()
 
-        self.effects = filter_removed(self.effects)
-        self.labels = filter_removed(self.labels)
-        self.texts = {key: text for key, text in self.texts.items() if not text.removed}
+        self.labels.compact()
+        for key in [key for key, text in self.texts.items() if text.removed]:
+            del self.texts[key]
 
         # Disable boss mode if it is dead/it has timeout
         if self.boss and self.boss.removed:
             self.boss = None
 
 
-cdef list filter_removed(list elements):
-    cdef Element element
+    cdef bint update_state_hash(self) except True:
+        # Rolling checksum of the state, so that a desync stays visible in the
+        # following frames.
+        cdef Player player
+        cdef Enemy enemy
+        cdef BulletState *bullet
+        cdef uint64_t checksum = self.state_hash
+        cdef long i
 
-    filtered = []
-    for element in elements:
-        if not element.removed:
-            filtered.append(element)
-    return filtered
+        checksum = mix(checksum, self.frame)
+        checksum = mix(checksum, self.prng.seed)
+        checksum = mix(checksum, self.prng.counter)
+        for player in self.players:
+            checksum = mix_double(checksum, player.x)
+            checksum = mix_double(checksum, player.y)
+            checksum = mix(checksum, player.lives)
+            checksum = mix(checksum, player.score)
+        checksum = mix(checksum, len(self.enemies))
+        for enemy in self.enemies:
+            checksum = mix_double(checksum, enemy.x)
+            checksum = mix_double(checksum, enemy.y)
+            checksum = mix(checksum, enemy.life)
+            checksum = mix(checksum, enemy.removed)
+        checksum = mix(checksum, len(self.bullets))
+        for i in range(len(self.bullets)):
+            bullet = &self.bullets.rows[i]
+            checksum = mix_double(checksum, bullet.x)
+            checksum = mix_double(checksum, bullet.y)
+            checksum = mix(checksum, bullet.state)
+        self.state_hash = checksum
+
+
+    cdef list shared_objects(self):
+        # Everything that isn’t modified by run_iter(), in a stable order,
+        # which snapshots only reference.  The interface is updated, but only
+        # to display the state of the game, which it shows again after a
+        # restore.  The music is replaced while keyframes are simulated, and
+        # the game never reads it, so it is left out.
+        cdef dict attributes = getattr(self, '__dict__', {})
+
+        return ([self.bullet_types, self.laser_types, self.item_types,
+                 self.interface, self.hints] +
+                [attributes[key] for key in sorted(attributes)
+                 if key not in ('ecl_runners', 'music')])
+
+
+    cpdef bytes snapshot(self):
+        """Return the current state of the game, to be restored later."""
+        if self.snapshotter is None:
+            self.snapshotter = Snapshotter([self, self.prng] + self.players,
+                                           self.shared_objects(), self.players)
+        if not self.snapshotter.is_sharing(self.shared_objects()):
+            raise ValueError('A shared object has been replaced.')
+
+        return self.snapshotter.dumps((
+            self.stage, self.rank, len(self.snapshotter), self.frame,
+            self.state_hash,
+            self.difficulty, self.difficulty_counter, self.last_keystate,
+            self.deaths_count, self.next_bonus, self.continues,
+            self.time_stop, self.msg_wait, self.prng.seed, self.prng.counter,
+            self.enemies, self.effects, get_state(self.particles),
+            pack_bullets(self.bullets), self.lasers,
+            pack_bullets(self.cancelled_bullets),
+            pack_bullets(self.players_bullets), self.players_lasers,
+            pack_items(self.items), self.labels, self.faces, self.texts, self.boss,
+            self.spellcard, self.spellcard_effect, self.msg_runner,
+            self.ecl_runners, [get_state(player) for player in self.players]))
+
+
+    cpdef restore(self, bytes data):
+        """Go back to a state returned by snapshot(), on this game or on
+        another one of the same stage."""
+        cdef Player player
 
+        if self.snapshotter is None:
+            self.snapshotter = Snapshotter([self, self.prng] + self.players,
+                                           self.shared_objects(), self.players)
+        if not self.snapshotter.is_sharing(self.shared_objects()):
+            raise ValueError('A shared object has been replaced.')
+
+        state = self.snapshotter.loads(data)
+        if state[:3] != (self.stage, self.rank, len(self.snapshotter)):
+            raise ValueError('This snapshot doesn’t belong to this game.')
+
+        (self.frame, self.state_hash, self.difficulty, self.difficulty_counter,
+         self.last_keystate, self.deaths_count, self.next_bonus,
+         self.continues, self.time_stop, self.msg_wait, self.prng.seed,
+         self.prng.counter, self.enemies, self.effects, particles, bullets,
+         self.lasers, cancelled_bullets, players_bullets,
+         self.players_lasers, items, self.labels, self.faces,
+         self.texts, self.boss, self.spellcard, self.spellcard_effect,
+         self.msg_runner, self.ecl_runners, players) = state[3:]
+
+        self.particles.__setstate__(particles)
+        self.bullets = unpack_bullets(self, bullets[0], bullets[1])
+        self.cancelled_bullets = unpack_bullets(self, cancelled_bullets[0], cancelled_bullets[1])
+        self.players_bullets = unpack_bullets(self, players_bullets[0], players_bullets[1])
+        self.items = unpack_items(self, items[0], items[1])
+        for player, player_state in zip(self.players, players):
+            player.__setstate__(player_state)
 
-def select_player_key(player):
-    return (player.score, player.character)
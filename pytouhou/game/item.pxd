@@ -1,28 +1,58 @@
 from pytouhou.game.element cimport Element
-from pytouhou.game.game cimport Game
+from pytouhou.game.sprite cimport Sprite
+from pytouhou.game.game cimport Game, Target
 from pytouhou.game.player cimport Player
 from pytouhou.game.itemtype cimport ItemType
-from pytouhou.utils.interpolator cimport Interpolator
 
 
-cdef class Indicator(Element):
-    cdef Item _item
+# Everything of an item but its type and indicator, as a row of its list.
+cdef struct ItemState:
+    long type
+    unsigned long frame
+    double x, y, angle, speed
+    double start_x, start_y, end_x, end_y
+    float sprite_height
+    long player, target
+    bint positioned, removed, indicated
+
 
-    cdef void update(self) nogil
+cdef class Indicator(Element):
+    pass
 
 
-cdef class Item(Element):
+cdef class Item:
     cdef public ItemType _item_type
 
-    cdef unsigned long frame
-    cdef long _type
-    cdef double angle, speed
+    cdef ItemList _list
+    cdef long _index
     cdef Game _game
-    cdef Player player
-    cdef Element target
     cdef Indicator indicator
-    cdef Interpolator speed_interpolator, pos_interpolator
 
+    cdef ItemState *row(self) except NULL
+    cdef bint reset(self, start_pos, long _type, ItemType item_type, Game game,
+                    double angle=*, player=*, end_pos=*) except True
     cdef bint autocollect(self, Player player) except True
     cdef bint on_collect(self, Player player) except True
-    cpdef update(self)
+    cdef bint update_indicator(self) except True
+
+
+cdef class ItemList(list):
+    cdef long size
+    cdef ItemState *rows
+    cdef long *pending
+
+    cdef bint reserve(self, long size) except True
+    cdef long add(self, Item item) except -1
+    cdef bint update(self, const Target *targets) except True
+    cdef void autocollect(self, long start, long length, long player, double speed) nogil
+    cdef long collect(self, long start, long length, double x1, double y1,
+                      double x2, double y2, double half_size) nogil
+    cpdef compact(self)
+    cdef long filter(self, long height) except -1
+
+
+cdef Item new_item(ItemList items, start_pos, long _type, ItemType item_type,
+                   Game game, double angle=*, player=*, end_pos=*)
+
+cdef tuple pack_items(ItemList items)
+cdef ItemList unpack_items(Game game, bytes data, list refs)
@@ -13,75 +13,152 @@
 ##
 
 from libc.math cimport cos, sin, atan2, M_PI as pi
+from libc.stdlib cimport realloc, free
+from libc.string cimport memset, memcpy
+from cpython.bytes cimport PyBytes_FromStringAndSize, PyBytes_AS_STRING
+
+
+cdef inline double interpolate(double start_value, double end_value,
+                               unsigned long start_frame,
+                               unsigned long end_frame,
+                               unsigned long frame) nogil:
+    # Same computation as Interpolator.update(), including its skipped last
+    # step, so that items move exactly as they did with interpolators.
+    cdef double coeff
+
+    if frame + 1 >= end_frame:
+        return end_value
+    coeff = <double>(frame - start_frame) / <double>(end_frame - start_frame)
+    return start_value + coeff * (end_value - start_value)
+
+
+cdef void move(ItemState *item, const Target *targets) nogil:
+    cdef unsigned long frame = item.frame
+    cdef const Target *target
+
+    #TODO: find the formulae in the binary.
+    if item.target >= 0:
+        target = &targets[item.target]
+        item.angle = atan2(target.y - item.y, target.x - item.x)
+        item.x += cos(item.angle) * item.speed
+        item.y += sin(item.angle) * item.speed
+    elif item.positioned and frame < 60:
+        item.x = interpolate(item.start_x, item.end_x, 0, 60, frame)
+        item.y = interpolate(item.start_y, item.end_y, 0, 60, frame)
+    else:
+        # Going up and slowing down, then falling faster and faster.
+        if frame < 60:
+            item.speed = interpolate(-2., 0., 0, 60, frame)
+        else:
+            item.speed = interpolate(0., 3., 60, 180, frame)
+        item.x += cos(item.angle) * item.speed
+        item.y += sin(item.angle) * item.speed
+    item.frame = frame + 1
+
+
+cdef Item new_item(ItemList items, start_pos, long _type, ItemType item_type,
+                   Game game, double angle=pi/2, player=None, end_pos=None):
+    """Add an item at the end of this list."""
+    cdef Item item
+
+    item = Item()
+    items.add(item)
+    item.reset(start_pos, _type, item_type, game, angle, player, end_pos)
+    return item
 
 
 cdef class Indicator(Element):
     def __init__(self, Item item):
         Element.__init__(self)
 
-        self._item = item
         self.sprite = item._item_type.indicator_sprite.copy()
 
-        self.x = self._item.x
+        self.x = item.row().x
         self.y = self.sprite._texcoords[3] / 2.
 
 
-    cdef void update(self) nogil:
-        #TODO: alpha
-        self.x = self._item.x
+
+cdef class Item:
+    """Handle on an item, whose numbers are stored in a row of its list."""
+
+    cdef ItemState *row(self) except NULL:
+        if self._list is None:
+            raise ReferenceError('This item isn’t in the game anymore.')
+        return &self._list.rows[self._index]
+
+
+    property x:
+        def __get__(self):
+            return self.row().x
+
+    property y:
+        def __get__(self):
+            return self.row().y
+
+    property removed:
+        def __get__(self):
+            return self.row().removed
+        def __set__(self, bint value):
+            self.row().removed = value
+
+    property sprite:
+        def __get__(self):
+            return self._item_type.sprite
+
+    property objects:
+        def __get__(self):
+            if self.indicator is not None:
+                return [self.indicator]
+            return [self]
 
 
+    cdef bint reset(self, start_pos, long _type, ItemType item_type, Game game,
+                    double angle=pi/2, player=None, end_pos=None) except True:
+        cdef ItemState *item = self.row()
 
-cdef class Item(Element):
-    def __init__(self, start_pos, long _type, ItemType item_type, Game game,
-                 double angle=pi/2, player=None, end_pos=None,
-                 target=None):
-        Element.__init__(self, start_pos)
+        memset(item, 0, sizeof(ItemState))
+        item.x, item.y = start_pos
 
         self._game = game
-        self._type = _type
+        item.type = _type
         self._item_type = item_type
-        self.sprite = item_type.sprite
+        item.sprite_height = item_type.sprite._texcoords[3]
 
-        self.frame = 0
-        self.angle = angle
+        item.frame = 0
+        item.angle = angle
         self.indicator = None
 
-        # The only player allowed to collect that item. If not None,
+        # The only player allowed to collect that item. If not -1,
         # autocollection is disabled too.
-        self.player = player
+        item.player = -1 if player is None else game.players.index(player)
 
         # The player who has autocollected that item.
         # TODO: do we allow stealing in case another player is in the way?
-        self.target = target
+        item.target = -1
 
-        #TODO: find the formulae in the binary.
-        self.speed_interpolator = None
+        # Items given an end position move there during their first 60
+        # frames, the other ones start by going up, and they all fall after
+        # that; see move().
+        item.start_x, item.start_y = start_pos
+        item.positioned = bool(end_pos)
         if end_pos:
-            self.pos_interpolator = Interpolator(start_pos, 0,
-                                                 end_pos, 60)
-        else:
-            self.speed_interpolator = Interpolator((-2.,), 0,
-                                                   (0.,), 60)
+            item.end_x, item.end_y = end_pos
 
-        self.sprite.angle = angle
-
-
-    property objects:
-        def __get__(self):
-            if self.indicator is not None:
-                return [self.indicator]
-            return [self]
+        item_type.sprite.angle = angle
 
 
     cdef bint autocollect(self, Player player) except True:
-        if self.target is None and self.player is None:
-            self.target = player
-            self.speed = player.sht.autocollection_speed
+        cdef ItemState *item = self.row()
+
+        if item.target < 0 and item.player < 0:
+            item.target = self._game.players.index(player)
+            item.speed = player.sht.autocollection_speed
 
 
     cdef bint on_collect(self, Player player) except True:
-        if not (self.player is None or self.player is player):
+        cdef ItemState *item = self.row()
+
+        if not (item.player < 0 or self._game.players[item.player] is player):
             return False
 
         old_power = player.power
@@ -90,21 +167,21 @@ cdef class Item(Element):
         color = 'white'
         player.play_sound('item00')
 
-        if self._type == 0 or self._type == 2: # power or big power
+        if item.type == 0 or item.type == 2: # power or big power
             if old_power < 128:
                 player.power_bonus = 0
                 score = 10
-                player.power += (1 if self._type == 0 else 8)
+                player.power += (1 if item.type == 0 else 8)
                 if player.power > 128:
                     player.power = 128
                 for level in (8, 16, 32, 48, 64, 96):
                     if old_power < level and player.power >= level:
-                        label = self._game.new_label((self.x, self.y), b':') # Actually a “PowerUp” character.
+                        label = self._game.new_label((item.x, item.y), b':') # Actually a “PowerUp” character.
                         color = 'blue'
                         label.set_color(color)
                         labeled = True
             else:
-                bonus = player.power_bonus + (1 if self._type == 0 else 8)
+                bonus = player.power_bonus + (1 if item.type == 0 else 8)
                 if bonus > 30:
                     bonus = 30
                 if bonus < 9:
@@ -119,7 +196,7 @@ cdef class Item(Element):
                 player.power_bonus = bonus
             self._game.modify_difficulty(+1)
 
-        elif self._type == 1: # point
+        elif item.type == 1: # point
             player.points += 1
             poc = <long>player.sht.point_of_collection
             if player.y < poc:
@@ -127,68 +204,226 @@ cdef class Item(Element):
                 self._game.modify_difficulty(+30)
                 color = 'yellow'
             else:
-                score = (728 - <int>(self.y)) * 100 #TODO: check the formula some more.
+                score = (728 - <int>(item.y)) * 100 #TODO: check the formula some more.
                 self._game.modify_difficulty(+3)
 
-        elif self._type == 3: # bomb
+        elif item.type == 3: # bomb
             if player.bombs < 8:
                 player.bombs += 1
             self._game.modify_difficulty(+5)
 
-        elif self._type == 4: # full power
+        elif item.type == 4: # full power
             score = 1000
             player.power = 128
 
-        elif self._type == 5: # 1up
+        elif item.type == 5: # 1up
             if player.lives < 8:
                 player.lives += 1
             self._game.modify_difficulty(+200)
             player.play_sound('extend')
 
-        elif self._type == 6: # star
+        elif item.type == 6: # star
             score = 500
 
         if old_power < 128 and player.power == 128:
             #TODO: display “full power”.
             self._game.change_bullets_into_star_items()
+            # The new items may have moved the rows.
+            item = self.row()
 
         if score > 0:
             player.score += score
             if label is None:
-                label = self._game.new_label((self.x, self.y), str(score).encode())
+                label = self._game.new_label((item.x, item.y), str(score).encode())
                 if color != 'white':
                     label.set_color(color)
 
-        self.removed = True
-
+        item.removed = True
 
-    cpdef update(self):
-        cdef bint offscreen
 
-        if self.frame == 60:
-            self.speed_interpolator = Interpolator((0.,), 60,
-                                                   (3.,), 180)
+    cdef bint update_indicator(self) except True:
+        cdef ItemState *item = self.row()
 
-        if self.target is not None:
-            self.angle = atan2(self.target.y - self.y, self.target.x - self.x)
-            self.x += cos(self.angle) * self.speed
-            self.y += sin(self.angle) * self.speed
-        elif self.speed_interpolator is None:
-            self.pos_interpolator.update(self.frame)
-            self.x, self.y = self.pos_interpolator.values
-        else:
-            self.speed_interpolator.update(self.frame)
-            self.speed, = self.speed_interpolator.values
-            dx, dy = cos(self.angle) * self.speed, sin(self.angle) * self.speed
-            self.x += dx
-            self.y += dy
-
-        offscreen = self.y < -self.sprite._texcoords[3] / 2.
-        if offscreen:
+        if item.y < -item.sprite_height / 2.:
             if self.indicator is None:
                 self.indicator = Indicator(self)
-            self.indicator.update()
+            #TODO: alpha
+            self.indicator.x = item.x
         else:
             self.indicator = None
+        item.indicated = self.indicator is not None
+
+
+
+cdef void *grow(void *data, long size) except NULL:
+    data = realloc(data, size)
+    if data is NULL:
+        raise MemoryError
+    return data
+
 
-        self.frame += 1
+cdef class ItemList(list):
+    """List of items, backed by an array of their states.
+
+    Each Item of the list is a handle on the row of the same index.  Items
+    are moved, autocollected, collected and filtered out in passes over the
+    rows, only going through the objects for the items being collected or
+    above the screen, which need an indicator.
+    """
+
+    def __dealloc__(self):
+        free(self.rows)
+        free(self.pending)
+
+
+    cdef bint reserve(self, long size) except True:
+        if size <= self.size:
+            return False
+        size = max(size, 2 * self.size, 256)
+        self.rows = <ItemState*>grow(self.rows, size * sizeof(ItemState))
+        self.pending = <long*>grow(self.pending, size * sizeof(long))
+        self.size = size
+
+
+    cdef long add(self, Item item) except -1:
+        cdef long index = len(self)
+
+        self.reserve(index + 1)
+        list.append(self, item)
+        item._list = self
+        item._index = index
+        return index
+
+
+    cdef bint update(self, const Target *targets) except True:
+        cdef list items = self
+        cdef ItemState *item
+        cdef long i, length, nb_pending = 0
+
+        length = len(items)
+        with nogil:
+            for i in range(length):
+                item = &self.rows[i]
+                move(item, targets)
+                if item.indicated or item.y < -item.sprite_height / 2.:
+                    self.pending[nb_pending] = i
+                    nb_pending += 1
+
+        for i in range(nb_pending):
+            (<Item>items[self.pending[i]]).update_indicator()
+
+
+    cdef void autocollect(self, long start, long length, long player, double speed) nogil:
+        cdef ItemState *item
+        cdef long i
+
+        for i in range(start, length):
+            item = &self.rows[i]
+            if item.target < 0 and item.player < 0:
+                item.target = player
+                item.speed = speed
+
+
+    cdef long collect(self, long start, long length, double x1, double y1,
+                      double x2, double y2, double half_size) nogil:
+        # Index of the first item from start in this box, or -1.
+        cdef double bx, by, bx1, bx2, by1, by2
+        cdef long i
+
+        for i in range(start, length):
+            bx, by = self.rows[i].x, self.rows[i].y
+            bx1, bx2 = bx - half_size, bx + half_size
+            by1, by2 = by - half_size, by + half_size
+
+            if not (bx2 < x1 or bx1 > x2
+                    or by2 < y1 or by1 > y2):
+                return i
+        return -1
+
+
+    cpdef compact(self):
+        cdef list items = self
+        cdef Item item
+        cdef long i, length = 0
+
+        for i in range(len(items)):
+            item = items[i]
+            if self.rows[i].removed:
+                item._list = None
+                continue
+            if i != length:
+                self.rows[length] = self.rows[i]
+                items[length] = item
+                item._index = length
+            length += 1
+        del items[length:]
+
+
+    cdef long filter(self, long height) except -1:
+        # Drop the items below the screen, but not the collected ones yet,
+        # and return how many there were.
+        cdef list items = self
+        cdef Item item
+        cdef long i, length = 0, nb_items = len(items)
+
+        for i in range(nb_items):
+            item = items[i]
+            if not self.rows[i].y < height:
+                item._list = None
+                continue
+            if i != length:
+                self.rows[length] = self.rows[i]
+                items[length] = item
+                item._index = length
+            length += 1
+        del items[length:]
+        return nb_items - length
+
+
+# An item saved by pack_items(), its type and indicator being in the list of
+# objects next to the block.
+cdef struct PackedItem:
+    ItemState item
+
+
+cdef tuple pack_items(ItemList items):
+    """Save a list of items as a single block of numbers, and a flat list of
+    the objects they reference, like pack_bullets()."""
+    cdef Item item
+    cdef PackedItem *packed
+    cdef bytes data
+    cdef list refs
+    cdef Py_ssize_t i
+
+    data = PyBytes_FromStringAndSize(NULL, len(items) * sizeof(PackedItem))
+    refs = []
+    for i in range(len(items)):
+        item = items[i]
+        packed = &(<PackedItem*>PyBytes_AS_STRING(data))[i]
+        memcpy(&packed.item, &items.rows[i], sizeof(ItemState))
+        refs.append(item._item_type)
+        refs.append(item.indicator)
+    return data, refs
+
+
+cdef ItemList unpack_items(Game game, bytes data, list refs):
+    """Recreate a list of items saved by pack_items()."""
+    cdef Item item
+    cdef ItemList items
+    cdef Py_ssize_t i, length
+
+    length = len(data) // sizeof(PackedItem)
+    assert len(data) == length * sizeof(PackedItem)
+    assert len(refs) == 2 * length
+    items = ItemList()
+    items.reserve(length)
+    for i in range(length):
+        item = Item()
+        items.add(item)
+        # Copied with its padding, for the next snapshot to be the same.
+        memcpy(&items.rows[i], &(<const PackedItem*>PyBytes_AS_STRING(data))[i].item,
+               sizeof(ItemState))
+        item._game = game
+        item._item_type = refs[2 * i]
+        item.indicator = refs[2 * i + 1]
+    return items
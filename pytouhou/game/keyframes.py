@@ -0,0 +1,97 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+"""Seeking into a stream of keystates.
+
+A keyframe index is filled by simulating the whole stream once, without any
+sound, and taking a snapshot of the game every interval frames.  Any frame
+is then reached by restoring the closest snapshot before it, and simulating
+at most interval frames from there.
+"""
+
+from time import perf_counter
+
+from pytouhou.game import NextStage, GameOver
+from pytouhou.game.music import MusicPlayer
+from pytouhou.utils.helpers import get_logger
+
+logger = get_logger(__name__)
+
+
+class KeyframeIndex:
+    def __init__(self, keystates, interval=600):
+        """keystates are those of the first player, one per frame, such as the
+        ones of a replay level."""
+        self.keystates = keystates
+        self.interval = interval
+        self.keyframes = {}
+        self.end = len(keystates)
+        self.complete = False
+
+
+    def add(self, game):
+        self.keyframes[game.frame] = game.snapshot()
+
+
+    def nearest(self, frame):
+        """Return the frame of the last keyframe at or before frame."""
+        return max([keyframe for keyframe in self.keyframes if keyframe <= frame],
+                   default=min(self.keyframes))
+
+
+    def simulate(self, game, end, index=False):
+        # Sound, music and timings only make sense at the normal speed.
+        music, sfx_player, timings = game.music, game.sfx_player, game.timings
+        game.music = game.sfx_player = MusicPlayer()
+        game.timings = None
+        run_iter = game.run_iter
+        keystates = self.keystates
+        interval = self.interval
+        try:
+            for frame in range(game.frame, end):
+                run_iter([keystates[frame]])
+                if index and game.frame % interval == 0:
+                    self.add(game)
+        finally:
+            game.music, game.sfx_player, game.timings = music, sfx_player, timings
+
+
+    def build(self, game):
+        """Simulate the rest of the keystates from the last keyframe, taking
+        a snapshot every interval frames.
+
+        This leaves the game wherever the keystates ended, so it has to be
+        restored to a keyframe afterwards.
+        """
+        start_time = perf_counter()
+        game.restore(self.keyframes[max(self.keyframes)])
+        try:
+            self.simulate(game, len(self.keystates), True)
+        except (NextStage, GameOver):
+            # The stage ended during that frame, which can’t be reached.
+            self.end = game.frame
+        self.complete = True
+        logger.info('Indexed %d frames in %.2fs, %d keyframes.', self.end,
+                    perf_counter() - start_time, len(self.keyframes))
+
+
+    def seek(self, game, frame):
+        """Bring game to frame, or to the closest one which can be reached,
+        and return it."""
+        if not self.complete:
+            self.build(game)
+        frame = max(min(frame, self.end), min(self.keyframes))
+        game.restore(self.keyframes[self.nearest(frame)])
+        self.simulate(game, frame)
+        return frame
@@ -6,6 +6,10 @@ cdef enum State:
     STARTING, STARTED, STOPPING
 
 
+cdef enum Contact:
+    NO_CONTACT, COLLISION, GRAZING
+
+
 cdef class LaserLaunchAnim(Element):
     cdef Laser _laser
 
@@ -23,11 +27,16 @@ cdef class Laser(Element):
     cdef State state
     cdef LaserType _laser_type
 
+    # Hitbox in the laser’s rotated frame, cached by prepare_collisions().
+    cdef double cos_angle, sin_angle, hit_start, hit_end, hit_half_width
+    cdef double bound_center[2]
+    cdef double bound_radius2
+
     cdef bint set_anim(self, long sprite_idx_offset=*) except True
     cpdef set_base_pos(self, double x, double y)
-    cdef bint _check_collision(self, double point[2], double border_size)
-    cdef bint check_collision(self, double point[2])
-    cdef bint check_grazing(self, double point[2])
+    cdef bint prepare_collisions(self) except True
+    cdef Contact check_player(self, double x, double y) nogil
+    cdef bint contains(self, double u, double v, double border) nogil
     #def get_bullets_pos(self)
     cpdef cancel(self)
     cpdef update(self)
@@ -12,12 +12,17 @@
 ## GNU General Public License for more details.
 ##
 
-from libc.math cimport cos, sin, M_PI as pi
+from libc.math cimport cos, sin, fabs, M_PI as pi
 
 from pytouhou.game.game cimport Game
 from pytouhou.vm import ANMRunner
 
 
+# Half of the margins added around the hitbox of a laser.
+cdef double COLLISION_BORDER = 2.5 / 2.
+cdef double GRAZING_BORDER = (96 + 2.5) / 2.
+
+
 cdef class LaserLaunchAnim(Element):
     def __init__(self, Laser laser, anm, unsigned long index):
         Element.__init__(self, (0, 0))
@@ -100,48 +105,58 @@ cdef class Laser(Element):
         self.base_pos[:] = [x, y]
 
 
-    cdef bint _check_collision(self, double point[2], double border_size):
-        cdef double c1[2]
-        cdef double c2[2]
-        cdef double c3[2]
-
-        x, y = point[0] - self.base_pos[0], point[1] - self.base_pos[1]
-        dx, dy = cos(self.angle), sin(self.angle)
-        dx2, dy2 = -dy, dx
+    cdef bint prepare_collisions(self) except True:
+        cdef double length, middle, half_length
 
+        self.cos_angle, self.sin_angle = cos(self.angle), sin(self.angle)
         length = <double>min(self.end_offset - self.start_offset, self.max_length)
-        offset = self.end_offset - length - border_size / 2.
-        end_offset = self.end_offset + border_size / 2.
-        half_width = self.width / 4. + border_size / 2.
-
-        c1[:] = [dx * offset - dx2 * half_width, dy * offset - dy2 * half_width]
-        c2[:] = [dx * offset + dx2 * half_width, dy * offset + dy2 * half_width]
-        c3[:] = [dx * end_offset + dx2 * half_width, dy * end_offset + dy2 * half_width]
-        vx, vy = x - c2[0], y - c2[1]
-        v1x, v1y = c1[0] - c2[0], c1[1] - c2[1]
-        v2x, v2y = c3[0] - c2[0], c3[1] - c2[1]
-
-        return (0 <= vx * v1x + vy * v1y <= v1x * v1x + v1y * v1y
-                and 0 <= vx * v2x + vy * v2y <= v2x * v2x + v2y * v2y)
-
-
-    cdef bint check_collision(self, double point[2]):
-        if self.state != STARTED:
-            return False
-
-        return self._check_collision(point, 2.5)
-
-
-    cdef bint check_grazing(self, double point[2]):
+        self.hit_start = self.end_offset - length
+        self.hit_end = self.end_offset
+        self.hit_half_width = self.width / 4.
+
+        # Bounding circle of the grazing area, which contains the collision one.
+        middle = (self.hit_start + self.hit_end) / 2.
+        half_length = fabs(length) / 2. + GRAZING_BORDER
+        self.bound_center[0] = self.base_pos[0] + middle * self.cos_angle
+        self.bound_center[1] = self.base_pos[1] + middle * self.sin_angle
+        self.bound_radius2 = (half_length * half_length +
+                              (self.hit_half_width + GRAZING_BORDER) ** 2)
+
+
+    cdef Contact check_player(self, double x, double y) nogil:
+        cdef double u, v
+        cdef bint collidable, grazable
+
+        # The state isn’t cached, a previous player can have cancelled the
+        # laser since prepare_collisions().
+        collidable = self.state == STARTED
         #TODO: quadruple check!
-        if self.state == STOPPING and self.frame >= self.grazing_extra_duration:
-            return False
-        if self.state == STARTING and self.frame <= self.grazing_delay:
-            return False
-        if self.frame % 12 != 0:
-            return False
-
-        return self._check_collision(point, 96 + 2.5)
+        grazable = not ((self.state == STOPPING and self.frame >= self.grazing_extra_duration)
+                        or (self.state == STARTING and self.frame <= self.grazing_delay)
+                        or self.frame % 12 != 0)
+        if not (collidable or grazable):
+            return NO_CONTACT
+
+        u, v = x - self.bound_center[0], y - self.bound_center[1]
+        if u * u + v * v > self.bound_radius2:
+            return NO_CONTACT
+
+        # Move the point into the laser’s frame, u along it and v across.
+        x, y = x - self.base_pos[0], y - self.base_pos[1]
+        u = x * self.cos_angle + y * self.sin_angle
+        v = y * self.cos_angle - x * self.sin_angle
+
+        if collidable and self.contains(u, v, COLLISION_BORDER):
+            return COLLISION
+        if grazable and self.contains(u, v, GRAZING_BORDER):
+            return GRAZING
+        return NO_CONTACT
+
+
+    cdef bint contains(self, double u, double v, double border) nogil:
+        cdef double start = self.hit_start - border, end = self.hit_end + border
+        return (fabs(v) <= self.hit_half_width + border
+                and (start <= u <= end or end <= u <= start))
 
 
     def get_bullets_pos(self):
@@ -1,8 +1,41 @@
-from pytouhou.game.effect cimport Effect
-from pytouhou.utils.interpolator cimport Interpolator
+from pytouhou.game.sprite cimport Sprite
 
-cdef class Particle(Effect):
-    cdef long frame, duration
-    cdef Interpolator pos_interpolator
 
-    cpdef update(self)
+cdef class ParticleKind:
+    cdef readonly object anm
+    cdef readonly long script
+    cdef object anmrunner
+    cdef Sprite sprite
+    cdef list sprites
+    cdef long lifetime
+
+    cdef bint extend(self, unsigned long frame) except True
+    cdef Sprite get_sprite(self, unsigned long frame)
+
+
+cdef class ParticleSystem:
+    cdef public bint visible
+    cdef long size, length, nb_kinds
+    cdef double *x
+    cdef double *y
+    cdef double *start_x
+    cdef double *start_y
+    cdef double *end_x
+    cdef double *end_y
+    cdef unsigned long *frame
+    cdef unsigned long *duration
+    cdef long *kind
+    cdef unsigned char *removed
+    cdef unsigned long *needed
+    cdef long *lifetimes
+    cdef list kinds
+    cdef dict kind_indices
+
+    cdef bint reserve(self, long size) except True
+    cdef long get_kind(self, anm, long script) except -1
+    cdef bint add(self, long kind, double x, double y, double end_x,
+                  double end_y, unsigned long duration) except True
+    cdef void move(self) nogil
+    cdef bint update(self) except True
+    cdef bint compact(self) except True
+    cpdef list sprites(self)
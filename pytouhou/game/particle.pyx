@@ -1,6 +1,6 @@
 # -*- encoding: utf-8 -*-
 ##
-## Copyright (C) 2015 Emmanuel Gil Peyrot <linkmauve@linkmauve.fr>
+## Copyright (C) 2026 PyTouhou contributors
 ##
 ## This program is free software; you can redistribute it and/or modify
 ## it under the terms of the GNU General Public License as published
@@ -12,32 +12,275 @@
 ## GNU General Public License for more details.
 ##
 
-from pytouhou.game.game cimport Game
+from libc.stdlib cimport realloc, free
+from libc.string cimport memcpy
+from libc.limits cimport LONG_MAX
+from cpython.bytes cimport PyBytes_FromStringAndSize, PyBytes_AS_STRING
 
+from copyreg import __newobj__
 
-cdef class Particle(Effect):
-    def __init__(self, pos, index, anm, long amp, Game game, bint reverse=False, long duration=24):
-        Effect.__init__(self, pos, index, anm)
+from pytouhou.vm import ANMRunner
 
-        self.frame = 0
-        self.duration = duration
 
-        random_pos = (self.x + amp * game.prng.rand_double() - amp / 2,
-                      self.y + amp * game.prng.rand_double() - amp / 2)
+cdef void *grow(void *data, long size) except NULL:
+    data = realloc(data, size)
+    if data is NULL:
+        raise MemoryError
+    return data
 
-        if not reverse:
-            self.pos_interpolator = Interpolator((self.x, self.y), 0,
-                                                 random_pos, duration, formula=(lambda x: 2. * x - x ** 2))
-        else:
-            self.pos_interpolator = Interpolator(random_pos, 0,
-                                                 (self.x, self.y), duration, formula=(lambda x: 2. * x - x ** 2))
-            self.x, self.y = random_pos
 
+cdef bytes pack(void *data, long size):
+    return PyBytes_FromStringAndSize(<char*>data, size)
 
-    cpdef update(self):
-        Effect.update(self)
 
-        self.pos_interpolator.update(self.frame)
-        self.x, self.y = self.pos_interpolator.values
+cdef void unpack(void *data, bytes packed):
+    memcpy(data, PyBytes_AS_STRING(packed), len(packed))
 
-        self.frame += 1
+
+cdef class ParticleKind:
+    """Animation shared by every particle of the same script.
+
+    Nothing else but its age changes the sprite of a particle, so a single
+    runner is run for all of them, and the state of its sprite is kept for
+    every frame it went through.
+    """
+
+    def __init__(self, anm, long script):
+        self.anm = anm
+        self.script = script
+        self.sprite = Sprite()
+        self.anmrunner = ANMRunner(anm, script, self.sprite)
+        self.sprites = [self.sprite.copy()]
+        self.lifetime = LONG_MAX
+
+
+    cdef bint extend(self, unsigned long frame) except True:
+        cdef Sprite sprite
+
+        while self.anmrunner is not None and <unsigned long>len(self.sprites) <= frame:
+            if not self.anmrunner.run_frame():
+                self.anmrunner = None
+            sprite = self.sprite.copy()
+            sprite.changed = True
+            self.sprites.append(sprite)
+
+        # A particle is removed on its first update past the removal of the
+        # sprite, like any other effect.
+        if self.anmrunner is None and (<Sprite>self.sprites[-1]).removed:
+            self.lifetime = max(len(self.sprites) - 1, 1)
+
+
+    cdef Sprite get_sprite(self, unsigned long frame):
+        self.extend(frame)
+        return self.sprites[min(frame, len(self.sprites) - 1)]
+
+
+
+cdef class ParticleSystem:
+    """Contiguous storage for every particle of a game.
+
+    Each particle decelerates from its start position to its end position,
+    over its duration, with the same computation as a decelerating
+    Interpolator.  Their sprites come from their ParticleKind, at their
+    current frame.
+    """
+
+    def __cinit__(self):
+        self.visible = True
+        self.kinds = []
+        self.kind_indices = {}
+
+
+    def __dealloc__(self):
+        free(self.x)
+        free(self.y)
+        free(self.start_x)
+        free(self.start_y)
+        free(self.end_x)
+        free(self.end_y)
+        free(self.frame)
+        free(self.duration)
+        free(self.kind)
+        free(self.removed)
+        free(self.needed)
+        free(self.lifetimes)
+
+
+    def __len__(self):
+        return self.length
+
+
+    def __reduce__(self):
+        cdef long length = self.length
+
+        keys = [(kind.anm, kind.script) for kind in self.kinds]
+        return __newobj__, (ParticleSystem,), (
+            length, keys,
+            pack(self.x, length * sizeof(double)),
+            pack(self.y, length * sizeof(double)),
+            pack(self.start_x, length * sizeof(double)),
+            pack(self.start_y, length * sizeof(double)),
+            pack(self.end_x, length * sizeof(double)),
+            pack(self.end_y, length * sizeof(double)),
+            pack(self.frame, length * sizeof(unsigned long)),
+            pack(self.duration, length * sizeof(unsigned long)),
+            pack(self.kind, length * sizeof(long)),
+            pack(self.removed, length * sizeof(unsigned char)))
+
+
+    def __setstate__(self, tuple state):
+        cdef long i, length
+
+        length, keys = state[:2]
+        indices = [self.get_kind(anm, script) for anm, script in keys]
+        self.reserve(length)
+        self.length = length
+        unpack(self.x, state[2])
+        unpack(self.y, state[3])
+        unpack(self.start_x, state[4])
+        unpack(self.start_y, state[5])
+        unpack(self.end_x, state[6])
+        unpack(self.end_y, state[7])
+        unpack(self.frame, state[8])
+        unpack(self.duration, state[9])
+        unpack(self.kind, state[10])
+        unpack(self.removed, state[11])
+        for i in range(length):
+            self.kind[i] = indices[self.kind[i]]
+
+
+    cdef bint reserve(self, long size) except True:
+        if size <= self.size:
+            return False
+        size = max(size, 2 * self.size, 256)
+        self.x = <double*>grow(self.x, size * sizeof(double))
+        self.y = <double*>grow(self.y, size * sizeof(double))
+        self.start_x = <double*>grow(self.start_x, size * sizeof(double))
+        self.start_y = <double*>grow(self.start_y, size * sizeof(double))
+        self.end_x = <double*>grow(self.end_x, size * sizeof(double))
+        self.end_y = <double*>grow(self.end_y, size * sizeof(double))
+        self.frame = <unsigned long*>grow(self.frame, size * sizeof(unsigned long))
+        self.duration = <unsigned long*>grow(self.duration, size * sizeof(unsigned long))
+        self.kind = <long*>grow(self.kind, size * sizeof(long))
+        self.removed = <unsigned char*>grow(self.removed, size * sizeof(unsigned char))
+        self.size = size
+
+
+    cdef long get_kind(self, anm, long script) except -1:
+        cdef long index
+
+        key = (anm, script)
+        try:
+            return self.kind_indices[key]
+        except KeyError:
+            pass
+
+        index = self.nb_kinds
+        self.needed = <unsigned long*>grow(self.needed, (index + 1) * sizeof(unsigned long))
+        self.lifetimes = <long*>grow(self.lifetimes, (index + 1) * sizeof(long))
+        kind = ParticleKind(anm, script)
+        self.needed[index] = 0
+        self.lifetimes[index] = kind.lifetime
+        self.kinds.append(kind)
+        self.kind_indices[key] = index
+        self.nb_kinds = index + 1
+        return index
+
+
+    cdef bint add(self, long kind, double x, double y, double end_x,
+                  double end_y, unsigned long duration) except True:
+        cdef long i = self.length
+
+        self.reserve(i + 1)
+        self.x[i] = x
+        self.y[i] = y
+        self.start_x[i] = x
+        self.start_y[i] = y
+        self.end_x[i] = end_x
+        self.end_y[i] = end_y
+        self.frame[i] = 0
+        self.duration[i] = duration
+        self.kind[i] = kind
+        self.removed[i] = False
+        self.length = i + 1
+
+
+    cdef void move(self) nogil:
+        cdef long i, kind
+        cdef unsigned long frame
+        cdef double coeff
+
+        for kind in range(self.nb_kinds):
+            self.needed[kind] = 0
+
+        for i in range(self.length):
+            if self.removed[i]:
+                continue
+            frame = self.frame[i]
+            if frame + 1 >= self.duration[i]:
+                self.x[i] = self.end_x[i]
+                self.y[i] = self.end_y[i]
+            else:
+                coeff = <double>frame / <double>self.duration[i]
+                coeff = 2. * coeff - coeff * coeff
+                self.x[i] = self.start_x[i] + coeff * (self.end_x[i] - self.start_x[i])
+                self.y[i] = self.start_y[i] + coeff * (self.end_y[i] - self.start_y[i])
+            frame += 1
+            self.frame[i] = frame
+            kind = self.kind[i]
+            if frame > self.needed[kind]:
+                self.needed[kind] = frame
+
+
+    cdef bint update(self) except True:
+        cdef ParticleKind kind
+        cdef long i
+
+        with nogil:
+            self.move()
+
+        # Only run the shared animations as far as the oldest particles.
+        for i in range(self.nb_kinds):
+            if self.needed[i]:
+                kind = self.kinds[i]
+                kind.extend(self.needed[i])
+                self.lifetimes[i] = kind.lifetime
+
+        with nogil:
+            for i in range(self.length):
+                if <long>self.frame[i] >= self.lifetimes[self.kind[i]]:
+                    self.removed[i] = True
+
+
+    cdef bint compact(self) except True:
+        cdef long i, length = 0
+
+        for i in range(self.length):
+            if self.removed[i]:
+                continue
+            if i != length:
+                self.x[length] = self.x[i]
+                self.y[length] = self.y[i]
+                self.start_x[length] = self.start_x[i]
+                self.start_y[length] = self.start_y[i]
+                self.end_x[length] = self.end_x[i]
+                self.end_y[length] = self.end_y[i]
+                self.frame[length] = self.frame[i]
+                self.duration[length] = self.duration[i]
+                self.kind[length] = self.kind[i]
+                self.removed[length] = False
+            length += 1
+        self.length = length
+
+
+    cpdef list sprites(self):
+        """Return the position and sprite of every particle still there."""
+        cdef ParticleKind kind
+        cdef long i
+
+        sprites = []
+        for i in range(self.length):
+            if not self.removed[i]:
+                kind = self.kinds[self.kind[i]]
+                sprites.append((self.x[i], self.y[i], kind.get_sprite(self.frame[i])))
+        return sprites
@@ -6,10 +6,11 @@ cdef class Player(Element):
     cdef public long death_time
     cdef public bint touchable, focused
     cdef public long character, score, effective_score, lives, bombs, power
-    cdef public long graze, points
+    cdef public long graze, points, miss
+    cdef public long invulnerable_time
 
     cdef long number
-    cdef long invulnerable_time, power_bonus, continues, continues_used, miss,
+    cdef long power_bonus, continues, continues_used
     cdef long bombs_used
 
     cdef object anm
@@ -17,7 +17,7 @@ from libc.math cimport M_PI as pi
 from pytouhou.game.sprite cimport Sprite
 from pytouhou.vm import ANMRunner
 from pytouhou.game.bullettype cimport BulletType
-from pytouhou.game.bullet cimport Bullet
+from pytouhou.game.bullet cimport new_bullet
 from pytouhou.game.lasertype cimport LaserType
 from pytouhou.game.laser cimport PlayerLaser
 from pytouhou.game import GameOver
@@ -148,17 +148,17 @@ cdef class Player(Element):
             #TODO: Type 1 (homing bullets)
             if shot_type == 2:
                 #TODO: triple-check acceleration!
-                bullets.append(Bullet((x, y), bullet_type, 0,
-                                      shot.angle, shot.speed,
-                                      (-1, 0, 0, 0, 0.15, -pi/2., 0., 0.),
-                                      16, self, self._game, player=self.number,
-                                      damage=shot.damage, hitbox=shot.hitbox))
+                new_bullet(bullets, (x, y), bullet_type, 0,
+                           shot.angle, shot.speed,
+                           (-1, 0, 0, 0, 0.15, -pi/2., 0., 0.),
+                           16, self, self._game, player=self.number,
+                           damage=shot.damage, hitbox=shot.hitbox)
             else:
-                bullets.append(Bullet((x, y), bullet_type, 0,
-                                      shot.angle, shot.speed,
-                                      (0, 0, 0, 0, 0., 0., 0., 0.),
-                                      0, self, self._game, player=self.number,
-                                      damage=shot.damage, hitbox=shot.hitbox))
+                new_bullet(bullets, (x, y), bullet_type, 0,
+                           shot.angle, shot.speed,
+                           (0, 0, 0, 0, 0., 0., 0., 0.),
+                           0, self, self._game, player=self.number,
+                           damage=shot.damage, hitbox=shot.hitbox)
 
 
     cpdef update(self, long keystate):
@@ -0,0 +1,16 @@
+from pytouhou.game.sprite cimport Sprite
+from pytouhou.utils.interpolator cimport Interpolator
+from pytouhou.utils.pool cimport Pool
+
+cdef class Pools:
+    cdef public Pool bullets, sprites, anmrunners, interpolators
+
+    cdef Sprite new_sprite(self)
+    cdef object new_anmrunner(self, anm, long script_id, Sprite sprite, long sprite_index_offset=*)
+    cdef Interpolator new_interpolator(self, tuple values, unsigned long start_frame=*,
+                                       tuple end_values=*, unsigned long end_frame=*,
+                                       formula=*)
+    cdef bint release_sprite(self, Sprite sprite) except True
+    cdef bint release_anmrunner(self, anmrunner) except True
+    cdef bint release_interpolator(self, Interpolator interpolator) except True
+    cpdef dict stats(self)
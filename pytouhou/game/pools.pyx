@@ -0,0 +1,88 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+from pytouhou.vm import ANMRunner
+
+
+cdef class Pools:
+    """Free lists of the objects a game creates and drops the most often.
+
+    Bullets are taken and given back by pytouhou.game.bullet itself, the
+    other objects go through the methods of this class.
+    """
+
+    def __init__(self, long size=1024):
+        self.bullets = Pool(size)
+        self.sprites = Pool(size)
+        self.anmrunners = Pool(size)
+        self.interpolators = Pool(size)
+
+
+    cdef Sprite new_sprite(self):
+        cdef Sprite sprite
+
+        sprite = self.sprites.acquire()
+        if sprite is None:
+            return Sprite()
+        sprite.reset()
+        return sprite
+
+
+    cdef object new_anmrunner(self, anm, long script_id, Sprite sprite, long sprite_index_offset=0):
+        anmrunner = self.anmrunners.acquire()
+        if anmrunner is None:
+            return ANMRunner(anm, script_id, sprite, sprite_index_offset)
+        anmrunner.reset(anm, script_id, sprite, sprite_index_offset)
+        return anmrunner
+
+
+    cdef Interpolator new_interpolator(self, tuple values, unsigned long start_frame=0,
+                                       tuple end_values=None, unsigned long end_frame=0,
+                                       formula=None):
+        cdef Interpolator interpolator
+
+        interpolator = self.interpolators.acquire()
+        if interpolator is None:
+            return Interpolator(values, start_frame, end_values, end_frame, formula)
+        interpolator.reset(values, start_frame, end_values, end_frame, formula)
+        return interpolator
+
+
+    cdef bint release_sprite(self, Sprite sprite) except True:
+        # Don’t keep whole animations alive through the pool.
+        sprite.anm = None
+        sprite.scale_interpolator = None
+        sprite.fade_interpolator = None
+        sprite.offset_interpolator = None
+        sprite.rotation_interpolator = None
+        sprite.color_interpolator = None
+        self.sprites.release(sprite)
+
+
+    cdef bint release_anmrunner(self, anmrunner) except True:
+        anmrunner._sprite = None
+        self.anmrunners.release(anmrunner)
+
+
+    cdef bint release_interpolator(self, Interpolator interpolator) except True:
+        interpolator._formula = None
+        self.interpolators.release(interpolator)
+
+
+    cpdef dict stats(self):
+        return {name: (pool.hits, pool.misses, len(pool))
+                for name, pool in (('bullets', self.bullets),
+                                   ('sprites', self.sprites),
+                                   ('anmrunners', self.anmrunners),
+                                   ('interpolators', self.interpolators))}
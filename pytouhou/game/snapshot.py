@@ -0,0 +1,272 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+"""Binary snapshots of a game’s state.
+
+A snapshot is a pickle of everything a game changes while it runs.  All the
+objects it doesn’t change (the game and its players themselves, the
+resources loaded from the data files, bullet types, the interface, and so
+on) are put in the memo of the pickler before it starts, so that they are
+written as a reference to their index instead of being copied.  Since the
+shared objects are always enumerated in the same order, a snapshot can also
+be restored in another process, once the same stage has been loaded.
+
+Restoring a snapshot doesn’t bring the shared objects back to their previous
+state, so they must not change once the snapshotter is created, apart from
+what the game never reads back, like the display of the interface.  They
+also can’t be replaced by other objects, which is_sharing() checks.
+
+Protocol 3 is used because its memo opcodes carry their index, which lets
+a single unpickler, whose memo has been filled once, load every snapshot.
+
+Since a pickle can call any function it names, snapshots are only loaded by
+an unpickler which finds nothing but the classes of the game, the functions
+their states reference, and the bound methods of game objects.  Generated
+ECL code is only loaded again for subs shared with the game.
+"""
+
+from io import BytesIO
+from pickle import (Pickler, Unpickler, UnpicklingError, PROTO, BININT,
+                    BINPERSID, LONG_BINPUT, POP, NONE, STOP)
+from struct import pack
+from types import FunctionType, BuiltinFunctionType, ModuleType
+
+
+PROTOCOL = 3
+
+ATOMS = (type(None), bool, int, float, complex, str, bytes, type,
+         FunctionType, BuiltinFunctionType, ModuleType)
+
+RESOURCE_MODULES = ('pytouhou.formats.', 'pytouhou.game.bullettype',
+                    'pytouhou.game.lasertype', 'pytouhou.game.itemtype')
+
+# Modules whose classes a snapshot can create, and the other functions it can
+# reference, apart from those Cython pickles its classes with.
+RESTORABLE_MODULES = ('pytouhou.game.', 'pytouhou.games.', 'pytouhou.vm.',
+                      'pytouhou.utils.interpolator')
+RESTORABLE_FUNCTIONS = {('pytouhou.vm.anmtable', 'get_table'),
+                        ('pytouhou.vm.eclrunner', 'compile_subs')}
+RESTORABLE_FUNCTIONS.update(('pytouhou.utils.formulas', name)
+                            for name in ('accelerate', 'accelerate3',
+                                         'accelerate4', 'decelerate',
+                                         'decelerate3', 'decelerate4',
+                                         'reverse'))
+
+# Generated code is loaded through get_generated_subs() only.
+UNRESTORABLE = {('pytouhou.vm.eclcodegen', 'GeneratedSubs')}
+
+
+def get_state(obj):
+    """Return the state pickle would save for obj, to be given back to its
+    __setstate__ method."""
+    reduced = obj.__reduce_ex__(PROTOCOL)
+    return reduced[2] if len(reduced) > 2 else reduced[1][-1]
+
+
+
+class Reader:
+    """Minimal file over a bytes object, for the unpickler.
+
+    Unlike BytesIO it has a peek() method, which lets the unpickler read its
+    input in big chunks instead of calling read() for each opcode.
+    """
+
+    def __init__(self, data=b''):
+        self.data = data
+        self.position = 0
+
+
+    def peek(self, size=1):
+        return self.data[self.position:self.position + max(size, 1)]
+
+
+    def read(self, size=-1):
+        if size < 0:
+            size = len(self.data)
+        data = self.data[self.position:self.position + size]
+        self.position += len(data)
+        return data
+
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+    def readline(self):
+        end = self.data.find(b'\n', self.position)
+        return self.read(-1 if end < 0 else end + 1 - self.position)
+
+
+
+class SnapshotUnpickler(Unpickler):
+    """Unpickler refusing anything but what a snapshot of a game holds."""
+
+    def __init__(self, file, shared):
+        Unpickler.__init__(self, file)
+        self.persistent_load = shared.__getitem__
+        self._shared_ids = {id(obj) for obj in shared}
+        self._found = {}
+
+
+    def find_class(self, module, name):
+        # Every snapshot names the same few, so check each of them once.
+        try:
+            return self._found[module, name]
+        except KeyError:
+            obj = self._found[module, name] = self.find_restorable(module, name)
+            return obj
+
+
+    def find_restorable(self, module, name):
+        if (module, name) == ('builtins', 'getattr'):
+            return get_method
+        if (module, name) == ('pytouhou.vm.eclcodegen', 'get_generated_subs'):
+            return self.get_generated_subs
+        # Dotted names would reach anything from the classes.
+        if '.' not in name and (module, name) not in UNRESTORABLE:
+            if (module, name) in RESTORABLE_FUNCTIONS:
+                return Unpickler.find_class(self, module, name)
+            if module.startswith(RESTORABLE_MODULES):
+                obj = Unpickler.find_class(self, module, name)
+                if ((isinstance(obj, type) and obj.__module__ == module) or
+                        name.startswith('__pyx_unpickle_')):
+                    return obj
+        raise UnpicklingError('%s.%s can’t be in a snapshot.' % (module, name))
+
+
+    def get_generated_subs(self, subs, rank):
+        # Imported here, the generated code needing the ECL runner.
+        from pytouhou.vm.eclcodegen import get_generated_subs
+
+        if id(subs) not in self._shared_ids:
+            raise UnpicklingError('Generated code can only run subs of the game.')
+        return get_generated_subs(subs, rank)
+
+
+def get_method(obj, name):
+    """getattr() for the bound methods of game objects, which pickle saves as
+    a call to it."""
+    cls = type(obj)
+    if (name.startswith('__') or not cls.__module__.startswith(RESTORABLE_MODULES)
+            or not callable(getattr(cls, name, None))):
+        raise UnpicklingError('%s.%s can’t be in a snapshot.' % (cls.__name__, name))
+    return getattr(obj, name)
+
+
+
+class Snapshotter:
+    def __init__(self, in_place, shared, players):
+        """Enumerate the objects shared between a game and its snapshots.
+
+        in_place are kept as is, their state being saved separately, shared
+        are walked recursively, and players only for the resources they
+        reference.
+        """
+        self.shared = list(shared)
+        self.objects = []
+        self._seen = set()
+        self._visited = [] # Keep temporaries alive, their ids must stay unique.
+
+        for obj in in_place:
+            self._seen.add(id(obj))
+            self.objects.append(obj)
+        # Imported here, the ECL runner needing the game classes, which
+        # import this module.
+        from pytouhou.vm.anmrunner import ANMRunner
+        from pytouhou.vm.eclrunner import ECLMainRunner, ECLRunner
+        from pytouhou.vm.msgrunner import MSGRunner
+
+        for runner_class in (ANMRunner, ECLMainRunner, ECLRunner, MSGRunner):
+            for version in sorted(runner_class._handlers):
+                self.add(runner_class._handlers[version], True)
+        for obj in shared:
+            self.add(obj, True)
+        for player in players:
+            self.add(get_state(player), False)
+        del self._seen, self._visited
+
+        pickler = Pickler(BytesIO(), PROTOCOL)
+        pickler.memo = {id(obj): (i, obj) for i, obj in enumerate(self.objects)}
+        self._pickler_memo = pickler.memo
+
+        # Unpickler.memo can’t be assigned from a dict, so fill it by loading
+        # every shared object as a persistent id, stored at its own index.
+        self._file = Reader(PROTO + bytes([PROTOCOL]) +
+                             b''.join([BININT + pack('<i', i) + BINPERSID +
+                                       LONG_BINPUT + pack('<I', i) + POP
+                                       for i in range(len(self.objects))]) +
+                             NONE + STOP)
+        self._unpickler = SnapshotUnpickler(self._file, self.objects)
+        self._unpickler.load()
+
+
+    def __len__(self):
+        return len(self.objects)
+
+
+    def is_sharing(self, shared):
+        """Return whether shared still are the objects this snapshotter was
+        created with."""
+        return (len(shared) == len(self.shared) and
+                all(obj is previous for obj, previous in zip(shared, self.shared)))
+
+
+    def add(self, obj, shared):
+        if isinstance(obj, ATOMS) or id(obj) in self._seen:
+            return
+        self._seen.add(id(obj))
+        self._visited.append(obj)
+
+        cls = type(obj)
+        shared = shared or cls.__module__.startswith(RESOURCE_MODULES)
+        if shared and cls is not tuple:
+            self.objects.append(obj)
+
+        if isinstance(obj, (list, tuple, set, frozenset)):
+            children = obj
+        elif isinstance(obj, dict):
+            children = obj.values()
+        else:
+            try:
+                reduced = obj.__reduce_ex__(PROTOCOL)
+            except TypeError:
+                return
+            if isinstance(reduced, str):
+                return
+            children = list(reduced[1:3])
+            for items in reduced[3:5]:
+                if items is not None:
+                    children.extend(items)
+
+        for child in children:
+            self.add(child, shared)
+
+
+    def dumps(self, state):
+        # The pickler copies the memo it is given, but it has to start from
+        # the shared objects alone anyway, without those of the previous
+        # snapshot.
+        file = BytesIO()
+        pickler = Pickler(file, PROTOCOL)
+        pickler.memo = self._pickler_memo
+        pickler.dump(state)
+        return file.getvalue()
+
+
+    def loads(self, data):
+        self._file.data = data
+        self._file.position = 0
+        return self._unpickler.load()
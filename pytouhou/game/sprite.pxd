@@ -1,6 +1,22 @@
 from pytouhou.utils.interpolator cimport Interpolator
 from pytouhou.formats.animation cimport Animation
 
+# Numeric part of a sprite, saved as a single block in snapshots.
+cdef struct SpriteState:
+    int blendfunc, frame
+    float width_override, height_override, angle
+    bint removed, visible, force_rotation, automatic_orientation
+    bint allow_dest_offset, mirrored, corner_relative_placement
+    float dest_offset[3]
+    float texcoords[4]
+    float texoffsets[2]
+    float rescale[2]
+    float scale_speed[2]
+    float rotations_3d[3]
+    float rotations_speed_3d[3]
+    unsigned char color[4]
+
+
 cdef class Sprite:
     cdef public int blendfunc, frame
     cdef public float width_override, height_override, angle
@@ -23,6 +39,9 @@ cdef class Sprite:
     cdef float _rotations_speed_3d[3]
     cdef unsigned char _color[4]
 
+    cpdef reset(self, width_override=*, height_override=*)
+    cdef void get_state(self, SpriteState *state)
+    cdef void set_state(self, const SpriteState *state)
     cpdef fade(self, unsigned int duration, alpha, formula=*)
     cpdef scale_in(self, unsigned int duration, sx, sy, formula=*)
     cpdef move_in(self, unsigned int duration, x, y, z, formula=*)
@@ -13,7 +13,9 @@
 ##
 
 from libc.stdlib cimport free
-from libc.string cimport memcpy
+from libc.string cimport memcpy, memset
+
+from copyreg import __newobj__
 
 
 cdef class Sprite:
@@ -23,6 +25,10 @@ cdef class Sprite:
 
 
     def __init__(self, width_override=0, height_override=0):
+        self.reset(width_override, height_override)
+
+
+    cpdef reset(self, width_override=0, height_override=0):
         self.anm = None
         self.removed = False
         self.changed = True
@@ -61,6 +67,80 @@ cdef class Sprite:
             self._color[i] = 255
 
 
+    cdef void get_state(self, SpriteState *state):
+        # Zero the padding too, so that equal sprites give equal bytes.
+        memset(state, 0, sizeof(SpriteState))
+        state.blendfunc = self.blendfunc
+        state.frame = self.frame
+        state.width_override = self.width_override
+        state.height_override = self.height_override
+        state.angle = self.angle
+        state.removed = self.removed
+        state.visible = self.visible
+        state.force_rotation = self.force_rotation
+        state.automatic_orientation = self.automatic_orientation
+        state.allow_dest_offset = self.allow_dest_offset
+        state.mirrored = self.mirrored
+        state.corner_relative_placement = self.corner_relative_placement
+        memcpy(state.dest_offset, self._dest_offset, sizeof(self._dest_offset))
+        memcpy(state.texcoords, self._texcoords, sizeof(self._texcoords))
+        memcpy(state.texoffsets, self._texoffsets, sizeof(self._texoffsets))
+        memcpy(state.rescale, self._rescale, sizeof(self._rescale))
+        memcpy(state.scale_speed, self._scale_speed, sizeof(self._scale_speed))
+        memcpy(state.rotations_3d, self._rotations_3d, sizeof(self._rotations_3d))
+        memcpy(state.rotations_speed_3d, self._rotations_speed_3d, sizeof(self._rotations_speed_3d))
+        memcpy(state.color, self._color, sizeof(self._color))
+
+
+    cdef void set_state(self, const SpriteState *state):
+        self.blendfunc = state.blendfunc
+        self.frame = state.frame
+        self.width_override = state.width_override
+        self.height_override = state.height_override
+        self.angle = state.angle
+        self.removed = state.removed
+        self.visible = state.visible
+        self.force_rotation = state.force_rotation
+        self.automatic_orientation = state.automatic_orientation
+        self.allow_dest_offset = state.allow_dest_offset
+        self.mirrored = state.mirrored
+        self.corner_relative_placement = state.corner_relative_placement
+        memcpy(self._dest_offset, state.dest_offset, sizeof(self._dest_offset))
+        memcpy(self._texcoords, state.texcoords, sizeof(self._texcoords))
+        memcpy(self._texoffsets, state.texoffsets, sizeof(self._texoffsets))
+        memcpy(self._rescale, state.rescale, sizeof(self._rescale))
+        memcpy(self._scale_speed, state.scale_speed, sizeof(self._scale_speed))
+        memcpy(self._rotations_3d, state.rotations_3d, sizeof(self._rotations_3d))
+        memcpy(self._rotations_speed_3d, state.rotations_speed_3d, sizeof(self._rotations_speed_3d))
+        memcpy(self._color, state.color, sizeof(self._color))
+
+        # The rendering data isn’t part of the state, it has to be rebuilt.
+        self.changed = True
+
+
+    def __reduce__(self):
+        cdef SpriteState state
+
+        self.get_state(&state)
+        return __newobj__, (Sprite,), ((<char*>&state)[:sizeof(SpriteState)],
+                                       self.anm, self.scale_interpolator,
+                                       self.fade_interpolator,
+                                       self.offset_interpolator,
+                                       self.rotation_interpolator,
+                                       self.color_interpolator)
+
+
+    def __setstate__(self, tuple state):
+        cdef bytes data
+
+        (data, self.anm, self.scale_interpolator, self.fade_interpolator,
+         self.offset_interpolator, self.rotation_interpolator,
+         self.color_interpolator) = state
+
+        assert len(data) == sizeof(SpriteState)
+        self.set_state(<SpriteState*><char*>data)
+
+
     property scale_speed:
         def __get__(self):
             return (self._scale_speed[0], self._scale_speed[1])
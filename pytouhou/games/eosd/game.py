@@ -13,6 +13,7 @@
 ##
 
 from pytouhou.utils.interpolator import Interpolator
+from pytouhou.utils.formulas import accelerate
 
 from pytouhou.game.game import Game as GameBase
 from pytouhou.game.bullettype import BulletType
@@ -107,8 +108,8 @@ class Game(GameBase):
             self.enm_anm = self.enm_anm + resource_loader.get_anm('stg%denm2.anm' % stage)
         except KeyError:
             pass
-        ecl = resource_loader.get_ecl('ecldata%d.ecl' % stage)
-        self.ecl_runners = [ECLMainRunner(main, ecl.subs, self) for main in ecl.mains]
+        self.ecl = resource_loader.get_ecl('ecldata%d.ecl' % stage)
+        self.ecl_runners = [ECLMainRunner(main, self.ecl.subs, self) for main in self.ecl.mains]
 
         self.spellcard_effect_anm = resource_loader.get_single_anm('eff0%d.anm' % stage)
 
@@ -173,7 +174,7 @@ class Player(PlayerBase):
     def start_focusing(self):
         self.orb_dx_interpolator = Interpolator((24,), self._game.frame,
                                                 (8,), self._game.frame + 8,
-                                                lambda x: x ** 2)
+                                                accelerate)
         self.orb_dy_interpolator = Interpolator((0,), self._game.frame,
                                                 (-32,), self._game.frame + 8)
         self.focused = True
@@ -182,7 +183,7 @@ class Player(PlayerBase):
     def stop_focusing(self):
         self.orb_dx_interpolator = Interpolator((8,), self._game.frame,
                                                 (24,), self._game.frame + 8,
-                                                lambda x: x ** 2)
+                                                accelerate)
         self.orb_dy_interpolator = Interpolator((-32,), self._game.frame,
                                                 (0,), self._game.frame + 8)
         self.focused = False
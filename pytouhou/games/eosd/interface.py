@@ -48,6 +48,7 @@ class Interface:
             'graze': Text((500, 206), self.ascii_anm, front, text=b'0'),
             'points': Text((500, 226), self.ascii_anm, front, text=b'0'),
             'framerate': Text((512, 464), self.ascii_anm, front),
+            'timings': Text((160, 464), self.ascii_anm, front),
             'debug?': Text((0, 464), self.ascii_anm, front),
 
             # Only when there is a boss.
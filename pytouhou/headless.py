@@ -0,0 +1,333 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+"""Headless simulation of a game.
+
+This module drives pytouhou.game.game.Game directly, without any window,
+renderer, sound or frame pacing, as fast as the engine can go.  It is meant
+for verifying replays and measuring the engine’s raw speed.
+"""
+
+from importlib import import_module
+from time import perf_counter
+
+from pytouhou.game import NextStage, GameOver
+from pytouhou.game.music import MusicPlayer
+from pytouhou.utils.random import Random
+from pytouhou.utils.helpers import get_logger
+from pytouhou.vm.eclcodegen import use_generated_code, vm_state
+
+logger = get_logger(__name__)
+
+
+ENDED, GAME_OVER, NEXT_STAGE, FRAME_LIMIT = 'ended', 'game over', 'next stage', 'frame limit'
+
+INTERPRETER, GENERATED = 'interpreter', 'generated'
+
+
+def read_hashes(file):
+    """Read state hashes written by write_hashes(), as a list of (stage,
+    frame, hash) tuples."""
+    hashes = []
+    for line in file:
+        stage, frame, state_hash = line.split()
+        hashes.append((int(stage), int(frame), int(state_hash, 16)))
+    return hashes
+
+
+def write_hashes(file, hashes):
+    for stage, frame, state_hash in hashes:
+        file.write('%d %d %016x\n' % (stage, frame, state_hash))
+
+
+def compare_hashes(reference, hashes):
+    """Return the (stage, frame) of the last hash matching the reference,
+    and of the first one not matching it, which is None if they all do."""
+    last_match = None
+    reference = {(stage, frame): state_hash for stage, frame, state_hash in reference}
+    for stage, frame, state_hash in hashes:
+        expected = reference.get((stage, frame))
+        if expected is None:
+            continue
+        if expected != state_hash:
+            return last_match, (stage, frame)
+        last_match = stage, frame
+    return last_match, None
+
+
+def read_keystates(file):
+    """Read a keystate stream, as whitespace-separated integers, one per frame.
+    """
+    for line in file:
+        for keystate in line.split():
+            yield int(keystate, 0)
+
+
+
+class PlayerReport:
+    def __init__(self, player):
+        self.character = player.character
+        self.score = player.score
+        self.lives = player.lives
+        self.bombs = player.bombs
+        self.power = player.power
+        self.graze = player.graze
+        self.points = player.points
+        self.miss = player.miss
+
+
+
+class SimulationReport:
+    def __init__(self):
+        self.status = ENDED
+        self.stages = []
+        self.frames = 0
+        self.time = 0.
+        self.players = []
+        self.pools = {}
+        self.hashes = []
+
+
+    def add_pools(self, game):
+        for name, (hits, misses, size) in game.pools.stats().items():
+            old_hits, old_misses, _ = self.pools.get(name, (0, 0, 0))
+            self.pools[name] = (old_hits + hits, old_misses + misses, size)
+
+
+    @property
+    def fps(self):
+        return self.frames / self.time if self.time > 0 else 0.
+
+
+    @property
+    def score(self):
+        return self.players[0].score if self.players else 0
+
+
+    def __str__(self):
+        lines = ['status: %s' % self.status,
+                 'stages: %s' % ' '.join(str(stage) for stage in self.stages),
+                 'frames: %d' % self.frames,
+                 'time: %.3fs' % self.time,
+                 'fps: %.1f' % self.fps]
+        for i, player in enumerate(self.players):
+            lines.append('player %d: score %d, lives %d, bombs %d, power %d, '
+                         'graze %d, points %d, misses %d'
+                         % (i, player.score, player.lives, player.bombs,
+                            player.power, player.graze, player.points,
+                            player.miss))
+        for name, (hits, misses, size) in sorted(self.pools.items()):
+            lines.append('pool %s: %d hits, %d misses, %d free'
+                         % (name, hits, misses, size))
+        return '\n'.join(lines)
+
+
+
+class HeadlessRunner:
+    """Run games without any frontend, as fast as possible.
+
+    The game and interface modules are the same as the ones used by the
+    pytouhou script, selected by name from pytouhou.games.  ECL is either
+    interpreted, or run from generated code cached into ecl_cache (see
+    pytouhou.vm.eclcodegen).
+    """
+
+    def __init__(self, resource_loader, game='eosd', interface=None,
+                 timings=None, hash_interval=0, ecl_backend=INTERPRETER,
+                 ecl_cache=None):
+        self.resource_loader = resource_loader
+        self.timings = timings
+        self.hash_interval = hash_interval
+        self.ecl_backend = ecl_backend
+        self.ecl_cache = ecl_cache
+
+        game_module = import_module('pytouhou.games.%s.game' % game)
+        self.game_class = game_module.Game
+        self.common_class = game_module.Common
+        self.interface_class = import_module('pytouhou.games.%s.interface' % (interface or game)).Interface
+
+
+    def new_common(self, characters, continues=0):
+        common = self.common_class(self.resource_loader, characters, continues)
+        common.interface = self.interface_class(self.resource_loader, common.players[0]) #XXX
+        return common
+
+
+    def new_game(self, common, stage, rank, difficulty, prng, hints=None,
+                 friendly_fire=True, ecl_backend=None):
+        game = self.game_class(self.resource_loader, stage, rank, difficulty,
+                               common, prng, hints, friendly_fire)
+        if (ecl_backend or self.ecl_backend) == GENERATED:
+            use_generated_code(game, self.ecl_cache)
+
+        null_player = MusicPlayer()
+        game.music = null_player
+        game.sfx_player = null_player
+        game.timings = self.timings
+        game.hash_states = self.hash_interval > 0
+        return game
+
+
+    def run_game(self, game, keystates, max_frames=None, hashes=None):
+        """Run a game until its keystates are exhausted, or until it ends.
+
+        keystates is an iterable of lists of keystates, one per player.  If
+        hashes is a list, the stage, frame and state hash are appended to it
+        every hash_interval frames.
+
+        Return the number of frames simulated, and the reason it stopped.
+        """
+        run_iter = game.run_iter
+        start_frame = game.frame
+        try:
+            if hashes is not None and self.hash_interval > 0:
+                interval = self.hash_interval
+                for keys in keystates:
+                    if max_frames is not None and game.frame - start_frame >= max_frames:
+                        return max_frames, FRAME_LIMIT
+                    run_iter(keys)
+                    if game.frame % interval == 0:
+                        hashes.append((game.stage, game.frame, game.state_hash))
+            elif max_frames is None:
+                for keys in keystates:
+                    run_iter(keys)
+            else:
+                for keys in keystates:
+                    if game.frame - start_frame >= max_frames:
+                        return max_frames, FRAME_LIMIT
+                    run_iter(keys)
+        except NextStage:
+            return game.frame - start_frame, NEXT_STAGE
+        except GameOver:
+            return game.frame - start_frame, GAME_OVER
+        return game.frame - start_frame, ENDED
+
+
+    def play_replay(self, replay, stage=None, max_frames=None):
+        """Simulate a T6RP replay, starting at the given stage or at the first
+        one it contains, and continuing as long as the next stages are there.
+        """
+        if stage is None:
+            stage = next(i + 1 for i, level in enumerate(replay.levels) if level)
+
+        common = self.new_common([replay.character])
+        first_player = common.players[0]
+        report = SimulationReport()
+
+        level = replay.levels[stage - 1]
+        if not level:
+            raise ValueError('Stage %d isn’t in this replay.' % stage)
+        first_player.score = level.score
+        first_player.effective_score = level.score
+
+        start_time = perf_counter()
+        while True:
+            first_player.points = level.point_items
+            first_player.power = level.power
+
+            game = self.new_game(common, stage, replay.rank, level.difficulty,
+                                 Random(level.random_seed))
+            first_player.lives = level.lives
+            first_player.bombs = level.bombs
+            first_player.power = level.power
+            game.difficulty = level.difficulty
+
+            keystates = ([keystate] for keystate in level.iter_keystates())
+            frames, report.status = self.run_game(game, keystates,
+                                                  None if max_frames is None else max_frames - report.frames,
+                                                  report.hashes)
+            report.frames += frames
+            report.stages.append(stage)
+            report.add_pools(game)
+            logger.info('Stage %d: %d frames, %s.', stage, frames, report.status)
+
+            if report.status != NEXT_STAGE or stage == len(replay.levels):
+                break
+            level = replay.levels[stage]
+            if not level:
+                break
+            stage += 1
+
+        report.time = perf_counter() - start_time
+        report.players = [PlayerReport(player) for player in common.players]
+        return report
+
+
+    def play_keystates(self, keystates, stage, rank=0, character=0,
+                       difficulty=16, seed=0, continues=0, max_frames=None):
+        """Simulate a single stage from a plain stream of keystates."""
+        common = self.new_common([character], continues)
+        report = SimulationReport()
+
+        start_time = perf_counter()
+        game = self.new_game(common, stage, rank, difficulty, Random(seed))
+        frames, report.status = self.run_game(game, ([keystate] for keystate in keystates),
+                                              max_frames, report.hashes)
+        report.time = perf_counter() - start_time
+        report.frames = frames
+        report.stages.append(stage)
+        report.add_pools(game)
+        report.players = [PlayerReport(player) for player in common.players]
+        return report
+
+
+    def play_differential(self, keystates, stage, rank=0, character=0,
+                          difficulty=16, seed=0, max_frames=None):
+        """Simulate a single stage twice in lockstep, with interpreted ECL
+        and with generated code, and compare the state of their ECL runners
+        and their state hashes after every frame.
+
+        Return the report of the interpreted game, and None if both always
+        matched, or the frame they first differed at and both their states.
+        """
+        games = []
+        for ecl_backend in (INTERPRETER, GENERATED):
+            common = self.new_common([character])
+            game = self.new_game(common, stage, rank, difficulty, Random(seed),
+                                 ecl_backend=ecl_backend)
+            game.hash_states = True
+            games.append(game)
+        interpreted, generated = games
+
+        report = SimulationReport()
+        difference = None
+        start_time = perf_counter()
+        for keystate in keystates:
+            if max_frames is not None and report.frames >= max_frames:
+                report.status = FRAME_LIMIT
+                break
+            statuses = []
+            for game in games:
+                try:
+                    game.run_iter([keystate])
+                except NextStage:
+                    statuses.append(NEXT_STAGE)
+                except GameOver:
+                    statuses.append(GAME_OVER)
+                else:
+                    statuses.append(None)
+            report.frames += 1
+            states = [(status, game.state_hash, vm_state(game))
+                      for status, game in zip(statuses, games)]
+            if states[0] != states[1]:
+                difference = (interpreted.frame,) + tuple(states)
+                break
+            if statuses[0] is not None:
+                report.status = statuses[0]
+                break
+        report.time = perf_counter() - start_time
+        report.stages.append(stage)
+        report.add_pools(interpreted)
+        report.players = [PlayerReport(player) for player in interpreted.players]
+        return report, difference
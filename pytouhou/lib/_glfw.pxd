@@ -62,6 +62,8 @@ cdef extern from "GLFW/glfw3.h" nogil:
         GLFW_KEY_HOME
         GLFW_KEY_ENTER
         GLFW_KEY_F11
+        GLFW_KEY_PAGE_UP
+        GLFW_KEY_PAGE_DOWN
 
     ctypedef enum:
         GLFW_MOD_ALT
@@ -86,6 +86,8 @@ cdef extern from "SDL_scancode.h" nogil:
         SDL_SCANCODE_HOME
         SDL_SCANCODE_RETURN
         SDL_SCANCODE_F11
+        SDL_SCANCODE_PAGEUP
+        SDL_SCANCODE_PAGEDOWN
 
 
 cdef extern from "SDL_keycode.h" nogil:
@@ -43,6 +43,10 @@ cdef void key_callback(GLFWwindow* window, int key, int scancode, int action, in
         _global_events.append((gui.DOWN, None))
     elif key == GLFW_KEY_F11:
         _global_events.append((gui.FULLSCREEN, None))
+    elif key == GLFW_KEY_PAGE_UP:
+        _global_events.append((gui.SEEK, -1))
+    elif key == GLFW_KEY_PAGE_DOWN:
+        _global_events.append((gui.SEEK, 1))
     elif key == GLFW_KEY_ENTER:
         if mods & GLFW_MOD_ALT:
             _global_events.append((gui.FULLSCREEN, None))
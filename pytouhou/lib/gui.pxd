@@ -5,6 +5,7 @@ cdef int SCREENSHOT
 cdef int RESIZE
 cdef int FULLSCREEN
 cdef int DOWN
+cdef int SEEK
 
 # Keystates
 cdef int SHOOT
@@ -5,6 +5,7 @@ SCREENSHOT = 3
 RESIZE = 4
 FULLSCREEN = 5
 DOWN = 6
+SEEK = 7
 
 # Possible keystates.
 SHOOT = 1
@@ -143,6 +143,10 @@ cdef class Window(gui.Window):
                     ret.append((gui.DOWN, None))
                 elif scancode == SDL_SCANCODE_F11:
                     ret.append((gui.FULLSCREEN, None))
+                elif scancode == SDL_SCANCODE_PAGEUP:
+                    ret.append((gui.SEEK, -1))
+                elif scancode == SDL_SCANCODE_PAGEDOWN:
+                    ret.append((gui.SEEK, 1))
                 elif scancode == SDL_SCANCODE_RETURN:
                     mod = event.key.keysym.mod
                     if mod & KMOD_ALT:
@@ -1,13 +1,29 @@
 import socket
-from struct import Struct
+from struct import Struct, pack, unpack_from
 from select import select
-from time import time
+from time import time, perf_counter
 
+from pytouhou.game import NextStage, GameOver
+from pytouhou.game.music import MusicPlayer
 from pytouhou.utils.helpers import get_logger
 
 logger = get_logger(__name__)
 
-MSG_STRUCT = Struct('!HHH')
+# Frame, keystate, old keystate, then a frame and the state hash after it.
+MSG_STRUCT = Struct('!HHHIQ')
+
+# Stage, first frame, last frame received from the peer, number of keystates,
+# then a frame and the state hash after it.
+ROLLBACK_HEADER = Struct('!BIiBIQ')
+MAX_INPUTS = 64
+
+# Number of frames for which the state hashes are kept.
+MAX_HASHES = 3600
+
+
+class DesyncError(Exception):
+    pass
+
 
 class Network:
     def __init__(self, port=8080, dest=None, selected_player=0):
@@ -22,6 +38,30 @@ class Network:
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
         self.sock.bind(('', port))
 
+        self.game = None
+        self.hashes = {}
+        self.remote_hashes = {}
+
+
+    def start_game(self, game):
+        self.game = game
+        game.hash_states = True
+        self.hashes = {game.frame: game.state_hash}
+        self.remote_hashes = {}
+
+
+    def check_hashes(self, last_frame):
+        """Compare the state hashes both sides computed, up to last_frame,
+        and raise DesyncError as soon as they differ."""
+        for frame in [frame for frame in self.remote_hashes if frame <= last_frame]:
+            remote_hash = self.remote_hashes.pop(frame)
+            if frame in self.hashes and self.hashes[frame] != remote_hash:
+                logger.error('Desync after frame %d, state hash %016x, remote %016x.',
+                             frame, self.hashes[frame], remote_hash)
+                raise DesyncError(frame)
+        for frame in [frame for frame in self.hashes if frame < last_frame - MAX_HASHES]:
+            del self.hashes[frame]
+
 
     def read_message(self):
         message = None
@@ -31,12 +71,17 @@ class Network:
 
         rlist, _, _ = select([self.sock], [], [], delta)
         while rlist:
-            msg, addr = rlist[0].recvfrom(MSG_STRUCT.size)
+            # One byte more, so that longer messages aren’t silently cut.
+            msg, addr = rlist[0].recvfrom(MSG_STRUCT.size + 1)
+            if len(msg) != MSG_STRUCT.size:
+                # From another version of the protocol, or garbage.
+                logger.warning('Dropped a malformed message of %d bytes from %s.', len(msg), addr)
             # Check whether the message comes from the right address
-            if self.frame == 0 or addr == self.remote_addr:
+            elif self.frame == 0 or addr == self.remote_addr:
                 self.remote_addr = addr
 
-                frame, keystate, old_keystate = MSG_STRUCT.unpack(msg)
+                frame, keystate, old_keystate, hash_frame, state_hash = MSG_STRUCT.unpack(msg)
+                self.remote_hashes[hash_frame] = state_hash
 
                 # Check for well-formedness
                 if frame in (self.frame, self.frame + 1):
@@ -54,7 +99,9 @@ class Network:
 
     def send_message(self):
         if self.remote_addr is not None:
-            self.sock.sendto(MSG_STRUCT.pack(self.frame, self.keystate, self.old_keystate), self.remote_addr)
+            self.sock.sendto(MSG_STRUCT.pack(self.frame, self.keystate, self.old_keystate,
+                                             self.game.frame, self.game.state_hash),
+                             self.remote_addr)
 
 
     def run_game_iter(self, game, keystate, other_keystate):
@@ -64,6 +111,10 @@ class Network:
 
 
     def run_iter(self, game, keystate):
+        if game is not self.game:
+            self.start_game(game)
+        self.hashes[game.frame] = game.state_hash
+
         if game.frame % 3 == 0:
             # Phase 1: Update game with old data
             self.run_game_iter(game, self.keystate, self.remote_keystate)
@@ -86,8 +137,212 @@ class Network:
                     self.remote_keystate = old_keystate
                 else:
                     raise Exception #TODO
+                self.check_hashes(game.frame)
                 self.run_game_iter(game, self.keystate, self.remote_keystate)
             elif game.frame > 2:
                 logger.warn('Message not received in time, dropping frame.')
 
 
+
+
+
+class RollbackNetwork(Network):
+    """Netplay without waiting for the remote player.
+
+    Every frame is simulated immediately, with the remote keystate predicted
+    to be the same as the last one received.  The state of the game is saved
+    before each frame not yet confirmed, and when a remote keystate arrives
+    which disagrees with what has been predicted, the game goes back to that
+    frame and simulates the following ones again.  The game only stalls when
+    more than max_rollback frames would have to be predicted.
+
+    Each message carries every local keystate the peer hasn’t acknowledged
+    yet, so a lost packet doesn’t need to be resent explicitly.
+    """
+
+    def __init__(self, port=8080, dest=None, selected_player=0, max_rollback=8):
+        Network.__init__(self, port, dest, selected_player)
+        self.max_rollback = max_rollback
+
+        # Metrics.
+        self.rollbacks = 0
+        self.mispredictions = 0
+        self.resimulated_frames = 0
+        self.resimulation_time = 0.
+        self.max_rollback_depth = 0
+        self.stalls = 0
+
+
+    def start_game(self, game):
+        Network.start_game(self, game)
+        self.stage = game.stage
+        self.local_keystates = []
+        self.remote_keystates = []
+        self.predictions = {}
+        self.states = {}
+        self.acknowledged = -1
+        self.blocking_frame = -1
+
+
+    @property
+    def confirmed_frame(self):
+        return len(self.remote_keystates) - 1
+
+
+    @property
+    def final_frame(self):
+        # Number of frames simulated with only confirmed keystates.
+        return min(self.confirmed_frame + 1, self.game.frame)
+
+
+    def stats(self):
+        return {'rollbacks': self.rollbacks,
+                'mispredictions': self.mispredictions,
+                'resimulated frames': self.resimulated_frames,
+                'resimulation time': self.resimulation_time,
+                'max rollback depth': self.max_rollback_depth,
+                'stalls': self.stalls}
+
+
+    def predict(self, frame):
+        if frame < len(self.remote_keystates):
+            return self.remote_keystates[frame]
+        return self.remote_keystates[-1] if self.remote_keystates else 0
+
+
+    def send_message(self):
+        if self.remote_addr is None:
+            return
+        first = self.acknowledged + 1
+        keystates = self.local_keystates[first:first + MAX_INPUTS]
+        hash_frame = self.final_frame
+        self.sock.sendto(ROLLBACK_HEADER.pack(self.stage, first,
+                                              self.confirmed_frame,
+                                              len(keystates), hash_frame,
+                                              self.hashes[hash_frame]) +
+                         pack('!%dH' % len(keystates), *keystates),
+                         self.remote_addr)
+
+
+    def read_messages(self, timeout=0.):
+        """Read every pending message, and return the first frame for which
+        the prediction was wrong, if any."""
+        mispredicted = None
+        size = ROLLBACK_HEADER.size + 2 * MAX_INPUTS
+
+        rlist, _, _ = select([self.sock], [], [], timeout)
+        while rlist:
+            try:
+                msg, addr = self.sock.recvfrom(size)
+            except ConnectionRefusedError:
+                # The remote player isn’t listening yet.
+                break
+            if (len(msg) < ROLLBACK_HEADER.size or
+                    len(msg) != ROLLBACK_HEADER.size + 2 * ROLLBACK_HEADER.unpack_from(msg)[3]):
+                logger.warning('Dropped a malformed message of %d bytes from %s.', len(msg), addr)
+            elif self.remote_addr is not None and addr != self.remote_addr:
+                logger.error('Mismatch, got a message from %s, waiting for %s.', addr, self.remote_addr)
+            else:
+                self.remote_addr = addr
+                stage, first, acknowledged, count, hash_frame, state_hash = ROLLBACK_HEADER.unpack_from(msg)
+                if stage == self.stage:
+                    self.acknowledged = max(self.acknowledged, acknowledged)
+                    self.remote_hashes[hash_frame] = state_hash
+                    keystates = unpack_from('!%dH' % count, msg, ROLLBACK_HEADER.size)
+                    for frame, keystate in enumerate(keystates, first):
+                        # Keep only the next one, the others will be sent again.
+                        if frame != len(self.remote_keystates):
+                            continue
+                        self.remote_keystates.append(keystate)
+                        prediction = self.predictions.pop(frame, keystate)
+                        if prediction != keystate:
+                            self.mispredictions += 1
+                            if mispredicted is None:
+                                mispredicted = frame
+            rlist, _, _ = select(rlist, [], [], 0)
+        return mispredicted
+
+
+    def forget(self):
+        # States up to the last confirmed frame won’t be needed anymore.
+        for frame in [frame for frame in self.states if frame <= self.confirmed_frame]:
+            del self.states[frame]
+        self.check_hashes(self.final_frame)
+
+
+    def simulate(self, game, frame):
+        """Simulate one frame, saving the state first if it isn’t confirmed.
+
+        Return False if the game would end on a predicted frame, in which case
+        it is restored to the start of that frame, until it is confirmed.
+        """
+        confirmed = frame <= self.confirmed_frame
+        if not confirmed:
+            self.states[frame] = game.snapshot()
+            self.predictions[frame] = self.predict(frame)
+        try:
+            self.run_game_iter(game, self.local_keystates[frame], self.predict(frame))
+        except (NextStage, GameOver):
+            if confirmed:
+                raise
+            game.restore(self.states[frame])
+            self.blocking_frame = frame
+            return False
+        self.hashes[game.frame] = game.state_hash
+        return True
+
+
+    def rollback(self, game, first_frame):
+        last_frame = game.frame
+        start_time = perf_counter()
+        game.restore(self.states[first_frame])
+
+        # Don’t play the sounds a second time.
+        sfx_player, music = game.sfx_player, game.music
+        game.sfx_player = game.music = MusicPlayer()
+        try:
+            for frame in range(first_frame, last_frame):
+                if not self.simulate(game, frame):
+                    break
+        finally:
+            game.sfx_player, game.music = sfx_player, music
+
+        depth = last_frame - first_frame
+        self.rollbacks += 1
+        self.resimulated_frames += depth
+        self.resimulation_time += perf_counter() - start_time
+        self.max_rollback_depth = max(self.max_rollback_depth, depth)
+        logger.debug('Rolled back %d frames at frame %d.', depth, last_frame)
+
+
+    def run_iter(self, game, keystate):
+        if game is not self.game:
+            self.start_game(game)
+
+        # A keystate already sent can’t change anymore, so while stalling the
+        # new ones are dropped.
+        frame = game.frame
+        if frame == len(self.local_keystates):
+            self.local_keystates.append(keystate)
+        self.send_message()
+
+        mispredicted = self.read_messages()
+        if mispredicted is not None and mispredicted < game.frame:
+            self.rollback(game, mispredicted)
+
+        # Wait for the remote player if we are too far ahead, or about to
+        # leave the game on a prediction.
+        if (game.frame - self.confirmed_frame > self.max_rollback or
+                self.blocking_frame > self.confirmed_frame):
+            mispredicted = self.read_messages(1./60.)
+            if mispredicted is not None and mispredicted < game.frame:
+                self.rollback(game, mispredicted)
+            if (game.frame - self.confirmed_frame > self.max_rollback or
+                    self.blocking_frame > self.confirmed_frame):
+                self.forget()
+                self.stalls += 1
+                logger.debug('Waiting for the remote player, stalling frame %d.', game.frame)
+                return
+
+        self.forget()
+        self.simulate(game, game.frame)
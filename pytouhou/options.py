@@ -119,6 +119,7 @@ def parse_arguments(defaults):
     parser.add_argument('--debug', action='store_true', help='Set unlimited continues, and perhaps other debug features.')
     parser.add_argument('--verbosity', metavar='VERBOSITY', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'], help='Select the wanted logging level.')
     parser.add_argument('--no-menu', action='store_true', help='Disable the menu.')
+    parser.add_argument('--timings', action='store_true', help='Measure the time spent in each phase of the frames, display it, and print its percentiles at exit.')
 
     game_group = parser.add_argument_group('Game options')
     game_group.add_argument('-s', '--stage', metavar='STAGE', type=int, help='Stage, 1 to 7 (Extra), nothing means story mode.')
@@ -133,11 +134,13 @@ def parse_arguments(defaults):
     replay_group.add_argument('--replay', metavar='REPLAY', help='Select a file to replay.')
     replay_group.add_argument('--save-replay', metavar='REPLAY', help='Save the upcoming game into a replay file.')
     replay_group.add_argument('--skip-replay', action='store_true', help='Skip the replay and start to play when it’s finished.')
+    replay_group.add_argument('--start-frame', metavar='FRAME', type=int, default=0, help='Start the replay at this frame of its first stage, after simulating it once without display.  Page Up and Page Down then seek ten seconds backward or forward.')
 
     netplay_group = parser.add_argument_group('Netplay options')
     netplay_group.add_argument('--port', metavar='PORT', type=int, help='Local port to use.')
     netplay_group.add_argument('--remote', metavar='REMOTE', help='Remote address.')
     netplay_group.add_argument('--friendly-fire', action='store_true', help='Allow friendly-fire during netplay.')
+    netplay_group.add_argument('--rollback', metavar='FRAMES', type=int, help='Predict the remote player’s inputs for up to FRAMES frames instead of waiting for them, 0 (default) disables it.')
 
     graphics_group = parser.add_argument_group('Graphics options')
     graphics_group.add_argument('--frontend', metavar='FRONTEND', choices=['glfw', 'sdl'], help='Which windowing library to use (glfw or sdl).')
@@ -145,7 +148,7 @@ def parse_arguments(defaults):
     graphics_group.add_argument('--fps-limit', metavar='FPS', type=int, help='Set fps limit. A value of 0 disables fps limiting, while a negative value limits to 60 fps if and only if vsync doesn’t work.')
     graphics_group.add_argument('--frameskip', metavar='FRAMESKIP', type=int, help='Set the frameskip, as 1/FRAMESKIP, or disabled if 0.')
     graphics_group.add_argument('--no-background', action='store_false', help='Disable background display (huge performance boost on slow systems).')
-    graphics_group.add_argument('--no-particles', action='store_false', help='Disable particles handling (huge performance boost on slow systems).')
+    graphics_group.add_argument('--no-particles', action='store_false', help='Don’t display particles.')
     graphics_group.add_argument('--no-sound', action='store_false', help='Disable music and sound effects.')
 
     opengl_group = parser.add_argument_group('OpenGL backend options')
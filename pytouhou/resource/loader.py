@@ -189,3 +189,57 @@ class Loader:
     def get_multi_anm(self, names):
         """Hack for EoSD, since it doesn’t support multi-entries ANMs."""
         return sum((self.get_anm(name) for name in names), [])
+
+
+
+class CachedLoader(Loader):
+    """Loader parsing each file only once, to run many games in a row.
+
+    The parsed files are shared between all of these games, which must not
+    modify them.
+    """
+
+    def __init__(self, game_dir=None):
+        Loader.__init__(self, game_dir)
+        self.cache = {}
+
+
+    def cached(self, method, *args):
+        key = (method.__name__,) + args
+        try:
+            return self.cache[key]
+        except KeyError:
+            value = self.cache[key] = method(self, *args)
+            return value
+
+
+    def get_anm(self, name):
+        return self.cached(Loader.get_anm, name)
+
+
+    def get_stage(self, name):
+        return self.cached(Loader.get_stage, name)
+
+
+    def get_ecl(self, name):
+        return self.cached(Loader.get_ecl, name)
+
+
+    def get_msg(self, name):
+        return self.cached(Loader.get_msg, name)
+
+
+    def get_sht(self, name):
+        return self.cached(Loader.get_sht, name)
+
+
+    def get_eosd_characters(self):
+        return self.cached(Loader.get_eosd_characters)
+
+
+    def get_track(self, name):
+        return self.cached(Loader.get_track, name)
+
+
+    def get_fmt(self, name):
+        return self.cached(Loader.get_fmt, name)
@@ -14,19 +14,28 @@
 
 cimport cython
 
-from pytouhou.lib.gui cimport EXIT, PAUSE, SCREENSHOT, RESIZE, FULLSCREEN
+from itertools import islice
+
+from pytouhou.lib.gui cimport EXIT, PAUSE, SCREENSHOT, RESIZE, FULLSCREEN, SEEK
 
 from .window cimport Window, Runner
 from .music import BGMPlayer, SFXPlayer
 from pytouhou.game.game cimport Game
 from pytouhou.game.music cimport MusicPlayer
+from pytouhou.game.keyframes import KeyframeIndex
+from pytouhou.utils.timings cimport RENDERING
+
+
+# Frames skipped by every seek event, ten seconds.
+cdef long SCRUB_FRAMES = 600
 
 
 cdef class GameRunner(Runner):
     cdef object background, con, resource_loader, keys, replay_level, common
+    cdef object keyframes
     cdef Game game
     cdef Window window
-    cdef list save_keystates
+    cdef list save_keystates, replay_keystates
     cdef bint skip
 
     # Since we want to support multiple renderers, don’t specify its type.
@@ -65,6 +74,7 @@ cdef class GameRunner(Runner):
             game.difficulty = self.replay_level.difficulty
 
         self.save_keystates = save_keystates
+        game.timings = self.window.timings if self.window is not None else None
 
         null_player = MusicPlayer()
         if bgms is not None:
@@ -75,13 +85,43 @@ cdef class GameRunner(Runner):
 
         game.sfx_player = SFXPlayer(self.resource_loader) if not self.skip else null_player
 
+        # The other keyframes are only taken on the first seek.
+        if self.keyframes is not None:
+            self.keyframes.add(game)
+
 
     cdef bint set_input(self, replay=None) except True:
+        self.keyframes = None
         if not replay or not replay.levels[self.game.stage-1]:
             self.replay_level = None
         else:
             self.replay_level = replay.levels[self.game.stage-1]
-            self.keys = self.replay_level.iter_keystates()
+            self.replay_keystates = list(self.replay_level.iter_keystates())
+            self.keys = iter(self.replay_keystates)
+            self.keyframes = KeyframeIndex(self.replay_keystates)
+
+
+    cpdef seek(self, long frame):
+        """Jump to a frame of the replay, the first time after simulating it
+        entirely to index it.  Return the frame reached."""
+        if self.keyframes is None:
+            raise ValueError('Only replays can be seeked into.')
+
+        frame = self.keyframes.seek(self.game, frame)
+        self.keys = islice(self.replay_keystates, frame, None)
+        # The keystates saved have to follow the game, whichever way it went.
+        if self.save_keystates is not None:
+            del self.save_keystates[frame:]
+            self.save_keystates.extend(
+                self.replay_keystates[len(self.save_keystates):frame])
+        if self.background is not None and self.background.last_frame > frame:
+            self.background.rewind()
+        return frame
+
+
+    cpdef scrub(self, long frames):
+        """Move forward, or backward, in the replay by that many frames."""
+        return self.seek(self.game.frame + frames)
 
 
     @cython.cdivision(True)
@@ -129,6 +169,9 @@ cdef class GameRunner(Runner):
                 self.window.toggle_fullscreen()
             elif event == SCREENSHOT:
                 capture = True
+            elif event == SEEK:
+                if self.keyframes is not None and self.con is None:
+                    self.scrub(args * SCRUB_FRAMES)
             elif event == RESIZE:
                 width, height = args
                 self.set_renderer_size(width, height)
@@ -138,7 +181,7 @@ cdef class GameRunner(Runner):
             keystate = self.window.get_keystate()
         else:
             try:
-                keystate = self.keys.next()
+                keystate = next(self.keys)
             except StopIteration:
                 keystate = 0
                 if self.skip:
@@ -157,9 +200,15 @@ cdef class GameRunner(Runner):
         labels = self.game.interface.labels
         if self.window is not None and 'framerate' in labels:
             labels['framerate'].set_text('%.2ffps' % self.window.get_fps())
+        if self.window is not None and self.window.timings is not None and 'timings' in labels:
+            labels['timings'].set_text(self.window.timings.summary())
 
         if render and not self.skip and self.renderer is not None:
+            if self.window.timings is not None:
+                self.window.timings.skip()
             self.renderer.render(self.game)
+            if self.window.timings is not None:
+                self.window.timings.mark(RENDERING)
 
         if capture:
             self.capture()
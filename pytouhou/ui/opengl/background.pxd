@@ -1,4 +1,5 @@
 from pytouhou.lib.opengl cimport GLuint, GLushort, GLsizei
+from pytouhou.utils.matrix cimport Matrix
 
 cdef struct Vertex:
     float x, y, z
@@ -6,18 +7,32 @@ cdef struct Vertex:
     unsigned char r, g, b, a
 
 
+# Consecutive object instances drawn together, if their bounding box is in
+# view.  Indices are relative to base_vertex, which is shared by every chunk
+# of the same 65535 vertices.
+cdef struct Chunk:
+    float min[3]
+    float max[3]
+    GLsizei first_vertex, nb_vertices
+    GLsizei first_index, nb_indices
+    GLsizei base_vertex
+
+
 cdef class BackgroundRenderer:
     cdef GLuint texture
-    cdef GLsizei nb_indices
+    cdef Chunk *chunks
+    cdef long nb_chunks
 
     # For modern GL.
     cdef GLuint vbo, ibo
     cdef GLuint vao
+    cdef GLsizei bound_base_vertex
 
     # For fixed pipeline.
     cdef Vertex *vertex_buffer
-    cdef GLushort nb_vertices
 
     cdef void set_state(self) nogil
-    cdef void render_background(self) nogil
+    cdef void set_base_vertex(self, GLsizei base_vertex) nogil
+    cdef void draw(self, Chunk *first, Chunk *last) nogil
+    cdef void render_background(self, Matrix *mvp) nogil
     cdef bint load(self, background, GLuint[MAX_TEXTURES] textures) except True
@@ -12,7 +12,7 @@
 ## GNU General Public License for more details.
 ##
 
-from libc.stdlib cimport malloc, free, realloc
+from libc.stdlib cimport malloc, free
 
 from pytouhou.lib.opengl cimport \
          (glVertexPointer, glTexCoordPointer, glColorPointer,
@@ -29,8 +29,45 @@ from .sprite cimport get_sprite_rendering_data
 from .backend cimport primitive_mode, is_legacy, use_debug_group, use_vao, use_primitive_restart
 
 
+# Largest size of a chunk along any axis, so that it can be culled while
+# still keeping the number of draw calls low.
+cdef float CHUNK_SIZE = 512.
+
+# Vertices which can be indexed from the same base vertex, 0xffff being the
+# primitive restart index.
+cdef GLsizei MAX_VERTICES = 0xffff
+
+
+cdef void get_frustum_planes(Matrix *mvp, float *planes) nogil:
+    # Each plane is (a, b, c, d), with a point inside the frustum if
+    # a*x + b*y + c*z + d >= 0, taken from the w column of the matrix plus
+    # or minus the x, y and z ones.
+    data = <float*>mvp
+    for k in range(3):
+        for i in range(4):
+            planes[8*k+i] = data[4*i+3] + data[4*i+k]
+            planes[8*k+4+i] = data[4*i+3] - data[4*i+k]
+
+
+cdef bint is_visible(const Chunk *chunk, const float *planes) nogil:
+    cdef float distance
+
+    for p in range(6):
+        # Only the corner furthest along the normal of the plane matters.
+        distance = planes[4*p+3]
+        for i in range(3):
+            if planes[4*p+i] >= 0:
+                distance += planes[4*p+i] * chunk.max[i]
+            else:
+                distance += planes[4*p+i] * chunk.min[i]
+        if distance < 0:
+            return False
+    return True
+
+
 cdef class BackgroundRenderer:
     def __dealloc__(self):
+        free(self.chunks)
         if is_legacy:
             if self.vertex_buffer != NULL:
                 free(self.vertex_buffer)
@@ -64,16 +101,45 @@ cdef class BackgroundRenderer:
         glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
         glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self.ibo)
 
-        #TODO: find a way to use offsetof() instead of those ugly hardcoded values.
-        glVertexAttribPointer(0, 3, GL_FLOAT, False, sizeof(Vertex), <void*>0)
+        self.bound_base_vertex = -1
+        self.set_base_vertex(0)
         glEnableVertexAttribArray(0)
-        glVertexAttribPointer(1, 2, GL_FLOAT, False, sizeof(Vertex), <void*>12)
         glEnableVertexAttribArray(1)
-        glVertexAttribPointer(2, 4, GL_UNSIGNED_BYTE, True, sizeof(Vertex), <void*>20)
         glEnableVertexAttribArray(2)
 
 
-    cdef void render_background(self) nogil:
+    cdef void set_base_vertex(self, GLsizei base_vertex) nogil:
+        cdef size_t offset
+
+        if base_vertex == self.bound_base_vertex:
+            return
+
+        offset = base_vertex * sizeof(Vertex)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+
+        #TODO: find a way to use offsetof() instead of those ugly hardcoded values.
+        glVertexAttribPointer(0, 3, GL_FLOAT, False, sizeof(Vertex), <void*>offset)
+        glVertexAttribPointer(1, 2, GL_FLOAT, False, sizeof(Vertex), <void*>(offset + 12))
+        glVertexAttribPointer(2, 4, GL_UNSIGNED_BYTE, True, sizeof(Vertex), <void*>(offset + 20))
+        self.bound_base_vertex = base_vertex
+
+
+    cdef void draw(self, Chunk *first, Chunk *last) nogil:
+        # Consecutive chunks are contiguous in the buffers.
+        if is_legacy:
+            glDrawArrays(primitive_mode, first.first_vertex,
+                         last.first_vertex + last.nb_vertices - first.first_vertex)
+        else:
+            self.set_base_vertex(first.base_vertex)
+            glDrawElements(primitive_mode,
+                           last.first_index + last.nb_indices - first.first_index,
+                           GL_UNSIGNED_SHORT, <void*>(first.first_index * sizeof(GLushort)))
+
+
+    cdef void render_background(self, Matrix *mvp) nogil:
+        cdef float planes[24]
+        cdef long i, j
+
         if use_debug_group:
             glPushDebugGroup(GL_DEBUG_SOURCE_APPLICATION, 0, -1, "Background drawing")
 
@@ -90,10 +156,23 @@ cdef class BackgroundRenderer:
         glEnable(GL_DEPTH_TEST)
         glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
         glBindTexture(GL_TEXTURE_2D, self.texture)
-        if is_legacy:
-            glDrawArrays(primitive_mode, 0, self.nb_vertices)
-        else:
-            glDrawElements(primitive_mode, self.nb_indices, GL_UNSIGNED_SHORT, NULL)
+
+        # Only draw the chunks in view, the visible ones next to each other
+        # in a single call.
+        get_frustum_planes(mvp, planes)
+        i = 0
+        while i < self.nb_chunks:
+            if not is_visible(&self.chunks[i], planes):
+                i += 1
+                continue
+            j = i
+            while (j + 1 < self.nb_chunks
+                   and self.chunks[j+1].base_vertex == self.chunks[i].base_vertex
+                   and is_visible(&self.chunks[j+1], planes)):
+                j += 1
+            self.draw(&self.chunks[i], &self.chunks[j])
+            i = j + 1
+
         glDisable(GL_DEPTH_TEST)
 
         if not is_legacy:
@@ -109,16 +188,35 @@ cdef class BackgroundRenderer:
 
     cdef bint load(self, background, GLuint[MAX_TEXTURES] textures) except True:
         cdef float ox, oy, oz, ox2, oy2, oz2
-        cdef GLsizei nb_vertices = 0, nb_indices = 0
-
-        vertex_buffer = <Vertex*> malloc(65536 * sizeof(Vertex))
-
+        cdef GLsizei nb_vertices = 0, nb_indices = 0, base_vertex = 0
+        cdef GLsizei first_vertex, first_index, index
+        cdef GLushort *indices = NULL
+        cdef Vertex *vertex_buffer
+        cdef Vertex *vertex
+        cdef Chunk *chunk = NULL
+        cdef float lower[3]
+        cdef float upper[3]
+        cdef bint new_base, new_chunk
+
+        nb_quads = sum([len(model) for ox, oy, oz, model_id, model in background.object_instances])
+        vertex_buffer = <Vertex*> malloc(4 * nb_quads * sizeof(Vertex))
+        self.chunks = <Chunk*> malloc(len(background.object_instances) * sizeof(Chunk))
         if not is_legacy:
-            indices = <GLushort*> malloc(65536 * sizeof(GLushort))
+            indices = <GLushort*> malloc(6 * nb_quads * sizeof(GLushort))
 
         for ox, oy, oz, model_id, model in background.object_instances:
+            if not model:
+                continue
+
+            # Indices being 16 bits, the vertices of an instance have to be
+            # reachable from the same base vertex.
+            new_base = nb_vertices + 4 * len(model) - base_vertex > MAX_VERTICES
+            if new_base:
+                base_vertex = nb_vertices
+            first_vertex = nb_vertices
+            first_index = nb_indices
+
             for ox2, oy2, oz2, width_override, height_override, sprite in model:
-                #TODO: view frustum culling
                 data = get_sprite_rendering_data(sprite)
                 key = data.key
 
@@ -133,24 +231,60 @@ cdef class BackgroundRenderer:
 
                 if not is_legacy:
                     # Add indices
+                    index = nb_vertices - base_vertex
                     if use_primitive_restart:
-                        indices[nb_indices] = nb_vertices
-                        indices[nb_indices+1] = nb_vertices + 1
-                        indices[nb_indices+2] = nb_vertices + 3
-                        indices[nb_indices+3] = nb_vertices + 2
+                        indices[nb_indices] = index
+                        indices[nb_indices+1] = index + 1
+                        indices[nb_indices+2] = index + 3
+                        indices[nb_indices+3] = index + 2
                         indices[nb_indices+4] = 0xFFFF
                     else:
-                        indices[nb_indices] = nb_vertices
-                        indices[nb_indices+1] = nb_vertices + 1
-                        indices[nb_indices+2] = nb_vertices + 3
-                        indices[nb_indices+3] = nb_vertices + 1
-                        indices[nb_indices+4] = nb_vertices + 2
-                        indices[nb_indices+5] = nb_vertices + 3
+                        indices[nb_indices] = index
+                        indices[nb_indices+1] = index + 1
+                        indices[nb_indices+2] = index + 3
+                        indices[nb_indices+3] = index + 1
+                        indices[nb_indices+4] = index + 2
+                        indices[nb_indices+5] = index + 3
 
                     nb_indices += 5 if use_primitive_restart else 6
 
                 nb_vertices += 4
 
+            # Bounding box of the instance, from its actual vertices.
+            vertex = &vertex_buffer[first_vertex]
+            lower[:] = [vertex.x, vertex.y, vertex.z]
+            upper[:] = [vertex.x, vertex.y, vertex.z]
+            for i in range(first_vertex + 1, nb_vertices):
+                lower[0] = min(lower[0], vertex_buffer[i].x)
+                lower[1] = min(lower[1], vertex_buffer[i].y)
+                lower[2] = min(lower[2], vertex_buffer[i].z)
+                upper[0] = max(upper[0], vertex_buffer[i].x)
+                upper[1] = max(upper[1], vertex_buffer[i].y)
+                upper[2] = max(upper[2], vertex_buffer[i].z)
+
+            # Instances are kept in their drawing order, a new chunk is only
+            # started when the current one would grow too large.
+            new_chunk = chunk is NULL or new_base
+            for i in range(3):
+                if not new_chunk and max(upper[i], chunk.max[i]) - min(lower[i], chunk.min[i]) > CHUNK_SIZE:
+                    new_chunk = True
+            if new_chunk:
+                chunk = &self.chunks[self.nb_chunks]
+                self.nb_chunks += 1
+                for i in range(3):
+                    chunk.min[i] = lower[i]
+                    chunk.max[i] = upper[i]
+                chunk.first_vertex = first_vertex
+                chunk.first_index = first_index
+                chunk.base_vertex = base_vertex
+                chunk.nb_vertices = chunk.nb_indices = 0
+            else:
+                for i in range(3):
+                    chunk.min[i] = min(chunk.min[i], lower[i])
+                    chunk.max[i] = max(chunk.max[i], upper[i])
+            chunk.nb_vertices += nb_vertices - first_vertex
+            chunk.nb_indices += nb_indices - first_index
+
         self.texture = textures[key >> 1]
 
         # We only need to keep the rendered vertices and indices in memory,
@@ -158,8 +292,7 @@ cdef class BackgroundRenderer:
         # background animation.
 
         if is_legacy:
-            self.vertex_buffer = <Vertex*> realloc(vertex_buffer, nb_vertices * sizeof(Vertex))
-            self.nb_vertices = nb_vertices
+            self.vertex_buffer = vertex_buffer
         else:
             if use_debug_group:
                 glPushDebugGroup(GL_DEBUG_SOURCE_APPLICATION, 0, -1, "Background uploading")
@@ -172,7 +305,8 @@ cdef class BackgroundRenderer:
             glBufferData(GL_ELEMENT_ARRAY_BUFFER, nb_indices * sizeof(GLushort), indices, GL_STATIC_DRAW)
             glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
 
-            self.nb_indices = nb_indices
-
             if use_debug_group:
                 glPopDebugGroup()
+
+            free(vertex_buffer)
+            free(indices)
@@ -201,8 +201,8 @@ cdef class GameRenderer(Renderer):
                 self.background_shader.uniform_1('fog_end', fog_end)
                 self.background_shader.uniform_4('fog_color', fog_r / 255., fog_g / 255., fog_b / 255., 1.)
 
+            self.background_renderer.render_background(mvp)
             free(mvp)
-            self.background_renderer.render_background()
 
         if game is not None:
             if is_legacy:
@@ -215,13 +215,16 @@ cdef class GameRenderer(Renderer):
 
             self.render_elements([enemy for enemy in game.enemies if enemy.visible])
             self.render_elements(game.effects)
-            self.render_elements(chain(game.players_bullets,
-                                       game.lasers_sprites(),
+            self.render_particles(game.particles)
+            self.render_bullets(game.players_bullets)
+            self.render_elements(chain(game.lasers_sprites(),
                                        game.players,
                                        game.msg_sprites()))
-            self.render_elements(chain(game.bullets, game.lasers,
-                                       game.cancelled_bullets, game.items,
-                                       game.labels))
+            self.render_bullets(game.bullets)
+            self.render_elements(game.lasers)
+            self.render_bullets(game.cancelled_bullets)
+            self.render_items(game.items)
+            self.render_elements(game.labels)
 
         if game.msg_runner is not None:
             rect = Rect(48, 368, 288, 48)
@@ -2,6 +2,10 @@ from cpython cimport PyObject
 from pytouhou.lib.opengl cimport GLuint
 from .texture cimport TextureManager, FontManager
 from .framebuffer cimport Framebuffer
+from .sprite cimport RenderingData
+from pytouhou.game.particle cimport ParticleSystem
+from pytouhou.game.bullet cimport BulletList
+from pytouhou.game.item cimport ItemList
 
 cdef struct Vertex:
     short x, y, z, padding
@@ -43,4 +47,9 @@ cdef class Renderer:
     cdef void set_state(self) nogil
     cdef void set_text_state(self) nogil
     cdef bint render_elements(self, elements) except True
+    cdef bint render_particles(self, ParticleSystem particles) except True
+    cdef bint render_bullets(self, BulletList bullets) except True
+    cdef bint render_items(self, ItemList items) except True
+    cdef long add_sprite(self, long nb_vertices, RenderingData *data, short ox, short oy) nogil
+    cdef bint draw(self, long nb_vertices) except True
     cdef bint render_quads(self, rects, colors, GLuint texture) except True
@@ -30,7 +30,11 @@ from pytouhou.lib.opengl cimport \
 from pytouhou.lib.sdl import SDLError
 
 from pytouhou.game.element cimport Element
-from .sprite cimport get_sprite_rendering_data
+from pytouhou.game.sprite cimport Sprite
+from pytouhou.game.particle cimport ParticleSystem, ParticleKind
+from pytouhou.game.bullet cimport Bullet, BulletList
+from pytouhou.game.item cimport Item, ItemList
+from .sprite cimport RenderingData, get_sprite_rendering_data
 from .backend cimport primitive_mode, is_legacy, use_debug_group, use_vao, use_primitive_restart
 
 from pytouhou.utils.helpers import get_logger
@@ -162,49 +166,140 @@ cdef class Renderer:
 
         for element_idx in range(nb_elements):
             element = <object>self.elements[element_idx]
-            ox, oy = <short>element.x, <short>element.y
             data = get_sprite_rendering_data(element.sprite)
-            key = data.key
+            nb_vertices = self.add_sprite(nb_vertices, data, <short>element.x, <short>element.y)
 
-            blendfunc = key & 1
-            texture = key >> 1
+        self.draw(nb_vertices)
+
+
+    cdef bint render_particles(self, ParticleSystem particles) except True:
+        # Particles aren’t elements, their sprites and positions are read
+        # straight from the arrays of the particle system.
+        cdef ParticleKind kind
+        cdef Sprite sprite
+        cdef long i
+
+        if not particles.visible or not particles.length:
+            return False
+
+        nb_vertices = 0
+        memset(self.last_indices, 0, sizeof(self.last_indices))
+
+        for i in range(particles.length):
+            if particles.removed[i]:
+                continue
+            kind = particles.kinds[particles.kind[i]]
+            sprite = kind.get_sprite(particles.frame[i])
+            if not sprite.visible:
+                continue
+            data = get_sprite_rendering_data(sprite)
+            nb_vertices = self.add_sprite(nb_vertices, data, <short>particles.x[i], <short>particles.y[i])
+            if nb_vertices > MAX_ELEMENTS - 4:
+                break
+
+        if nb_vertices:
+            self.draw(nb_vertices)
+
+
+    cdef bint render_bullets(self, BulletList bullets) except True:
+        # Bullets aren’t elements either, their positions are in the rows of
+        # their list.
+        cdef Bullet bullet
+        cdef Sprite sprite
+        cdef long i
+
+        nb_vertices = 0
+        memset(self.last_indices, 0, sizeof(self.last_indices))
+
+        for i in range(len(bullets)):
+            bullet = bullets[i]
+            sprite = bullet.sprite
+            if sprite is None or not sprite.visible:
+                continue
+            data = get_sprite_rendering_data(sprite)
+            nb_vertices = self.add_sprite(nb_vertices, data, <short>bullets.rows[i].x, <short>bullets.rows[i].y)
+            if nb_vertices > MAX_ELEMENTS - 4:
+                break
+
+        if nb_vertices:
+            self.draw(nb_vertices)
+
+
+    cdef bint render_items(self, ItemList items) except True:
+        # Same for items, drawn as their indicator while above the screen.
+        cdef Item item
+        cdef Element indicator
+        cdef Sprite sprite
+        cdef double x, y
+        cdef long i
 
-            rec = self.indices[texture][blendfunc]
-            next_indice = self.last_indices[key]
-
-            # Pack data in buffer
-            x1, x2, x3, x4, y1, y2, y3, y4, z1, z2, z3, z4 = <short>data.pos[0], <short>data.pos[1], <short>data.pos[2], <short>data.pos[3], <short>data.pos[4], <short>data.pos[5], <short>data.pos[6], <short>data.pos[7], <short>data.pos[8], <short>data.pos[9], <short>data.pos[10], <short>data.pos[11]
-            r, g, b, a = data.color[0], data.color[1], data.color[2], data.color[3]
-            self.vertex_buffer[nb_vertices] = Vertex(x1 + ox, y1 + oy, z1, 0, data.left, data.bottom, r, g, b, a)
-            self.vertex_buffer[nb_vertices+1] = Vertex(x2 + ox, y2 + oy, z2, 0, data.right, data.bottom, r, g, b, a)
-            self.vertex_buffer[nb_vertices+2] = Vertex(x4 + ox, y4 + oy, z4, 0, data.left, data.top, r, g, b, a)
-            self.vertex_buffer[nb_vertices+3] = Vertex(x3 + ox, y3 + oy, z3, 0, data.right, data.top, r, g, b, a)
-
-            # Add indices
-            if is_legacy:
-                rec[next_indice] = nb_vertices
-                rec[next_indice+1] = nb_vertices + 1
-                rec[next_indice+2] = nb_vertices + 3
-                rec[next_indice+3] = nb_vertices + 2
-                self.last_indices[key] += 4
-            elif use_primitive_restart:
-                rec[next_indice] = nb_vertices
-                rec[next_indice+1] = nb_vertices + 1
-                rec[next_indice+2] = nb_vertices + 2
-                rec[next_indice+3] = nb_vertices + 3
-                rec[next_indice+4] = 0xFFFF
-                self.last_indices[key] += 5
+        nb_vertices = 0
+        memset(self.last_indices, 0, sizeof(self.last_indices))
+
+        for i in range(len(items)):
+            item = items[i]
+            indicator = item.indicator
+            if indicator is not None:
+                sprite = indicator.sprite
+                x, y = indicator.x, indicator.y
             else:
-                rec[next_indice] = nb_vertices
-                rec[next_indice+1] = nb_vertices + 1
-                rec[next_indice+2] = nb_vertices + 2
-                rec[next_indice+3] = nb_vertices + 1
-                rec[next_indice+4] = nb_vertices + 2
-                rec[next_indice+5] = nb_vertices + 3
-                self.last_indices[key] += 6
+                sprite = item._item_type.sprite
+                x, y = items.rows[i].x, items.rows[i].y
+            if sprite is None or not sprite.visible:
+                continue
+            data = get_sprite_rendering_data(sprite)
+            nb_vertices = self.add_sprite(nb_vertices, data, <short>x, <short>y)
+            if nb_vertices > MAX_ELEMENTS - 4:
+                break
+
+        if nb_vertices:
+            self.draw(nb_vertices)
+
+
+    cdef long add_sprite(self, long nb_vertices, RenderingData *data, short ox, short oy) nogil:
+        key = data.key
+
+        blendfunc = key & 1
+        texture = key >> 1
+
+        rec = self.indices[texture][blendfunc]
+        next_indice = self.last_indices[key]
+
+        # Pack data in buffer
+        x1, x2, x3, x4, y1, y2, y3, y4, z1, z2, z3, z4 = <short>data.pos[0], <short>data.pos[1], <short>data.pos[2], <short>data.pos[3], <short>data.pos[4], <short>data.pos[5], <short>data.pos[6], <short>data.pos[7], <short>data.pos[8], <short>data.pos[9], <short>data.pos[10], <short>data.pos[11]
+        r, g, b, a = data.color[0], data.color[1], data.color[2], data.color[3]
+        self.vertex_buffer[nb_vertices] = Vertex(x1 + ox, y1 + oy, z1, 0, data.left, data.bottom, r, g, b, a)
+        self.vertex_buffer[nb_vertices+1] = Vertex(x2 + ox, y2 + oy, z2, 0, data.right, data.bottom, r, g, b, a)
+        self.vertex_buffer[nb_vertices+2] = Vertex(x4 + ox, y4 + oy, z4, 0, data.left, data.top, r, g, b, a)
+        self.vertex_buffer[nb_vertices+3] = Vertex(x3 + ox, y3 + oy, z3, 0, data.right, data.top, r, g, b, a)
+
+        # Add indices
+        if is_legacy:
+            rec[next_indice] = nb_vertices
+            rec[next_indice+1] = nb_vertices + 1
+            rec[next_indice+2] = nb_vertices + 3
+            rec[next_indice+3] = nb_vertices + 2
+            self.last_indices[key] += 4
+        elif use_primitive_restart:
+            rec[next_indice] = nb_vertices
+            rec[next_indice+1] = nb_vertices + 1
+            rec[next_indice+2] = nb_vertices + 2
+            rec[next_indice+3] = nb_vertices + 3
+            rec[next_indice+4] = 0xFFFF
+            self.last_indices[key] += 5
+        else:
+            rec[next_indice] = nb_vertices
+            rec[next_indice+1] = nb_vertices + 1
+            rec[next_indice+2] = nb_vertices + 2
+            rec[next_indice+3] = nb_vertices + 1
+            rec[next_indice+4] = nb_vertices + 2
+            rec[next_indice+5] = nb_vertices + 3
+            self.last_indices[key] += 6
+
+        return nb_vertices + 4
 
-            nb_vertices += 4
 
+    cdef bint draw(self, long nb_vertices) except True:
         if use_debug_group:
             glPushDebugGroup(GL_DEBUG_SOURCE_APPLICATION, 0, -1, "Elements drawing")
 
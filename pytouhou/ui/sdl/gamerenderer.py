@@ -62,6 +62,7 @@ class GameRenderer:
 
             self.render_elements([enemy for enemy in game.enemies if enemy.visible])
             self.render_elements(game.effects)
+            self.render_particles(game.particles)
             self.render_elements(chain(game.players_bullets,
                                        game.lasers_sprites(),
                                        game.players,
@@ -100,16 +101,23 @@ class GameRenderer:
 
 
     def render_elements(self, elements):
+        objects = chain(*[element.objects for element in elements])
+        self.render_sprites([(element.x, element.y, element.sprite) for element in objects])
+
+
+    def render_particles(self, particles):
+        if particles.visible:
+            self.render_sprites(particles.sprites())
+
+
+    def render_sprites(self, sprites):
         nb_vertices = 0
 
-        objects = chain(*[element.objects for element in elements])
-        for element in objects:
+        for ox, oy, sprite in sprites:
             if nb_vertices >= MAX_ELEMENTS - 4:
                 break
 
-            sprite = element.sprite
             if sprite and sprite.visible:
-                ox, oy = element.x, element.y
                 data = get_sprite_rendering_data(sprite)
 
                 #XXX
@@ -1,4 +1,5 @@
 cimport pytouhou.lib.gui as gui
+from pytouhou.utils.timings cimport Timings
 
 
 cdef class Clock:
@@ -22,6 +23,7 @@ cdef class Window:
     cdef gui.Window win
     cdef Runner runner
     cdef Clock clock
+    cdef public Timings timings
     cdef int frame, frameskip
     cdef int width, height
 
@@ -15,6 +15,7 @@
 cimport cython
 
 cimport pytouhou.lib.sdl as sdl
+from pytouhou.utils.timings cimport RENDERING, SLEEP
 
 
 cdef class Clock:
@@ -122,9 +123,17 @@ cdef class Window:
         if self.runner is not None:
             running = self.runner.update(render)
         if render:
+            if self.timings is not None:
+                self.timings.skip()
             self.win.present()
+            if self.timings is not None:
+                self.timings.mark(RENDERING)
 
+        if self.timings is not None:
+            self.timings.skip()
         self.clock.tick()
+        if self.timings is not None:
+            self.timings.mark(SLEEP)
         self.frame += 1
 
         return running
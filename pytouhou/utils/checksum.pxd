@@ -0,0 +1,15 @@
+from libc.stdint cimport uint64_t
+from libc.string cimport memcpy
+
+
+# Cheap mixing of 64-bit words into a running checksum, not meant to resist
+# anything but accidental collisions.
+cdef inline uint64_t mix(uint64_t checksum, uint64_t value) nogil:
+    checksum = (checksum ^ value) * 0x9e3779b97f4a7c15ULL
+    return checksum ^ (checksum >> 29)
+
+
+cdef inline uint64_t mix_double(uint64_t checksum, double value) nogil:
+    cdef uint64_t bits
+    memcpy(&bits, &value, sizeof(double))
+    return mix(checksum, bits)
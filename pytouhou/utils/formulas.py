@@ -0,0 +1,47 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+"""Formulas used by interpolators.
+
+These have to be module-level functions instead of lambdas, so that
+interpolators can be pickled along with the rest of a game’s state.
+"""
+
+
+def accelerate(x):
+    return x ** 2
+
+
+def accelerate3(x):
+    return x ** 3
+
+
+def accelerate4(x):
+    return x ** 4
+
+
+def decelerate(x):
+    return 2. * x - x ** 2
+
+
+def decelerate3(x):
+    return 2. * x - x ** 3
+
+
+def decelerate4(x):
+    return 2. * x - x ** 4
+
+
+def reverse(x):
+    return 1. - x
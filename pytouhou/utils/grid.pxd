@@ -0,0 +1,17 @@
+cdef class Grid:
+    cdef double x, y, cell_size
+    cdef long width, height
+
+    cdef long *heads
+    cdef long *next_entries
+    cdef long *entry_indices
+    cdef long nb_entries, entries_size
+
+    cdef long *results
+    cdef long nb_results, results_size
+
+    cdef void clear(self) nogil
+    cdef long cell_x(self, double x) nogil
+    cdef long cell_y(self, double y) nogil
+    cdef bint insert(self, long index, double x1, double y1, double x2, double y2) except True
+    cdef long query(self, double x1, double y1, double x2, double y2) except -1
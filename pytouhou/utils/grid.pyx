@@ -0,0 +1,153 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+cimport cython
+from libc.stdlib cimport malloc, realloc, free, qsort
+
+
+cdef int compare_indices(const void *a, const void *b) noexcept nogil:
+    cdef long x = (<long*>a)[0], y = (<long*>b)[0]
+    return (x > y) - (x < y)
+
+
+cdef class Grid:
+    """Uniform grid of square cells, used as a broadphase for collisions.
+
+    Elements are inserted by index along with their bounding box, and
+    queries return the sorted indices of every element whose box shares a
+    cell with the queried one, so that callers can run their exact tests
+    in the same order as a plain loop would.  Anything outside of the grid
+    is clamped into its border cells, which keeps queries conservative.
+    """
+
+    def __init__(self, double x, double y, double width, double height,
+                 double cell_size=32.):
+        self.x, self.y = x, y
+        self.cell_size = cell_size
+        self.width = max(<long>(width / cell_size) + 1, 1)
+        self.height = max(<long>(height / cell_size) + 1, 1)
+
+        self.heads = <long*>malloc(self.width * self.height * sizeof(long))
+        if self.heads is NULL:
+            raise MemoryError
+        self.clear()
+
+
+    def __dealloc__(self):
+        free(self.heads)
+        free(self.next_entries)
+        free(self.entry_indices)
+        free(self.results)
+
+
+    def __len__(self):
+        return self.nb_entries
+
+
+    cdef void clear(self) nogil:
+        cdef long i
+
+        for i in range(self.width * self.height):
+            self.heads[i] = -1
+        self.nb_entries = 0
+        self.nb_results = 0
+
+
+    @cython.cdivision(True)
+    cdef long cell_x(self, double x) nogil:
+        x = (x - self.x) / self.cell_size
+        if not x >= 0: # Also true for NaN.
+            return 0
+        if x >= self.width:
+            return self.width - 1
+        return <long>x
+
+
+    @cython.cdivision(True)
+    cdef long cell_y(self, double y) nogil:
+        y = (y - self.y) / self.cell_size
+        if not y >= 0:
+            return 0
+        if y >= self.height:
+            return self.height - 1
+        return <long>y
+
+
+    cdef bint insert(self, long index, double x1, double y1, double x2, double y2) except True:
+        cdef long cx, cy, cx1, cx2, cy1, cy2, cell, entry, size
+        cdef long *entries
+
+        cx1, cx2 = self.cell_x(x1), self.cell_x(x2)
+        cy1, cy2 = self.cell_y(y1), self.cell_y(y2)
+
+        size = self.nb_entries + (cx2 - cx1 + 1) * (cy2 - cy1 + 1)
+        if size > self.entries_size:
+            size = max(size, 2 * self.entries_size, 256)
+            entries = <long*>realloc(self.next_entries, size * sizeof(long))
+            if entries is NULL:
+                raise MemoryError
+            self.next_entries = entries
+            entries = <long*>realloc(self.entry_indices, size * sizeof(long))
+            if entries is NULL:
+                raise MemoryError
+            self.entry_indices = entries
+            self.entries_size = size
+
+        for cy in range(cy1, cy2 + 1):
+            for cx in range(cx1, cx2 + 1):
+                cell = cy * self.width + cx
+                entry = self.nb_entries
+                self.entry_indices[entry] = index
+                self.next_entries[entry] = self.heads[cell]
+                self.heads[cell] = entry
+                self.nb_entries += 1
+
+
+    cdef long query(self, double x1, double y1, double x2, double y2) except -1:
+        """Fill self.results with the sorted, unique indices of the elements
+        sharing a cell with this box, and return how many there are."""
+        cdef long cx, cy, cx1, cx2, cy1, cy2, entry, i, nb_results, size
+        cdef long *results
+
+        cx1, cx2 = self.cell_x(x1), self.cell_x(x2)
+        cy1, cy2 = self.cell_y(y1), self.cell_y(y2)
+
+        nb_results = 0
+        for cy in range(cy1, cy2 + 1):
+            for cx in range(cx1, cx2 + 1):
+                entry = self.heads[cy * self.width + cx]
+                while entry >= 0:
+                    if nb_results == self.results_size:
+                        size = max(2 * self.results_size, 64)
+                        results = <long*>realloc(self.results, size * sizeof(long))
+                        if results is NULL:
+                            raise MemoryError
+                        self.results = results
+                        self.results_size = size
+                    self.results[nb_results] = self.entry_indices[entry]
+                    nb_results += 1
+                    entry = self.next_entries[entry]
+
+        # Elements spanning several cells appear more than once.
+        if nb_results > 1:
+            qsort(self.results, nb_results, sizeof(long), compare_indices)
+            i = 0
+            for entry in range(1, nb_results):
+                if self.results[entry] != self.results[i]:
+                    i += 1
+                    self.results[i] = self.results[entry]
+            nb_results = i + 1
+
+        self.nb_results = nb_results
+        return nb_results
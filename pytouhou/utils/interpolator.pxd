@@ -1,11 +1,14 @@
 cdef class Interpolator:
     cdef unsigned long start_frame, end_frame, _frame
-    cdef long _length
+    cdef long _length, _size
     cdef double *_values
     cdef double *start_values
     cdef double *end_values
     cdef object _formula
 
+    cdef bint reserve(self, long length) except True
+    cpdef reset(self, tuple values, unsigned long start_frame=*, tuple end_values=*,
+                unsigned long end_frame=*, formula=*)
     cpdef set_interpolation_start(self, unsigned long frame, tuple values)
     cpdef set_interpolation_end(self, unsigned long frame, tuple values)
     cpdef set_interpolation_end_frame(self, unsigned long end_frame)
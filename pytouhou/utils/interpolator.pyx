@@ -13,15 +13,21 @@
 ##
 
 from libc.stdlib cimport malloc, free
+from libc.string cimport memcpy
+from cpython.bytes cimport PyBytes_FromStringAndSize, PyBytes_AS_STRING
+
+from copyreg import __newobj__
 
 
 cdef class Interpolator:
     def __init__(self, tuple values, unsigned long start_frame=0, tuple end_values=None,
                  unsigned long end_frame=0, formula=None):
-        self._length = len(values)
-        self._values = <double*>malloc(self._length * sizeof(double))
-        self.start_values = <double*>malloc(self._length * sizeof(double))
-        self.end_values = <double*>malloc(self._length * sizeof(double))
+        self.reset(values, start_frame, end_values, end_frame, formula)
+
+
+    cpdef reset(self, tuple values, unsigned long start_frame=0, tuple end_values=None,
+                unsigned long end_frame=0, formula=None):
+        self.reserve(len(values))
         for i in range(self._length):
             self._values[i] = values[i]
             self.start_values[i] = self._values[i]
@@ -34,12 +40,56 @@ cdef class Interpolator:
         self._formula = formula
 
 
+    cdef bint reserve(self, long length) except True:
+        # Keep the previous buffers if they are big enough, so that pooled
+        # interpolators don’t have to allocate anything.
+        if length > self._size:
+            free(self.end_values)
+            free(self.start_values)
+            free(self._values)
+            self._values = <double*>malloc(length * sizeof(double))
+            self.start_values = <double*>malloc(length * sizeof(double))
+            self.end_values = <double*>malloc(length * sizeof(double))
+            if self._values is NULL or self.start_values is NULL or self.end_values is NULL:
+                self._size = 0
+                raise MemoryError
+            self._size = length
+        self._length = length
+
+
     def __dealloc__(self):
         free(self.end_values)
         free(self.start_values)
         free(self._values)
 
 
+    def __reduce__(self):
+        cdef size_t size = self._length * sizeof(double)
+        cdef bytes data = PyBytes_FromStringAndSize(NULL, 3 * size)
+        cdef char *buf = PyBytes_AS_STRING(data)
+
+        memcpy(buf, self._values, size)
+        memcpy(buf + size, self.start_values, size)
+        memcpy(buf + 2 * size, self.end_values, size)
+        return __newobj__, (Interpolator,), (data, self.start_frame,
+                                             self.end_frame, self._frame,
+                                             self._formula)
+
+
+    def __setstate__(self, tuple state):
+        cdef bytes data
+        cdef size_t size
+        cdef char *buf
+
+        data, self.start_frame, self.end_frame, self._frame, self._formula = state
+        self.reserve(len(data) // (3 * sizeof(double)))
+        size = self._length * sizeof(double)
+        buf = PyBytes_AS_STRING(data)
+        memcpy(self._values, buf, size)
+        memcpy(self.start_values, buf + size, size)
+        memcpy(self.end_values, buf + 2 * size, size)
+
+
     property values:
         def __get__(self):
             return tuple([self._values[i] for i in range(self._length)])
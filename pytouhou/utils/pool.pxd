@@ -0,0 +1,7 @@
+cdef class Pool:
+    cdef list objects
+    cdef public long size
+    cdef public unsigned long hits, misses
+
+    cdef object acquire(self)
+    cdef bint release(self, obj) except True
@@ -0,0 +1,46 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+
+cdef class Pool:
+    """Free list of objects to reuse instead of allocating new ones.
+
+    acquire() returns None when the pool is empty, in which case the caller
+    has to create the object itself; otherwise the caller has to reset the
+    returned object before using it.  hits and misses count both cases, to
+    help choosing the size.
+    """
+
+    def __init__(self, long size=1024):
+        self.objects = []
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+
+
+    def __len__(self):
+        return len(self.objects)
+
+
+    cdef object acquire(self):
+        if self.objects:
+            self.hits += 1
+            return self.objects.pop()
+        self.misses += 1
+        return None
+
+
+    cdef bint release(self, obj) except True:
+        if len(self.objects) < self.size:
+            self.objects.append(obj)
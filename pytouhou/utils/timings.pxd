@@ -0,0 +1,21 @@
+from cpython.time cimport PyTime_t
+
+
+cdef enum Phase:
+    VMS, COMPACTION, BACKGROUND, MSG, PLAYERS, ENEMIES, EFFECTS, BULLETS,
+    LASERS, INTERFACE, TEXTS, CLEANUP, RENDERING, SLEEP, NB_PHASES
+
+
+cdef class Timings:
+    cdef double *samples
+    cdef public long size, length
+    cdef long current
+    cdef PyTime_t reference
+
+    cdef void begin(self) nogil
+    cdef void mark(self, Phase phase) nogil
+    cdef void skip(self) nogil
+    cpdef list last(self, long frames=*)
+    cpdef dict percentiles(self, tuple percents=*)
+    cpdef str summary(self, long frames=*)
+    cpdef str report(self)
@@ -0,0 +1,125 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+from libc.stdlib cimport calloc, free
+from libc.string cimport memset
+from cpython.time cimport PyTime_PerfCounterRaw, PyTime_AsSecondsDouble
+
+
+PHASE_NAMES = ('vms', 'compaction', 'background', 'msg', 'players',
+               'enemies', 'effects', 'bullets', 'lasers', 'interface',
+               'texts', 'cleanup', 'rendering', 'sleep')
+
+
+cdef class Timings:
+    """Time spent in each phase of the last frames.
+
+    begin() starts a new frame, then each mark() adds the time elapsed since
+    the previous call to the given phase, while skip() discards it.  The
+    samples are kept for the last size frames only.  Owners keep this object
+    as None when the timings aren’t wanted, so that disabled timings only
+    cost a comparison.
+    """
+
+    def __init__(self, long size=3600):
+        self.samples = <double*>calloc(size * NB_PHASES, sizeof(double))
+        if self.samples is NULL:
+            raise MemoryError
+        self.size = size
+        self.length = 0
+        self.current = size - 1
+
+
+    def __dealloc__(self):
+        free(self.samples)
+
+
+    def __len__(self):
+        return self.length
+
+
+    cdef void begin(self) nogil:
+        self.current = (self.current + 1) % self.size
+        if self.length < self.size:
+            self.length += 1
+        memset(&self.samples[self.current * NB_PHASES], 0, NB_PHASES * sizeof(double))
+        self.reference = PyTime_PerfCounterRaw()
+
+
+    cdef void mark(self, Phase phase) nogil:
+        cdef PyTime_t now
+
+        if self.length == 0:
+            return
+        now = PyTime_PerfCounterRaw()
+        self.samples[self.current * NB_PHASES + phase] += PyTime_AsSecondsDouble(now - self.reference) * 1000.
+        self.reference = now
+
+
+    cdef void skip(self) nogil:
+        self.reference = PyTime_PerfCounterRaw()
+
+
+    cpdef list last(self, long frames=-1):
+        """Return the timings of the last frames, oldest first, as a list of
+        tuples of milliseconds in the order of PHASE_NAMES."""
+        cdef long i, j, row
+
+        if frames < 0 or frames > self.length:
+            frames = self.length
+        result = []
+        for i in range(self.length - frames, self.length):
+            row = (self.current - self.length + 1 + i) % self.size
+            result.append(tuple([self.samples[row * NB_PHASES + j]
+                                 for j in range(NB_PHASES)]))
+        return result
+
+
+    cpdef dict percentiles(self, tuple percents=(50, 90, 99, 100)):
+        """Return, for each phase and for the whole frame, the given
+        percentiles of its duration over the last frames, in milliseconds."""
+        frames = self.last()
+        if not frames:
+            return {}
+        columns = list(zip(*frames))
+        columns.append([sum(frame) for frame in frames])
+
+        result = {}
+        for name, column in zip(PHASE_NAMES + ('total',), columns):
+            column = sorted(column)
+            result[name] = tuple([column[min(len(column) - 1, len(column) * percent // 100)]
+                                  for percent in percents])
+        return result
+
+
+    cpdef str summary(self, long frames=60):
+        """Return a short line with the mean duration of the last frames and
+        of their two heaviest phases, to be displayed on screen."""
+        cdef long i
+
+        frames_list = self.last(frames)
+        if not frames_list:
+            return ''
+        means = [sum(column) / len(frames_list) for column in zip(*frames_list)]
+        heaviest = sorted(range(NB_PHASES), key=means.__getitem__, reverse=True)[:2]
+        return '%.1fms %s' % (sum(means), ' '.join(['%s %.1f' % (PHASE_NAMES[i][:3], means[i])
+                                                   for i in heaviest]))
+
+
+    cpdef str report(self):
+        lines = ['phase (ms)   ' + ' '.join([title.rjust(8) for title in ('p50', 'p90', 'p99', 'max')])]
+        for name, values in self.percentiles().items():
+            lines.append('%-12s %8.3f %8.3f %8.3f %8.3f' % ((name,) + values))
+        lines.append('%d frames' % self.length)
+        return '\n'.join(lines)
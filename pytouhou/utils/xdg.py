@@ -37,6 +37,9 @@ xdg_config_dirs = [xdg_config_home] + \
 
 xdg_config_dirs = [x for x in xdg_config_dirs if x]
 
+xdg_cache_home = os.environ.get('XDG_CACHE_HOME') or \
+    os.path.join(_home, '.cache')
+
 
 def save_config_path(*resource):
     resource = os.path.join(*resource)
@@ -47,6 +50,15 @@ def save_config_path(*resource):
     return path
 
 
+def save_cache_path(*resource):
+    resource = os.path.join(*resource)
+    assert not resource.startswith('/')
+    path = os.path.join(xdg_cache_home, resource)
+    if not os.path.isdir(path):
+        os.makedirs(path, 0o700)
+    return path
+
+
 def load_config_paths(*resource):
     resource = os.path.join(*resource)
     for config_dir in xdg_config_dirs:
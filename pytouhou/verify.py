@@ -0,0 +1,117 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+"""Verification of a corpus of replays against the engine.
+
+Every replay is simulated headlessly, in a pool of processes, and its final
+score is compared with the one the original game saved in it.  Each worker
+loads the data files once, and keeps the parsed files for all of its jobs.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from time import perf_counter
+
+from pytouhou.formats.t6rp import T6RP
+from pytouhou.headless import HeadlessRunner
+from pytouhou.resource.loader import CachedLoader
+from pytouhou.utils.helpers import get_logger
+
+logger = get_logger(__name__)
+
+
+_runner = None
+
+
+def find_replays(directory):
+    """Return the path of every replay under directory, biggest first, so
+    that the longest jobs don’t end up alone at the end."""
+    paths = [os.path.join(root, name)
+             for root, _, names in os.walk(directory)
+             for name in names
+             if name.lower().endswith('.rpy')]
+    return sorted(paths, key=lambda path: (-os.path.getsize(path), path))
+
+
+
+class ReplayReport:
+    def __init__(self, path):
+        self.path = path
+        self.status = None
+        self.error = None
+        self.expected_score = 0
+        self.score = 0
+        self.frames = 0
+        self.deaths = 0
+        self.time = 0.
+
+
+    @property
+    def mismatch(self):
+        return self.score - self.expected_score
+
+
+    @property
+    def ok(self):
+        return self.error is None and self.mismatch == 0
+
+
+    def __str__(self):
+        if self.error is not None:
+            return '%s: ERROR %s' % (self.path, self.error)
+        return ('%s: %s, score %d, expected %d (%+d), %d frames, %d deaths, '
+                '%s, %.3fs' % (self.path, 'OK' if self.ok else 'MISMATCH',
+                               self.score, self.expected_score, self.mismatch,
+                               self.frames, self.deaths, self.status,
+                               self.time))
+
+
+
+def init_worker(game_dir, data, game, interface):
+    global _runner
+    resource_loader = CachedLoader(game_dir)
+    resource_loader.scan_archives(data)
+    _runner = HeadlessRunner(resource_loader, game, interface)
+
+
+def verify_replay(path):
+    """Simulate a single replay, in a worker set up by init_worker()."""
+    report = ReplayReport(path)
+    start_time = perf_counter()
+    try:
+        with open(path, 'rb') as file:
+            replay = T6RP.read(file)
+        report.expected_score = replay.score
+
+        simulation = _runner.play_replay(replay)
+        report.status = simulation.status
+        report.frames = simulation.frames
+        report.score = simulation.score
+        report.deaths = simulation.players[0].miss
+    except Exception as error:
+        logger.debug('Replay %s failed.', path, exc_info=True)
+        report.error = '%s: %s' % (type(error).__name__, error)
+    report.time = perf_counter() - start_time
+    return report
+
+
+def verify_replays(paths, game_dir, data, game='eosd', interface=None,
+                   jobs=None):
+    """Verify every replay in paths with a pool of jobs processes, by
+    default one per core, and yield their reports as they finish."""
+    with ProcessPoolExecutor(jobs, initializer=init_worker,
+                             initargs=(game_dir, data, game, interface)) as pool:
+        futures = [pool.submit(verify_replay, path) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,19 @@
+from pytouhou.game.sprite cimport Sprite
+from pytouhou.formats.animation cimport Animation
+
+
+cdef class ANMRunner:
+    cdef public Animation _anm
+    cdef public Sprite _sprite
+    cdef public bint running, waiting
+    cdef public long sprite_index_offset, instruction_pointer, frame, version
+    cdef public long timeout
+    cdef public object script
+    cdef public list variables
+    cdef list instructions
+
+    cpdef bint interrupt(self, long interrupt) except -1
+    cpdef bint run_frame(self) except -1
+    cpdef bint is_idle(self) except -1
+    cdef bint _setval(self, variable_id, value) except True
+    cdef object _getval(self, value)
@@ -14,30 +14,59 @@
 
 
 from random import randrange, random
+from copyreg import __newobj__
 
 from pytouhou.utils.helpers import get_logger
-from pytouhou.vm.common import MetaRegistry, instruction
+from pytouhou.utils import formulas
+from pytouhou.vm.common import register, instruction
 
 logger = get_logger(__name__)
 
 
-class ANMRunner(metaclass=MetaRegistry):
-    __slots__ = ('_anm', '_sprite', 'running', 'sprite_index_offset', 'script',
-                 'instruction_pointer', 'frame', 'waiting', 'handlers',
-                 'variables', 'version', 'timeout')
+cdef dict _compiled = {}
+
+cdef list get_instructions(script, long version):
+    """Return the instructions of a script as (frame, handler, args), the
+    handler being None for unhandled opcodes, which are only logged once."""
+    try:
+        return _compiled[id(script)][1]
+    except KeyError:
+        pass
+
+    dispatch = ANMRunner._dispatch[{0: 6, 2: 7}[version]]
+    instructions = []
+    for frame, opcode, args in script:
+        handler = dispatch[opcode] if opcode < len(dispatch) else None
+        if handler is None:
+            logger.debug('unhandled opcode %d (args: %r)', opcode, args)
+        instructions.append((frame, handler, args))
+
+    # Keeping the script alive prevents its id from being reused.
+    _compiled[id(script)] = script, instructions
+    return instructions
+
+
+
+cdef class ANMRunner:
+    _handlers = {}
+    _dispatch = {}
 
     #TODO: check!
     formulae = {0: None,
-                1: lambda x: x ** 2,
-                2: lambda x: x ** 3,
-                3: lambda x: x ** 4,
-                4: lambda x: 2 * x - x ** 2,
-                5: lambda x: 2 * x - x ** 3,
-                6: lambda x: 2 * x - x ** 4,
+                1: formulas.accelerate,
+                2: formulas.accelerate3,
+                3: formulas.accelerate4,
+                4: formulas.decelerate,
+                5: formulas.decelerate3,
+                6: formulas.decelerate4,
                 7: None,
                 255: None} #XXX
 
     def __init__(self, anm, script_id, sprite, sprite_index_offset=0):
+        self.reset(anm, script_id, sprite, sprite_index_offset)
+
+
+    def reset(self, anm, script_id, sprite, sprite_index_offset=0):
         self._anm = anm
         self._sprite = sprite
         self.running = True
@@ -45,7 +74,7 @@ class ANMRunner(metaclass=MetaRegistry):
 
         self.script = anm.scripts[script_id]
         self.version = anm.version
-        self.handlers = self._handlers[{0: 6, 2: 7}[anm.version]]
+        self.instructions = get_instructions(self.script, self.version)
         self.frame = 0
         self.timeout = -1
         self.instruction_pointer = 0
@@ -58,7 +87,25 @@ class ANMRunner(metaclass=MetaRegistry):
         self.sprite_index_offset = 0
 
 
-    def interrupt(self, interrupt):
+    def __getstate__(self):
+        # A plain tuple is a lot smaller than a dict of attributes.
+        return (self._anm, self._sprite, self.running, self.sprite_index_offset,
+                self.script, self.instruction_pointer, self.frame, self.waiting,
+                self.variables, self.version, self.timeout)
+
+
+    def __setstate__(self, tuple state):
+        (self._anm, self._sprite, self.running, self.sprite_index_offset,
+         self.script, self.instruction_pointer, self.frame, self.waiting,
+         self.variables, self.version, self.timeout) = state
+        self.instructions = get_instructions(self.script, self.version)
+
+
+    def __reduce__(self):
+        return __newobj__, (ANMRunner,), self.__getstate__()
+
+
+    cpdef bint interrupt(self, long interrupt) except -1:
         new_ip = self.script.interrupts.get(interrupt, None)
         if new_ip is None:
             new_ip = self.script.interrupts.get(-1, None)
@@ -71,27 +118,24 @@ class ANMRunner(metaclass=MetaRegistry):
         return True
 
 
-    def run_frame(self):
+    cpdef bint run_frame(self) except -1:
+        cdef long frame
+        cdef tuple args
+
         if not self.running:
             return False
 
         while self.running and not self.waiting:
-            frame, opcode, args = self.script[self.instruction_pointer]
+            frame, callback, args = <tuple>self.instructions[self.instruction_pointer]
 
             if frame > self.frame:
                 break
             else:
                 self.instruction_pointer += 1
 
-            if frame == self.frame:
-                try:
-                    callback = self.handlers[opcode]
-                except KeyError:
-                    logger.debug('[%d - %04d] unhandled opcode %d (args: %r)',
-                                 id(self), self.frame, opcode, args)
-                else:
-                    callback(self, *args)
-                    self._sprite.changed = True
+            if frame == self.frame and callback is not None:
+                callback(self, *args)
+                self._sprite.changed = True
 
         if not self.waiting:
             self.frame += 1
@@ -103,13 +147,27 @@ class ANMRunner(metaclass=MetaRegistry):
         return self.running
 
 
-    def _setval(self, variable_id, value):
+    cpdef bint is_idle(self) except -1:
+        """Return whether nothing but an interrupt will change the sprite
+        anymore, except for its frame."""
+        cdef Sprite sprite = self._sprite
+
+        if self.running and not (self.waiting and self.timeout < sprite.frame):
+            return False
+        return not (sprite._rotations_speed_3d[0] or sprite._rotations_speed_3d[1] or
+                    sprite._rotations_speed_3d[2] or sprite._scale_speed[0] or
+                    sprite._scale_speed[1] or sprite.rotation_interpolator or
+                    sprite.fade_interpolator or sprite.scale_interpolator or
+                    sprite.offset_interpolator or sprite.color_interpolator)
+
+
+    cdef bint _setval(self, variable_id, value) except True:
         if self.version == 2:
             if 10000 <= variable_id <= 10011:
                 self.variables[int(variable_id-10000)] = value
 
 
-    def _getval(self, value):
+    cdef object _getval(self, value):
         if self.version == 2:
             if 10000 <= value <= 10011:
                 return self.variables[int(value-10000)]
@@ -125,7 +183,7 @@ class ANMRunner(metaclass=MetaRegistry):
 
     @instruction(1)
     @instruction(3, 7)
-    def load_sprite(self, sprite_index):
+    def load_sprite(self, long sprite_index):
         #TODO: version 2 only: do not crash when assigning a non-existant sprite.
         self._sprite.anm, self._sprite.texcoords = self._anm, self._anm.sprites[sprite_index + self.sprite_index_offset]
 
@@ -138,7 +196,7 @@ class ANMRunner(metaclass=MetaRegistry):
 
     @instruction(3)
     @instruction(8, 7)
-    def set_alpha(self, alpha):
+    def set_alpha(self, long alpha):
         self._sprite.alpha = alpha % 256 #TODO
 
 
@@ -182,7 +240,7 @@ class ANMRunner(metaclass=MetaRegistry):
 
     @instruction(12)
     @instruction(15, 7)
-    def fade(self, new_alpha, duration):
+    def fade(self, long new_alpha, long duration):
         self._sprite.fade(duration, new_alpha)
 
 
@@ -209,26 +267,26 @@ class ANMRunner(metaclass=MetaRegistry):
 
     @instruction(17)
     @instruction(6, 7)
-    def move(self, x, y, z):
+    def move(self, double x, double y, double z):
         self._sprite.dest_offset = (x, y, z)
 
 
     @instruction(18)
     @instruction(17, 7)
-    def move_in_linear(self, x, y, z, duration):
+    def move_in_linear(self, double x, double y, double z, long duration):
         self._sprite.move_in(duration, x, y, z)
 
 
     @instruction(19)
     @instruction(18, 7)
-    def move_in_decel(self, x, y, z, duration):
-        self._sprite.move_in(duration, x, y, z, lambda x: 2. * x - x ** 2)
+    def move_in_decel(self, double x, double y, double z, long duration):
+        self._sprite.move_in(duration, x, y, z, formulas.decelerate)
 
 
     @instruction(20)
     @instruction(19, 7)
-    def move_in_accel(self, x, y, z, duration):
-        self._sprite.move_in(duration, x, y, z, lambda x: x ** 2)
+    def move_in_accel(self, double x, double y, double z, long duration):
+        self._sprite.move_in(duration, x, y, z, formulas.accelerate)
 
 
     @instruction(21)
@@ -291,7 +349,7 @@ class ANMRunner(metaclass=MetaRegistry):
 
     @instruction(29)
     @instruction(28, 7)
-    def set_visible(self, visible):
+    def set_visible(self, long visible):
         self._sprite.visible = bool(visible & 1)
 
 
@@ -407,3 +465,6 @@ class ANMRunner(metaclass=MetaRegistry):
     def wait_duration(self, duration):
         self.timeout = self._sprite.frame + duration
         self.waiting = True
+
+
+register(ANMRunner)
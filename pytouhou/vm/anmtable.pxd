@@ -0,0 +1,21 @@
+from pytouhou.game.sprite cimport Sprite, SpriteState
+from pytouhou.vm.anmrunner cimport ANMRunner
+
+
+cdef class ANMTable:
+    cdef object anm_ref
+    cdef readonly long script, sprite_index_offset
+    cdef readonly long length, loop, end
+    cdef SpriteState *states
+    cdef unsigned char *flags
+    cdef long size
+
+    cdef bint record(self, Sprite sprite) except True
+    cdef long get_row(self, long frame) nogil
+    cdef bint covers(self, long frame) nogil
+    cdef bint apply(self, Sprite sprite, long frame) except -1
+    cdef ANMRunner replay(self, Sprite sprite, long frame)
+
+
+cpdef bint is_static(script, long version) except -1
+cpdef ANMTable get_table(anm, long script, long sprite_index_offset=*)
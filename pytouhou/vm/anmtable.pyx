@@ -0,0 +1,218 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+"""Precomputed frames of static ANM scripts.
+
+Without randomness, nothing but its age changes the sprite an uninterrupted
+script runs on, so the script is run once, when it is first needed, and the
+state of its sprite is kept for every frame until it ends, or until it goes
+back to a state it already was in, which gives its loop.  Animations then
+look their current frame up instead of interpreting the script.
+"""
+
+from libc.stdlib cimport realloc, free
+
+from weakref import ref, WeakKeyDictionary
+
+
+# Longest table without an end nor a loop, the animations going on for longer
+# get a runner of their own.
+cdef long MAX_FRAMES = 1024
+
+# Opcodes using the random module, per ANM version.
+RANDOM_OPCODES = {0: (16,), 2: (59, 60)}
+
+cdef enum:
+    CHANGED = 1
+    LOADED = 2
+
+
+cdef tuple get_key(ANMRunner anmrunner, Sprite sprite):
+    """Return everything the next frames of anmrunner depend on, or None
+    while an interpolation is going on."""
+    cdef SpriteState state
+
+    if (sprite.scale_interpolator or sprite.fade_interpolator or
+            sprite.offset_interpolator or sprite.rotation_interpolator or
+            sprite.color_interpolator):
+        return None
+
+    # Only a timeout still to come matters, relatively to the sprite.
+    timeout = anmrunner.timeout - sprite.frame
+    if not anmrunner.waiting or timeout < 0:
+        timeout = -1
+
+    sprite.get_state(&state)
+    state.frame = 0
+    return ((<char*>&state)[:sizeof(SpriteState)], sprite.anm is not None,
+            anmrunner.instruction_pointer, anmrunner.frame, anmrunner.waiting,
+            timeout, tuple(anmrunner.variables))
+
+
+
+cdef class ANMTable:
+    """State of the sprite of a script at every frame, from a given sprite
+    offset.
+
+    Frames past the end of the table are those of its loop, from loop to
+    length, if there is one.  Otherwise end is the frame at which the script
+    stopped, or -1 if it still was running after MAX_FRAMES frames.
+    """
+
+    def __init__(self, anm, long script, long sprite_index_offset=0):
+        cdef Sprite sprite
+        cdef ANMRunner anmrunner
+        cdef dict seen = {}
+
+        # The cache of tables is keyed by their anm, which a strong reference
+        # would keep alive forever.
+        self.anm_ref = ref(anm)
+        self.script = script
+        self.sprite_index_offset = sprite_index_offset
+        self.loop = self.end = -1
+
+        sprite = Sprite()
+        anmrunner = ANMRunner(anm, script, sprite, sprite_index_offset)
+        self.record(sprite)
+        while True:
+            if not anmrunner.running:
+                self.end = self.length - 1
+                break
+            key = get_key(anmrunner, sprite)
+            if key is not None:
+                # The frames following a state only depend on it, so they
+                # are the same as those which followed its first occurrence.
+                first = seen.setdefault(key, self.length - 1)
+                if first != self.length - 1:
+                    self.loop = first + 1
+                    break
+            if self.length >= MAX_FRAMES:
+                break
+            sprite.changed = False
+            anmrunner.run_frame()
+            self.record(sprite)
+
+
+    def __dealloc__(self):
+        free(self.states)
+        free(self.flags)
+
+
+    property anm:
+        def __get__(self):
+            return self.anm_ref()
+
+
+    def __reduce__(self):
+        return get_table, (self.anm, self.script, self.sprite_index_offset)
+
+
+    cdef bint record(self, Sprite sprite) except True:
+        cdef long i = self.length
+
+        if i >= self.size:
+            self.size = max(2 * self.size, 16)
+            states = <SpriteState*>realloc(self.states, self.size * sizeof(SpriteState))
+            if states is NULL:
+                raise MemoryError
+            self.states = states
+            flags = <unsigned char*>realloc(self.flags, self.size * sizeof(unsigned char))
+            if flags is NULL:
+                raise MemoryError
+            self.flags = flags
+        sprite.get_state(&self.states[i])
+        self.flags[i] = ((CHANGED if sprite.changed else 0) |
+                         (LOADED if sprite.anm is not None else 0))
+        self.length = i + 1
+
+
+    cdef long get_row(self, long frame) nogil:
+        if frame < self.length or self.loop < 0:
+            return min(frame, self.length - 1)
+        return self.loop + (frame - self.loop) % (self.length - self.loop)
+
+
+    cdef bint covers(self, long frame) nogil:
+        return frame < self.length or self.loop >= 0 or self.end >= 0
+
+
+    cdef bint apply(self, Sprite sprite, long frame) except -1:
+        """Bring sprite to its state at frame, except for its angle, and
+        return whether the script is still running, like
+        ANMRunner.run_frame().
+
+        Only the frames where the state changed are copied, the sprite has to
+        go through every frame in turn.
+        """
+        cdef long row
+        cdef float angle
+
+        if 0 <= self.end < frame:
+            return False
+        row = self.get_row(frame)
+        if self.flags[row] & CHANGED:
+            angle = sprite.angle
+            sprite.set_state(&self.states[row])
+            sprite.angle = angle
+            sprite.anm = self.anm_ref() if self.flags[row] & LOADED else None
+        sprite.frame = self.states[row].frame + (frame - row)
+        return frame != self.end
+
+
+    cdef ANMRunner replay(self, Sprite sprite, long frame):
+        """Return a runner of this script on a new sprite, brought to frame,
+        for animations going on past the end of the table."""
+        cdef ANMRunner anmrunner
+
+        anmrunner = ANMRunner(self.anm_ref(), self.script, sprite, self.sprite_index_offset)
+        for _ in range(frame):
+            anmrunner.run_frame()
+        return anmrunner
+
+
+
+cpdef bint is_static(script, long version) except -1:
+    """Return whether a script only depends on its age, as long as it isn’t
+    interrupted."""
+    random_opcodes = RANDOM_OPCODES.get(version, ())
+    for frame, opcode, args in script:
+        if opcode in random_opcodes:
+            return False
+    return True
+
+
+# Tables of every anm, which go away with it when the loader drops it.
+cdef object tables = WeakKeyDictionary()
+
+cpdef ANMTable get_table(anm, long script, long sprite_index_offset=0):
+    """Return the table of this script, computed on first use, or None if it
+    isn’t static."""
+    cdef dict anm_tables
+
+    key = script, sprite_index_offset
+    try:
+        anm_tables = tables[anm]
+    except KeyError:
+        anm_tables = tables[anm] = {}
+    try:
+        return anm_tables[key]
+    except KeyError:
+        pass
+
+    if is_static(anm.scripts[script], anm.version):
+        table = ANMTable(anm, script, sprite_index_offset)
+    else:
+        table = None
+    anm_tables[key] = table
+    return table
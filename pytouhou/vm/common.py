@@ -13,15 +13,42 @@
 ##
 
 
+def get_handlers(items):
+    """Return the handlers found among items, by version and opcode."""
+    instruction_handlers = {}
+    for item in items:
+        if hasattr(item, '_instruction_ids'):
+            for version, instruction_ids in item._instruction_ids.items():
+                for id_ in instruction_ids:
+                    instruction_handlers.setdefault(version, {})[id_] = item
+    return instruction_handlers
+
+
+def get_dispatch_tables(instruction_handlers):
+    """Return, for every version, a list of its handlers indexed by opcode,
+    with None for the opcodes not handled."""
+    tables = {}
+    for version, handlers in instruction_handlers.items():
+        table = [None] * (max(handlers) + 1)
+        for id_, handler in handlers.items():
+            table[id_] = handler
+        tables[version] = table
+    return tables
+
+
+def register(cls):
+    """Fill the _handlers and _dispatch of a cdef class, which can’t have a
+    metaclass, but can have those dicts created empty in its body."""
+    cls._handlers.update(get_handlers(cls.__dict__.values()))
+    cls._dispatch.update(get_dispatch_tables(cls._handlers))
+
+
+
 class MetaRegistry(type):
     def __new__(mcs, name, bases, classdict):
-        instruction_handlers = {}
-        for item in classdict.values():
-            if hasattr(item, '_instruction_ids'):
-                for version, instruction_ids in item._instruction_ids.items():
-                    for id_ in instruction_ids:
-                        instruction_handlers.setdefault(version, {})[id_] = item
+        instruction_handlers = get_handlers(classdict.values())
         classdict['_handlers'] = instruction_handlers
+        classdict['_dispatch'] = get_dispatch_tables(instruction_handlers)
         return type.__new__(mcs, name, bases, classdict)
 
 
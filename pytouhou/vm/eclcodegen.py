@@ -0,0 +1,322 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+"""Generation of Python code from ECL subs.
+
+Every sub becomes a function running it from the runner’s instruction
+pointer, one frame at a time, like ECLRunner.run_iteration() does.  The
+instructions are laid out in order, each one behind a test of the
+instruction pointer, so that the function can resume anywhere: it falls
+from one instruction to the next without any dispatch, and jumps by setting
+the instruction pointer and restarting from the top.
+
+Variables, arithmetic, comparisons and jumps are written inline.  Every
+other instruction calls its handler, as compiled by
+pytouhou.vm.eclrunner.compile_subs(), and the function returns to the
+runner whenever that handler changed its flow.
+
+The generated modules are cached on disk, keyed by a hash of the subs and of
+the rank, which decides which instructions are there.
+"""
+
+import os
+from hashlib import sha1
+from importlib.util import spec_from_file_location, module_from_spec
+from math import isfinite
+from types import ModuleType
+from weakref import WeakValueDictionary
+
+from pytouhou.utils.helpers import get_logger
+from pytouhou.utils.xdg import save_cache_path
+from pytouhou.vm.eclrunner import (ECLMainRunner, ECLRunner, Variable,
+                                   compile_subs, compile_operand)
+
+logger = get_logger(__name__)
+
+
+GENERATOR_VERSION = 2
+
+GAME_EXPRESSIONS = {-10013: 'game.rank',
+                    -10014: 'game.difficulty',
+                    -10015: 'enemy.x',
+                    -10016: 'enemy.y',
+                    -10017: 'enemy.z',
+                    -10018: 'enemy.select_player().x',
+                    -10019: 'enemy.select_player().y',
+                    -10021: 'enemy.get_angle(enemy.select_player())',
+                    -10022: 'enemy.frame',
+                    -10024: 'enemy.life',
+                    -10025: 'enemy.select_player().character'}
+
+GAME_TARGETS = (-10015, -10016, -10017, -10022, -10024)
+
+OPERATORS = {13: '+', 14: '-', 15: '*', 16: '//', 17: '%', 20: '+', 21: '-',
+             23: '/'}
+
+CONDITIONS = {29: '== -1', 30: '!= 1', 31: '== 0', 32: '== 1', 33: '!= -1',
+              34: '!= 0'}
+
+
+def expression(operand):
+    """Return the Python expression of an operand, or None if it can’t be
+    written inline."""
+    if isinstance(operand, Variable):
+        if -10012 <= operand <= -10001:
+            return 'variables[%d]' % int(-10001-operand)
+        return GAME_EXPRESSIONS.get(operand)
+    if type(operand) is int or (type(operand) is float and isfinite(operand)):
+        return repr(operand)
+    return None
+
+
+def target(operand):
+    """Return the Python expression to assign to the variable an operand
+    names, or None if it can’t be written inline."""
+    if not isinstance(operand, Variable):
+        return None
+    if -10012 <= operand <= -10001 or operand in GAME_TARGETS:
+        return expression(operand)
+    return None
+
+
+def jump(frame, instruction_pointer):
+    if type(frame) is not int or type(instruction_pointer) is not int:
+        return None
+    return ['frame = runner.frame = %d' % frame,
+            'ip = %d' % instruction_pointer,
+            'continue']
+
+
+def inline(instr_type, args):
+    """Return the lines executing an instruction inline, or None if its
+    handler has to be called."""
+    args = tuple(compile_operand(arg) for arg in args)
+    if instr_type == 0:
+        return ['pass']
+    if instr_type == 2:
+        return jump(*args)
+    if instr_type == 3:
+        frame, instruction_pointer, variable_id = args
+        lines = jump(frame, instruction_pointer)
+        value, variable = expression(variable_id), target(variable_id)
+        if lines is None or value is None or variable is None:
+            return None
+        return (['counter_value = %s - 1' % value,
+                 'if counter_value > 0:',
+                 '    %s = counter_value' % variable] +
+                ['    ' + line for line in lines])
+    if instr_type in (4, 5):
+        variable, value = target(args[0]), expression(args[1])
+        if variable is None or value is None:
+            return None
+        return ['%s = %s' % (variable, value)]
+    if instr_type in OPERATORS:
+        variable, a, b = target(args[0]), expression(args[1]), expression(args[2])
+        if variable is None or a is None or b is None:
+            return None
+        return ['%s = %s %s %s' % (variable, a, OPERATORS[instr_type], b)]
+    if instr_type == 18:
+        variable, value = target(args[0]), expression(args[0])
+        if variable is None or value is None:
+            return None
+        return ['%s = %s + 1' % (variable, value)]
+    if instr_type in (27, 28):
+        a, b = expression(args[0]), expression(args[1])
+        if a is None or b is None:
+            return None
+        return ['a, b = %s, %s' % (a, b),
+                'if a < b:',
+                '    runner.comparison_reg = -1',
+                'elif a == b:',
+                '    runner.comparison_reg = 0',
+                'else:',
+                '    runner.comparison_reg = 1']
+    if instr_type in CONDITIONS:
+        lines = jump(*args)
+        if lines is None:
+            return None
+        return (['if runner.comparison_reg %s:' % CONDITIONS[instr_type]] +
+                ['    ' + line for line in lines])
+    return None
+
+
+def generate_sub(number, sub, rank):
+    rank_mask = 0x100 << rank
+    lines = ['def sub_%d(runner):' % number,
+             '    enemy, game = runner._enemy, runner._game',
+             '    variables = runner.variables',
+             '    frame = runner.frame',
+             '    ip = runner.instruction_pointer',
+             '    while True:']
+    for i, (frame, instr_type, instr_rank_mask, param_mask, args) in enumerate(sub):
+        lines += ['        if ip == %d:' % i,
+                  '            if %d > frame:' % frame,
+                  '                runner.instruction_pointer = %d' % i,
+                  '                runner.wake_frame = %d' % frame,
+                  '                return True']
+        if instr_rank_mask & rank_mask:
+            code = inline(instr_type, args)
+            if code is None:
+                # The handler is free to switch to another sub, jump, or
+                # stop the runner, which has to be resumed from there.
+                code = ['runner.instruction_pointer = %d' % (i + 1),
+                        'h%d_%d(runner, *a%d_%d)' % (number, i, number, i),
+                        'if (runner.instruction_pointer != %d or runner.frame != frame'
+                        ' or runner.sub != %d or not runner.running):' % (i + 1, number),
+                        '    return False',
+                        'variables = runner.variables']
+            lines.append('            if frame == %d:' % frame)
+            lines += ['                ' + line for line in code]
+        lines.append('            ip = %d' % (i + 1))
+    lines += ['        runner.instruction_pointer = ip',
+              '        runner.running = False',
+              '        return True']
+    return lines
+
+
+def generate(subs, rank):
+    """Return the source of a module whose SUBS are the functions running
+    every sub at this rank."""
+    lines = ['# Generated by pytouhou.vm.eclcodegen, version %d, for rank %d.'
+             % (GENERATOR_VERSION, rank)]
+    for number, sub in enumerate(subs):
+        lines += ['', ''] + generate_sub(number, sub, rank)
+    lines += ['', '', 'SUBS = [%s]' % ', '.join('sub_%d' % number
+                                                  for number in range(len(subs)))]
+    return '\n'.join(lines) + '\n'
+
+
+def get_key(subs, rank):
+    return sha1(repr((GENERATOR_VERSION, rank, subs)).encode()).hexdigest()
+
+
+def load(subs, rank, cache_dir=None):
+    """Return the module generated from subs at this rank, from the cache if
+    it is there, writing it otherwise.
+
+    The cache is in the XDG cache directory, unless cache_dir is given; the
+    module is only kept in memory if it can’t be written there.
+    """
+    key = get_key(subs, rank)
+    name = 'ecl_%s' % key
+    try:
+        if cache_dir is None:
+            cache_dir = save_cache_path('pytouhou', 'ecl')
+        else:
+            os.makedirs(cache_dir, exist_ok=True)
+        path = os.path.join(cache_dir, name + '.py')
+        if not os.path.exists(path):
+            temporary = '%s.%d' % (path, os.getpid())
+            with open(temporary, 'w') as file:
+                file.write(generate(subs, rank))
+            os.replace(temporary, path)
+            logger.info('Generated %s for %d subs.', path, len(subs))
+    except OSError:
+        logger.warning('Can’t write into the ECL cache, generating %s in memory.', name)
+        module = ModuleType(name)
+        exec(compile(generate(subs, rank), '<%s>' % name, 'exec'), module.__dict__)
+        return module
+
+    spec = spec_from_file_location(name, path)
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+
+class GeneratedECLRunner(ECLRunner):
+    """ECLRunner whose subs are generated functions."""
+
+    __slots__ = ()
+
+    def run_iteration(self):
+        if self.frame < self.wake_frame:
+            self.frame += 1
+            return
+
+        subs = self._subs
+        while self.running:
+            try:
+                run_sub = subs[self.sub]
+            except IndexError:
+                self.running = False
+                break
+
+            if run_sub(self):
+                break
+
+        self.frame += 1
+
+
+
+class GeneratedSubs(list):
+    """Functions generated from the subs of an ECL, at a given rank, with
+    the handlers they call bound to those of their CompiledSubs."""
+
+    runner_class = GeneratedECLRunner
+
+    def __init__(self, subs, rank, cache_dir=None):
+        list.__init__(self)
+        self.subs = subs
+        self.rank = rank
+        self.cache_dir = cache_dir
+
+        module = load(subs, rank, cache_dir)
+        namespace = module.__dict__
+        for number, instructions in enumerate(compile_subs(subs, rank)):
+            for i, (frame, handler, args) in enumerate(instructions):
+                namespace['h%d_%d' % (number, i)] = handler
+                namespace['a%d_%d' % (number, i)] = args
+        self.extend(module.SUBS)
+
+
+    def __reduce__(self):
+        # Not the cache directory, snapshots only loading generated code
+        # from the default one.
+        return get_generated_subs, (self.subs, self.rank)
+
+
+_generated = WeakValueDictionary()
+
+def get_generated_subs(subs, rank, cache_dir=None):
+    """Return the GeneratedSubs of subs at this rank, which are shared by
+    every runner using them."""
+    key = id(subs), rank
+    try:
+        return _generated[key]
+    except KeyError:
+        return _generated.setdefault(key, GeneratedSubs(subs, rank, cache_dir))
+
+
+def use_generated_code(game, cache_dir=None):
+    """Make every ECLMainRunner of a game, and the enemies they pop from then
+    on, run generated code."""
+    for runner in game.ecl_runners:
+        if isinstance(runner, ECLMainRunner):
+            runner._subs = get_generated_subs(runner._subs.subs, game.rank, cache_dir)
+
+
+def vm_state(game):
+    """Return the state of the ECL runners of a game, for comparing it with
+    another one running the same stage with another backend."""
+    return ([(runner.frame, runner.wake_frame, runner.instruction_pointer,
+              runner.boss_wait)
+             for runner in game.ecl_runners
+             if isinstance(runner, ECLMainRunner)],
+            [(enemy.process.sub, enemy.process.frame, enemy.process.wake_frame,
+              enemy.process.instruction_pointer, enemy.process.running,
+              enemy.process.comparison_reg, enemy.process.variables,
+              enemy.process.stack)
+             for enemy in game.enemies
+             if isinstance(enemy.process, ECLRunner)])
@@ -0,0 +1,10 @@
+cdef class ECLRunner:
+    cdef public object _subs
+    cdef public object _enemy, _game, _pop_enemy
+    cdef public list variables, stack
+    cdef public long sub, frame, wake_frame, instruction_pointer
+    cdef public long comparison_reg
+    cdef public bint running
+
+    cdef object _getval(self, value)
+    cdef bint _setval(self, variable_id, value) except True
@@ -14,25 +14,415 @@
 
 
 from math import atan2, cos, sin, pi, hypot
+from operator import add, sub, mul, floordiv, mod, truediv
+from weakref import WeakValueDictionary
+from copyreg import __newobj__
 
 from pytouhou.utils.helpers import get_logger
+from pytouhou.utils import formulas
+from pytouhou.game.enemy cimport Enemy
 
-from pytouhou.vm.common import MetaRegistry, instruction
+from pytouhou.vm.common import MetaRegistry, register, instruction
 
 logger = get_logger(__name__)
 
 
+def _set_enemy_attribute(name):
+    def write(runner, value):
+        setattr(runner._enemy, name, value)
+    return write
+
+
+# Variables besides the twelve local ones, as (read, write) accessors taking
+# the runner.
+GAME_VARIABLES = {-10013: (lambda runner: runner._game.rank, None),
+                  -10014: (lambda runner: runner._game.difficulty, None),
+                  -10015: (lambda runner: runner._enemy.x, _set_enemy_attribute('x')),
+                  -10016: (lambda runner: runner._enemy.y, _set_enemy_attribute('y')),
+                  -10017: (lambda runner: runner._enemy.z, _set_enemy_attribute('z')),
+                  -10018: (lambda runner: runner._enemy.select_player().x, None),
+                  -10019: (lambda runner: runner._enemy.select_player().y, None),
+                  -10021: (lambda runner: runner._enemy.get_angle(runner._enemy.select_player()), None),
+                  -10022: (lambda runner: runner._enemy.frame, _set_enemy_attribute('frame')),
+                  -10024: (lambda runner: runner._enemy.life, _set_enemy_attribute('life')),
+                  -10025: (lambda runner: runner._enemy.select_player().character, None)} #TODO
+
+
+
+class Variable:
+    """Operand of a compiled instruction naming a variable.
+
+    It keeps the number it was compiled from, for the handlers which use it
+    as is, and gets pickled back as that number.
+    """
+
+    def __reduce__(self):
+        number_type = type(self).__bases__[-1]
+        return number_type, (number_type(self),)
+
+
+
+class IntVariable(Variable, int):
+    pass
+
+
+
+class FloatVariable(Variable, float):
+    pass
+
+
+
+def _read_unknown(variable_id):
+    def read(runner):
+        raise NotImplementedError(variable_id) #TODO
+    return read
+
+
+def _read_local(index):
+    return lambda runner: runner.variables[index]
+
+
+def _write_local(index):
+    def write(runner, value):
+        runner.variables[index] = value
+    return write
+
+
+def _write_read_only(runner, value):
+    raise IndexError #TODO: proper exception
+
+
+_variables = {}
+
+def compile_operand(value):
+    """Return value, or the Variable it names."""
+    if type(value) not in (int, float):
+        return value
+    key = type(value), value
+    try:
+        return _variables[key]
+    except KeyError:
+        pass
+
+    if -10012 <= value <= -10001:
+        index = int(-10001-value)
+        read, write = _read_local(index), _write_local(index)
+    elif -10025 <= value <= -10013:
+        read, write = GAME_VARIABLES.get(value, (_read_unknown(value), None))
+    else:
+        return value
+
+    variable = (IntVariable if type(value) is int else FloatVariable)(value)
+    variable.read, variable.write = read, write or _write_read_only
+    _variables[key] = variable
+    return variable
+
+
+
+def _reader(operand):
+    if isinstance(operand, Variable):
+        return operand.read
+    return lambda runner: operand
+
+
+def _specialize_set_variable(variable_id, value):
+    if not isinstance(variable_id, Variable):
+        return None
+    write = variable_id.write
+    if not isinstance(value, Variable):
+        return lambda runner: write(runner, value)
+    read = value.read
+    return lambda runner: write(runner, read(runner))
+
+
+def _specialize_operation(operation):
+    def specialize(variable_id, a, b):
+        if not isinstance(variable_id, Variable):
+            return None
+        write = variable_id.write
+        # Constant operands are bound as they are, only variables get read.
+        if isinstance(a, Variable) and isinstance(b, Variable):
+            read_a, read_b = a.read, b.read
+            return lambda runner: write(runner, operation(read_a(runner), read_b(runner)))
+        elif isinstance(a, Variable):
+            read_a = a.read
+            return lambda runner: write(runner, operation(read_a(runner), b))
+        elif isinstance(b, Variable):
+            read_b = b.read
+            return lambda runner: write(runner, operation(a, read_b(runner)))
+        return lambda runner: write(runner, operation(a, b))
+    return specialize
+
+
+def _specialize_increment(variable_id):
+    if not isinstance(variable_id, Variable):
+        return None
+    write, read = variable_id.write, variable_id.read
+    return lambda runner: write(runner, read(runner) + 1)
+
+
+def _specialize_compare(a, b):
+    read_a, read_b = _reader(a), _reader(b)
+    def compare(runner):
+        a, b = read_a(runner), read_b(runner)
+        if a < b:
+            runner.comparison_reg = -1
+        elif a == b:
+            runner.comparison_reg = 0
+        else:
+            runner.comparison_reg = 1
+    return compare
+
+
+def _specialize_relative_jump_ex(frame, instruction_pointer, variable_id):
+    if not isinstance(variable_id, Variable):
+        return None
+    write, read = variable_id.write, variable_id.read
+    def relative_jump_ex(runner):
+        counter_value = read(runner) - 1
+        if counter_value > 0:
+            write(runner, counter_value)
+            runner.frame, runner.instruction_pointer = frame, instruction_pointer
+    return relative_jump_ex
+
+
+def _specialize_get_direction(variable_id, x1, y1, x2, y2):
+    if not isinstance(variable_id, Variable):
+        return None
+    write = variable_id.write
+    def get_direction(ECLRunner runner):
+        write(runner, atan2(runner._getval(y2) - runner._getval(y1),
+                            runner._getval(x2) - runner._getval(x1)))
+    return get_direction
+
+
+def _specialize_float_to_unit_circle(variable_id):
+    if not isinstance(variable_id, Variable):
+        return None
+    write, read = variable_id.write, variable_id.read
+    return lambda runner: write(runner, (read(runner) + pi) % (2*pi) - pi)
+
+
+# The handlers acting on the enemy call its methods and set its attributes
+# directly, instead of going through Python attribute lookups.
+
+def _specialize_set_pos(x, y, z):
+    def set_pos(ECLRunner runner):
+        cdef Enemy enemy = runner._enemy
+        enemy.set_pos(runner._getval(x), runner._getval(y), runner._getval(z))
+    return set_pos
+
+
+def _specialize_set_angle_speed(angle, speed):
+    def set_angle_speed(ECLRunner runner):
+        cdef Enemy enemy = runner._enemy
+        enemy.update_mode = 0
+        enemy.angle, enemy.speed = runner._getval(angle), runner._getval(speed)
+    return set_angle_speed
+
+
+def _specialize_set_rotation_speed(speed):
+    def set_rotation_speed(ECLRunner runner):
+        cdef Enemy enemy = runner._enemy
+        enemy.update_mode = 0
+        enemy.rotation_speed = runner._getval(speed)
+    return set_rotation_speed
+
+
+def _specialize_set_speed(speed):
+    def set_speed(ECLRunner runner):
+        cdef Enemy enemy = runner._enemy
+        enemy.update_mode = 0
+        enemy.speed = runner._getval(speed)
+    return set_speed
+
+
+def _specialize_set_acceleration(acceleration):
+    def set_acceleration(ECLRunner runner):
+        cdef Enemy enemy = runner._enemy
+        enemy.update_mode = 0
+        enemy.acceleration = runner._getval(acceleration)
+    return set_acceleration
+
+
+def _specialize_move_to(formula):
+    def specialize(duration, x, y, z):
+        def move_to(ECLRunner runner):
+            cdef Enemy enemy = runner._enemy
+            enemy.move_to(duration, runner._getval(x), runner._getval(y),
+                          runner._getval(z), formula)
+        return move_to
+    return specialize
+
+
+def _specialize_set_bullet_attributes(opcode):
+    def specialize(anim, sprite_idx_offset, bullets_per_shot, number_of_shots,
+                   speed, speed2, launch_angle, angle, flags):
+        def set_bullet_attributes(ECLRunner runner):
+            cdef Enemy enemy = runner._enemy
+            enemy.set_bullet_attributes(opcode, anim,
+                                        runner._getval(sprite_idx_offset),
+                                        runner._getval(bullets_per_shot),
+                                        runner._getval(number_of_shots),
+                                        runner._getval(speed),
+                                        runner._getval(speed2),
+                                        runner._getval(launch_angle),
+                                        runner._getval(angle),
+                                        flags)
+        return set_bullet_attributes
+    return specialize
+
+
+def _specialize_set_bullet_interval(value):
+    def set_bullet_interval(ECLRunner runner):
+        cdef Enemy enemy = runner._enemy
+        enemy.set_bullet_launch_interval(value)
+    return set_bullet_interval
+
+
+def _specialize_set_bullet_launch_offset(x, y, z):
+    def set_bullet_launch_offset(ECLRunner runner):
+        cdef Enemy enemy = runner._enemy
+        enemy.bullet_launch_offset = (runner._getval(x), runner._getval(y))
+    return set_bullet_launch_offset
+
+
+def _specialize_set_extended_bullet_attributes(*attributes):
+    def set_extended_bullet_attributes(ECLRunner runner):
+        cdef Enemy enemy = runner._enemy
+        enemy.extended_bullet_attributes = tuple([runner._getval(attr) for attr in attributes])
+    return set_extended_bullet_attributes
+
+
+def _specialize_new_laser(variant):
+    def specialize(laser_type, sprite_idx_offset, angle, speed, start_offset,
+                   end_offset, max_length, width, start_duration, duration,
+                   end_duration, grazing_delay, grazing_extra_duration,
+                   unknown):
+        def new_laser(ECLRunner runner):
+            cdef Enemy enemy = runner._enemy
+            enemy.new_laser(variant, laser_type, sprite_idx_offset,
+                            runner._getval(angle), speed, start_offset,
+                            end_offset, max_length, width, start_duration,
+                            duration, end_duration, grazing_delay,
+                            grazing_extra_duration, unknown)
+        return new_laser
+    return specialize
+
+
+# Replacements for the handlers of the most common instructions, taking only
+# the runner, their operands being bound to their accessors.  They return
+# None when the generic handler has to be kept.
+SPECIALIZERS = {3: _specialize_relative_jump_ex,
+                4: _specialize_set_variable,
+                5: _specialize_set_variable,
+                13: _specialize_operation(add),
+                14: _specialize_operation(sub),
+                15: _specialize_operation(mul),
+                16: _specialize_operation(floordiv),
+                17: _specialize_operation(mod),
+                18: _specialize_increment,
+                20: _specialize_operation(add),
+                21: _specialize_operation(sub),
+                23: _specialize_operation(truediv),
+                25: _specialize_get_direction,
+                26: _specialize_float_to_unit_circle,
+                27: _specialize_compare,
+                28: _specialize_compare,
+                43: _specialize_set_pos,
+                45: _specialize_set_angle_speed,
+                46: _specialize_set_rotation_speed,
+                47: _specialize_set_speed,
+                48: _specialize_set_acceleration,
+                56: _specialize_move_to(None),
+                57: _specialize_move_to(formulas.decelerate),
+                59: _specialize_move_to(formulas.accelerate),
+                67: _specialize_set_bullet_attributes(67),
+                68: _specialize_set_bullet_attributes(68),
+                69: _specialize_set_bullet_attributes(69),
+                70: _specialize_set_bullet_attributes(70),
+                71: _specialize_set_bullet_attributes(71),
+                74: _specialize_set_bullet_attributes(74),
+                75: _specialize_set_bullet_attributes(75),
+                76: _specialize_set_bullet_interval,
+                81: _specialize_set_bullet_launch_offset,
+                82: _specialize_set_extended_bullet_attributes,
+                85: _specialize_new_laser(85),
+                86: _specialize_new_laser(86)}
+
+
+
+class CompiledSubs(list):
+    """Subs of an ECL, for a given rank, in the form ECLRunner runs.
+
+    Each instruction becomes a (frame, handler, args) tuple, where the handler
+    is None if the instruction is disabled at this rank, and every operand
+    naming a variable is replaced by a Variable.  The most common instructions
+    get a specialized handler instead, which is given no argument.
+    Instructions stay at the same index, for the jumps to keep pointing at the
+    right place.
+    """
+
+    def __init__(self, subs, rank):
+        list.__init__(self)
+        self.subs = subs
+        self.rank = rank
+        handlers = ECLRunner._handlers[6]
+        rank_mask = 0x100 << rank
+        for sub in subs:
+            instructions = []
+            for frame, instr_type, instr_rank_mask, param_mask, args in sub:
+                if not instr_rank_mask & rank_mask:
+                    instructions.append((frame, None, ()))
+                    continue
+                try:
+                    handler = handlers[instr_type]
+                except KeyError:
+                    handler, args = ECLRunner.unhandled, (instr_type, args)
+                else:
+                    args = tuple(compile_operand(arg) for arg in args)
+                    specialize = SPECIALIZERS.get(instr_type)
+                    specialized = specialize and specialize(*args)
+                    if specialized is not None:
+                        handler, args = specialized, ()
+                instructions.append((frame, handler, args))
+            self.append(instructions)
+
+
+    @property
+    def runner_class(self):
+        return ECLRunner
+
+
+    def __reduce__(self):
+        return compile_subs, (self.subs, self.rank)
+
+
+_compiled = WeakValueDictionary()
+
+def compile_subs(subs, rank):
+    """Return the CompiledSubs of subs at this rank, which are shared by
+    every runner using them."""
+    key = id(subs), rank
+    try:
+        return _compiled[key]
+    except KeyError:
+        # The CompiledSubs keeps subs alive, so its id can’t be reused
+        # while this entry is there.
+        return _compiled.setdefault(key, CompiledSubs(subs, rank))
+
+
 
 class ECLMainRunner(metaclass=MetaRegistry):
-    __slots__ = ('_main', '_subs', '_game', 'frame',
-                 'instruction_pointer', 'boss_wait', 'handlers')
+    __slots__ = ('_main', '_subs', '_game', 'frame', 'wake_frame',
+                 'instruction_pointer', 'boss_wait')
 
     def __init__(self, main, subs, game):
         self._main = main
-        self._subs = subs
+        self._subs = compile_subs(subs, game.rank)
         self._game = game
-        self.handlers = self._handlers[6]
         self.frame = 0
+        self.wake_frame = 0
         self.boss_wait = False
 
         self.instruction_pointer = 0
@@ -42,22 +432,32 @@ class ECLMainRunner(metaclass=MetaRegistry):
         if not self._game.boss:
             self.boss_wait = False
 
+        # Nothing can happen before the next instruction is due.
+        if self.frame < self.wake_frame:
+            if not (self._game.msg_wait or self.boss_wait):
+                self.frame += 1
+            return
+
+        handlers = self._dispatch[6]
         while True:
             try:
                 frame, sub, instr_type, args = self._main[self.instruction_pointer]
             except IndexError:
                 break
 
+            if frame > self.frame:
+                self.wake_frame = frame
+                break
+
             # The msg_wait instruction stops the reading of the ECL, not just the frame incrementation.
-            if frame > self.frame or self._game.msg_wait or self.boss_wait:
+            if self._game.msg_wait or self.boss_wait:
                 break
             else:
                 self.instruction_pointer += 1
 
             if frame == self.frame:
-                try:
-                    callback = self.handlers[instr_type]
-                except KeyError:
+                callback = handlers[instr_type] if instr_type < len(handlers) else None
+                if callback is None:
                     logger.debug('[%d - %04d] unhandled main opcode %d (args: %r)',
                                  id(self), self.frame, instr_type, args)
                 else:
@@ -77,7 +477,7 @@ class ECLMainRunner(metaclass=MetaRegistry):
                 z = self._game.prng.rand_double() * 800
         enemy = self._game.new_enemy((x, y, z), life, instr_type,
                                      bonus_dropped, die_score)
-        enemy.process = ECLRunner(self._subs, sub, enemy, self._game, self._pop_enemy) #TODO
+        enemy.process = self._subs.runner_class(self._subs, sub, enemy, self._game, self._pop_enemy) #TODO
         enemy.process.run_iteration()
 
 
@@ -117,18 +517,17 @@ class ECLMainRunner(metaclass=MetaRegistry):
 
 
 
-class ECLRunner(metaclass=MetaRegistry):
-    __slots__ = ('_subs', '_enemy', '_game', '_pop_enemy', 'variables', 'sub',
-                 'frame', 'instruction_pointer', 'comparison_reg', 'stack',
-                 'running', 'handlers')
+cdef class ECLRunner:
+    _handlers = {}
+    _dispatch = {}
 
     def __init__(self, subs, sub, enemy, game, pop_enemy):
+        """subs is a CompiledSubs, as returned by compile_subs()."""
         # Things not supposed to change
         self._subs = subs
         self._enemy = enemy
         self._game = game
         self._pop_enemy = pop_enemy
-        self.handlers = self._handlers[6]
 
         self.running = True
 
@@ -142,97 +541,83 @@ class ECLRunner(metaclass=MetaRegistry):
         self.stack = []
 
 
+    def __reduce__(self):
+        return __newobj__, (type(self),), (
+            self._subs, self._enemy, self._game, self._pop_enemy,
+            self.variables, self.sub, self.frame, self.wake_frame,
+            self.instruction_pointer, self.comparison_reg, self.stack,
+            self.running)
+
+
+    def __setstate__(self, tuple state):
+        (self._subs, self._enemy, self._game, self._pop_enemy,
+         self.variables, self.sub, self.frame, self.wake_frame,
+         self.instruction_pointer, self.comparison_reg, self.stack,
+         self.running) = state
+
+
     def switch_to_sub(self, sub, preserve_stack=False):
         if not preserve_stack:
             self.stack = []
         self.running = True
         self.frame = 0
+        self.wake_frame = 0
         self.sub = sub
         self.instruction_pointer = 0
 
 
     def run_iteration(self):
+        cdef long frame
+        cdef tuple args
+
+        # Sleep until the next instruction is due, the only things able to
+        # change it in between being callbacks, through switch_to_sub().
+        if self.frame < self.wake_frame:
+            self.frame += 1
+            return
+
         # Process script
+        subs = self._subs
         while self.running:
             try:
-                frame, instr_type, rank_mask, param_mask, args = self._subs[self.sub][self.instruction_pointer]
+                frame, handler, args = <tuple>subs[self.sub][self.instruction_pointer]
             except IndexError:
                 self.running = False
                 break
 
             if frame > self.frame:
+                self.wake_frame = frame
                 break
             else:
                 self.instruction_pointer += 1
 
-            if not rank_mask & (0x100 << self._game.rank):
-                continue
-
-            if frame == self.frame:
-                try:
-                    callback = self.handlers[instr_type]
-                except KeyError:
-                    logger.debug('[%d %r - %04d] unhandled opcode %d (args: %r)',
-                                 id(self), [self.sub] + [e[0] for e in self.stack],
-                                 self.frame, instr_type, args)
+            if frame == self.frame and handler is not None:
+                # Specialized handlers take no arguments, which spares
+                # building a new tuple to call them.
+                if args:
+                    handler(self, *args)
                 else:
-                    callback(self, *args)
+                    handler(self)
 
         self.frame += 1
 
 
-    def _getval(self, value):
-        if -10012 <= value <= -10001:
-            return self.variables[int(-10001-value)]
-        elif -10025 <= value <= -10013:
-            if value == -10013:
-                return self._game.rank
-            elif value == -10014:
-                return self._game.difficulty
-            elif value == -10015:
-                return self._enemy.x
-            elif value == -10016:
-                return self._enemy.y
-            elif value == -10017:
-                return self._enemy.z
-            elif value == -10018:
-                player = self._enemy.select_player()
-                return player.x
-            elif value == -10019:
-                player = self._enemy.select_player()
-                return player.y
-            elif value == -10021:
-                player = self._enemy.select_player()
-                return self._enemy.get_angle(player)
-            elif value == -10022:
-                return self._enemy.frame
-            elif value == -10024:
-                return self._enemy.life
-            elif value == -10025:
-                return self._enemy.select_player().character #TODO
-            raise NotImplementedError(value) #TODO
-        else:
-            return value
-
-
-    def _setval(self, variable_id, value):
-        if -10012 <= variable_id <= -10001:
-            self.variables[int(-10001-variable_id)] = value
-        elif -10025 <= variable_id <= -10013:
-            if variable_id == -10015:
-                self._enemy.x = value
-            elif variable_id == -10016:
-                self._enemy.y = value
-            elif variable_id == -10017:
-                self._enemy.z = value
-            elif variable_id == -10022:
-                self._enemy.frame = value
-            elif variable_id == -10024:
-                self._enemy.life = value
-            else:
-                raise IndexError #TODO: proper exception
-        else:
+    def unhandled(self, instr_type, args):
+        logger.debug('[%d %r - %04d] unhandled opcode %d (args: %r)',
+                     id(self), [self.sub] + [e[0] for e in self.stack],
+                     self.frame, instr_type, args)
+
+
+    cdef object _getval(self, value):
+        if isinstance(value, Variable):
+            return value.read(self)
+        return value
+
+
+    cdef bint _setval(self, variable_id, value) except True:
+        if not isinstance(variable_id, Variable):
             raise IndexError #TODO: proper exception
+        variable_id.write(self, value)
 
 
     @instruction(0)
@@ -495,7 +880,7 @@ class ECLRunner(metaclass=MetaRegistry):
     @instruction(52)
     def move_in_decel(self, duration, angle, speed):
         self._enemy.angle, self._enemy.speed = angle, speed
-        self._enemy.stop_in(duration, lambda x: 2. * x - x ** 2)
+        self._enemy.stop_in(duration, formulas.decelerate)
 
 
     @instruction(56)
@@ -509,14 +894,14 @@ class ECLRunner(metaclass=MetaRegistry):
     def move_to_decel(self, duration, x, y, z):
         self._enemy.move_to(duration,
                             self._getval(x), self._getval(y), self._getval(z),
-                            lambda x: 2. * x - x ** 2)
+                            formulas.decelerate)
 
 
     @instruction(59)
     def move_to_accel(self, duration, x, y, z):
         self._enemy.move_to(duration,
                             self._getval(x), self._getval(y), self._getval(z),
-                            lambda x: x ** 2)
+                            formulas.accelerate)
 
 
     @instruction(61)
@@ -526,7 +911,7 @@ class ECLRunner(metaclass=MetaRegistry):
 
     @instruction(63)
     def stop_in_accel(self, duration):
-        self._enemy.stop_in(duration, lambda x: 1. - x)
+        self._enemy.stop_in(duration, formulas.reverse)
 
 
     @instruction(65)
@@ -963,8 +1348,10 @@ class ECLRunner(metaclass=MetaRegistry):
                 for bullet in self._game.bullets:
                     bullet.flags = 16 #TODO: check
                     angle = pi + self._game.prng.rand_double() * 2. * pi
-                    bullet.attributes[4:6] = [0.01, angle] #TODO: check
-                    bullet.attributes[0] = -1 #TODO: check
+                    attributes = bullet.attributes
+                    attributes[4:6] = [0.01, angle] #TODO: check
+                    attributes[0] = -1 #TODO: check
+                    bullet.attributes = attributes
                     bullet.set_anim(sprite_idx_offset=15) #TODO: check
         elif function == 1: # Cirno
             offset = (self._game.prng.rand_uint16() % arg - arg / 2,
@@ -1032,7 +1419,7 @@ class ECLRunner(metaclass=MetaRegistry):
                 bullet_attributes[8] = bullet.angle
                 self._enemy.fire(launch_pos=(bullet.x, bullet.y),
                                  bullet_attributes=bullet_attributes)
-            self._setval(-10004, n)
+            self.variables[3] = n
         elif function == 9:
             self._game.new_effect((self._enemy.x, self._enemy.y), 17)
             base_angle = pi + 2. * self._game.prng.rand_double() * pi
@@ -1042,8 +1429,10 @@ class ECLRunner(metaclass=MetaRegistry):
                     distance = hypot(bullet.x - self._enemy.x, bullet.y - self._enemy.y)
                     angle = base_angle
                     angle += distance /80. #TODO: This is most probably wrong
-                    bullet.attributes[4:6] = [0.01, angle] #TODO: check
-                    bullet.attributes[0] = -1 #TODO: check
+                    attributes = bullet.attributes
+                    attributes[4:6] = [0.01, angle] #TODO: check
+                    attributes[0] = -1 #TODO: check
+                    bullet.attributes = attributes
                     bullet.set_anim(sprite_idx_offset=1) #TODO: check
         elif function == 11:
             self._game.new_effect((self._enemy.x, self._enemy.y), 17)
@@ -1052,15 +1441,17 @@ class ECLRunner(metaclass=MetaRegistry):
                 if bullet._bullet_type.type_id < 5 and bullet.speed == 0.:
                     bullet.flags = 16 #TODO: check
                     angle = pi + self._game.prng.rand_double() * 2. * pi
-                    bullet.attributes[4:6] = [0.01, angle] #TODO: check
-                    bullet.attributes[0] = -1 #TODO: check
+                    attributes = bullet.attributes
+                    attributes[4:6] = [0.01, angle] #TODO: check
+                    attributes[0] = -1 #TODO: check
+                    bullet.attributes = attributes
                     bullet.set_anim(sprite_idx_offset=1) #TODO: check
         elif function == 13:
             if self._enemy.bullet_attributes is None:
                 return
 
-            frame = self._getval(-10004)
-            self._setval(-10004, frame + 1)
+            frame = self.variables[3]
+            self.variables[3] = frame + 1
 
             if frame % 6 != 0:
                 return
@@ -1068,14 +1459,14 @@ class ECLRunner(metaclass=MetaRegistry):
             (type_, anim, sprite_idx_offset, bullets_per_shot, number_of_shots,
              speed, speed2, launch_angle, angle, flags) = self._enemy.bullet_attributes
             for i in range(arg):
-                _angle = i*2*pi/arg + self._getval(-10007)
-                _distance = self._getval(-10008)
+                _angle = i*2*pi/arg + self.variables[6]
+                _distance = self.variables[7]
                 launch_pos = (192 + cos(_angle) * _distance,
                               224 + sin(_angle) * _distance)
                 bullet_attributes = (type_, anim, sprite_idx_offset,
                                      bullets_per_shot, number_of_shots,
                                      speed, speed2,
-                                     self._getval(-10006) + _angle, angle, flags)
+                                     self.variables[5] + _angle, angle, flags)
                 self._enemy.fire(launch_pos=launch_pos,
                                  bullet_attributes=bullet_attributes)
         elif function == 14: # Laevateinn
@@ -1140,3 +1531,5 @@ class ECLRunner(metaclass=MetaRegistry):
     def copy_callbacks(self):
         self._enemy.timeout_callback.enable(self.switch_to_sub, (self._enemy.death_callback.args[0],))
 
+
+register(ECLRunner)
@@ -23,13 +23,11 @@ logger = get_logger(__name__)
 
 class MSGRunner(metaclass=MetaRegistry):
     __slots__ = ('_msg', '_game', 'frame', 'sleep_time', 'allow_skip',
-                 'skipping', 'frozen', 'ended', 'instruction_pointer',
-                 'handlers')
+                 'skipping', 'frozen', 'ended', 'instruction_pointer')
 
     def __init__(self, msg, script, game):
         self._msg = msg.msgs[script + 10 * (game.players[0].character // 2)]
         self._game = game
-        self.handlers = self._handlers[6]
         self.frame = 0
         self.sleep_time = 0
         self.allow_skip = True
@@ -41,6 +39,7 @@ class MSGRunner(metaclass=MetaRegistry):
 
 
     def run_iteration(self):
+        handlers = self._dispatch[6]
         while True:
             if self.ended:
                 return False
@@ -57,9 +56,8 @@ class MSGRunner(metaclass=MetaRegistry):
                 self.instruction_pointer += 1
 
             if frame == self.frame:
-                try:
-                    callback = self.handlers[instr_type]
-                except KeyError:
+                callback = handlers[instr_type] if instr_type < len(handlers) else None
+                if callback is None:
                     logger.warn('unhandled msg opcode %d (args: %r)', instr_type, args)
                 else:
                     callback(self, *args)
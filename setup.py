@@ -195,7 +195,7 @@ setup(name='PyTouhou',
                                               'MAX_ELEMENTS': 640 * 4 * 3,
                                               'MAX_SOUNDS': 26,
                                               'USE_OPENGL': use_opengl}),
-      scripts=['scripts/pytouhou'] + (['scripts/anmviewer'] if anmviewer else []),
+      scripts=['scripts/pytouhou', 'scripts/pytouhou-sim', 'scripts/pytouhou-verify', 'scripts/pytouhou-bench'] + (['scripts/anmviewer'] if anmviewer else []),
       packages=['pytouhou'],
       package_data={'pytouhou': ['data/menu.glade']},
       **extra)
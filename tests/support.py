@@ -0,0 +1,227 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+"""Games built straight from the sources in data/ST, without the tools
+building the sample data, nor any display.
+
+The ANM scripts are parsed from their thanm sources, the ECL comes from
+make_ecl.py, and the stage is an empty one, which only moves the camera.
+"""
+
+import os
+import re
+import runpy
+from hashlib import md5
+from random import Random as PythonRandom
+from struct import calcsize, pack, unpack
+
+import pytest
+
+pytest.importorskip('pytouhou.game.game',
+                    reason='The Cython extensions have to be built in place.')
+
+from pytouhou.formats.anm0 import ANM0, Script
+from pytouhou.formats.ecl import ECL
+from pytouhou.formats.std import Stage, Model
+
+
+ST = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'data', 'ST')
+
+# Files built from the source of another one, see data/ST/Makefile.
+ALIASES = {'face00b.script': 'face03a.script',
+           'face00c.script': 'face03a.script',
+           'face03b.script': 'face03a.script'}
+
+
+def read_anm_script(name):
+    """Parse a thanm source into the list of its entries."""
+    entries = []
+    scripts = []
+    with open(os.path.join(ST, name), encoding='utf-8') as file:
+        for line in file:
+            key, _, value = line.split('#')[0].strip().partition(':')
+            value = value.strip()
+            if key.startswith('ENTRY'):
+                anm = ANM0()
+                anm.version = 0
+                anm.size = (256, 256)
+                anm.sprites = {i: (0., 0., 16., 16.) for i in range(512)}
+                anm.scripts = {}
+                entries.append(anm)
+            elif key == 'Sprite':
+                index, geometry = value.split()
+                size, x, y = geometry.split('+')
+                width, height = size.split('*')
+                anm.sprites[int(index)] = (float(x), float(y), float(width), float(height))
+            elif key == 'Script':
+                script = Script()
+                anm.scripts[int(value)] = script
+                offsets = [0]
+                scripts.append((script, offsets))
+            elif key == 'Instruction':
+                frame, _, opcode, *values = value.split()
+                opcode = int(opcode)
+                format = ANM0._instructions[0].get(opcode, ('', None))[0]
+                if 'B' in format:
+                    # Bytes are written packed into a single word.
+                    args = unpack('<' + format, pack('<I', int(values[0], 0)))
+                else:
+                    args = tuple(float(value.rstrip('f')) if kind == 'f' else int(value, 0)
+                                 for kind, value in zip(format, values))
+                script.append((int(frame), opcode, args))
+                offsets.append(offsets[-1] + 4 + calcsize('<' + format))
+
+    # Translate offsets to instruction pointers and register interrupts, as
+    # ANM0.read does.
+    for script, offsets in scripts:
+        for i, (frame, opcode, args) in enumerate(script):
+            if opcode == 5:
+                script[i] = frame, opcode, (offsets.index(args[0]),)
+            elif opcode == 22:
+                script.interrupts[args[0]] = i + 1
+    return entries
+
+
+def read_ecl(name='ecldata1.ecl'):
+    """Return an ECL written by make_ecl.py, without writing it."""
+    namespace = runpy.run_path(os.path.join(ST, 'make_ecl.py'))
+    if name == 'ecldata1.ecl':
+        main, subs = namespace['main'], namespace['subs']
+    else:
+        # bench-<scenario>.ecl, or bench-<scenario>-<bullets>x<enemies>.ecl.
+        scenario = name[len('bench-'):-len('.ecl')]
+        match = re.match(r'(.+)-(\d+)x(\d+)$', scenario)
+        if match is None:
+            main, subs = namespace['stress'](scenario)
+        else:
+            main, subs = namespace['stress'](match.group(1), int(match.group(2)),
+                                             int(match.group(3)))
+    ecl = ECL()
+    ecl.subs = subs
+    ecl.mains = [main]
+    return ecl
+
+
+def empty_stage():
+    stage = Stage()
+    stage.models = [Model(quads=[(0, 0., 0., 0., 0, 0)])]
+    stage.object_instances = [(0, 0., 0., 0.)]
+    stage.script = [(0, 0, (0., 0., 0.)), (1000, 0, (0., -1000., 0.))]
+    stage.bgms = []
+    return stage
+
+
+def ascii_anm():
+    anm = ANM0()
+    anm.version = 0
+    anm.size = (256, 256)
+    anm.sprites = {i: (0., 0., 8., 8.) for i in range(256)}
+    script = Script()
+    script.extend([(0, 1, (0,)), (0, 15, ())])
+    anm.scripts = {0: script}
+    return anm
+
+
+
+class SourceLoader:
+    """Resource loader reading data/ST sources instead of archives."""
+
+    def __init__(self):
+        self.anms = {}
+        self.instanced_anms = {}
+
+
+    def get_anm(self, name):
+        try:
+            return self.anms[name]
+        except KeyError:
+            script = name.replace('.anm', '.script')
+            script = ALIASES.get(script, script)
+            if not os.path.exists(os.path.join(ST, script)):
+                raise
+            anm = self.anms[name] = read_anm_script(script)
+            return anm
+
+
+    def get_single_anm(self, name):
+        if name == 'ascii.anm':
+            return ascii_anm()
+        return self.get_anm(name)[0]
+
+
+    def get_multi_anm(self, names):
+        return sum((self.get_anm(name) for name in names), [])
+
+
+    def get_ecl(self, name):
+        return read_ecl(name)
+
+
+    def get_msg(self, name):
+        return None
+
+
+    def get_stage(self, name):
+        return empty_stage()
+
+
+    def get_eosd_characters(self):
+        from pytouhou.games.sample import shots
+        return [shots.characters[0]] * 8
+
+
+
+def new_game(players=1, seed=1234, rank=0, loader=None):
+    from pytouhou.games.eosd.game import Game, Common
+    from pytouhou.games.sample.interface import Interface
+    from pytouhou.utils.random import Random
+    from pytouhou.game.music import MusicPlayer
+
+    if loader is None:
+        loader = SourceLoader()
+    common = Common(loader, [0, 1][:players], -1)
+    common.interface = Interface(loader, common.players[0])
+    game = Game(loader, 1, rank, 16, common, Random(seed), None, True)
+    game.sfx_player = MusicPlayer()
+    game.music = MusicPlayer()
+    return game
+
+
+def keystream(frames, seed=7):
+    """Return the keystates of a player moving, focusing and shooting in
+    random directions, changing every 20 frames."""
+    random = PythonRandom(seed)
+    keystates = []
+    for frame in range(frames):
+        if frame % 20 == 0:
+            keystate = random.choice([1, 1|16, 1|32, 1|64, 1|128, 1|4|64,
+                                      1|4|128, 0, 1|16|64])
+        keystates.append(keystate)
+    return keystates
+
+
+def state_digest(game):
+    """Return a digest of everything moving in game."""
+    players = [(player.x, player.y, player.score, player.lives, player.graze,
+                player.power, player.bombs) for player in game.players]
+    enemies = [(enemy.x, enemy.y, enemy.life, enemy.frame) for enemy in game.enemies]
+    bullets = [(bullet.x, bullet.y, int(bullet.state), bullet.grazed,
+                bullet.angle, bullet.speed) for bullet in game.bullets]
+    players_bullets = [(bullet.x, bullet.y) for bullet in game.players_bullets]
+    items = [(item.x, item.y) for item in game.items]
+    effects = sorted([(effect.x, effect.y) for effect in game.effects] +
+                     [(x, y) for x, y, _ in game.particles.sprites()])
+    return md5(repr((game.frame, game.difficulty, players, enemies, bullets,
+                     players_bullets, items, effects,
+                     len(game.cancelled_bullets), len(game.lasers))).encode()).hexdigest()
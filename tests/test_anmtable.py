@@ -0,0 +1,88 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+import gc
+import os
+from weakref import ref
+
+import pytest
+
+from support import ST, read_anm_script
+
+from pytouhou.formats.anm0 import ANM0, Script
+
+from pytouhou.game.effect import Effect
+from pytouhou.vm.anmtable import get_table
+
+
+ATTRIBUTES = ('texcoords', 'color', 'alpha', 'rescale', 'dest_offset',
+              'visible', 'removed', 'frame', 'rotations_3d', 'blendfunc',
+              'mirrored', 'texoffsets', 'allow_dest_offset',
+              'automatic_orientation', 'anm')
+
+SCRIPTS = sorted(name for name in os.listdir(ST) if name.endswith('.script'))
+
+
+def sprite_state(effect):
+    sprite = effect.sprite
+    if sprite is None:
+        return None
+    return tuple(getattr(sprite, name) for name in ATTRIBUTES)
+
+
+def assert_same_frames(anm, script):
+    # Past the 1024 frames of the longest tables, which then replay the
+    # script with a runner.
+    baked = Effect((0., 0.), script, anm, True)
+    interpreted = Effect((0., 0.), script, anm)
+    for frame in range(1200):
+        assert sprite_state(baked) == sprite_state(interpreted), (script, frame)
+        baked.update()
+        interpreted.update()
+
+
+@pytest.mark.parametrize('name', SCRIPTS)
+def test_tables_match_the_runner(name):
+    for anm in read_anm_script(name):
+        for script in anm.scripts:
+            if get_table(anm, script) is not None:
+                assert_same_frames(anm, script)
+
+
+def test_looping_table_matches_the_runner():
+    anm = ANM0()
+    anm.version = 0
+    anm.size = (256, 256)
+    anm.sprites = {i: (8. * i, 0., 8., 8.) for i in range(3)}
+    script = Script()
+    script.extend([(0, 1, (0,)), (0, 9, (0., 0., 0.)), (10, 1, (1,)),
+                   (10, 9, (0., 0., .5)), (15, 1, (2,)), (20, 5, (0,))])
+    anm.scripts = {0: script}
+
+    table = get_table(anm, 0)
+    assert table.loop >= 0
+    assert_same_frames(anm, 0)
+
+
+def test_tables_go_away_with_their_anm():
+    anm = read_anm_script('etama3.script')[0]
+    table = get_table(anm, 0)
+    assert table is not None
+    assert get_table(anm, 0) is table
+
+    anm_ref = ref(anm)
+    del anm
+    gc.collect()
+    assert anm_ref() is None
+    assert table.anm is None
@@ -0,0 +1,49 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+import os
+import runpy
+
+from support import ST, SourceLoader
+
+from pytouhou.benchmark import SCENARIOS, Benchmark, compare_results
+
+
+def run(scenario, nb_bullets=None, nb_enemies=None):
+    benchmark = Benchmark(SourceLoader(), frames=60, warmup=60, repeat=1,
+                          allocation_samples=0, nb_bullets=nb_bullets,
+                          nb_enemies=nb_enemies)
+    return benchmark.run_all([scenario])
+
+
+def test_defaults_match_make_ecl():
+    scenarios = runpy.run_path(os.path.join(ST, 'make_ecl.py'))['scenarios']
+    assert {name: (nb_bullets, nb_enemies)
+            for name, (_, nb_bullets, nb_enemies) in scenarios.items()} == \
+           {name: defaults for name, defaults in SCENARIOS.items()
+            if defaults is not None}
+
+
+def test_parameters_set_the_load():
+    default = run('bullets-plain')['scenarios']['bullets-plain']
+    halved = run('bullets-plain', 16, 1)['scenarios']['bullets-plain']
+    doubled = run('bullets-plain', 16, 4)['scenarios']['bullets-plain']
+    assert default['parameters'] == {'bullets': 32, 'enemies': 1}
+    assert halved['parameters'] == {'bullets': 16, 'enemies': 1}
+    assert doubled['parameters'] == {'bullets': 16, 'enemies': 4}
+    assert halved['bullets']['mean'] < default['bullets']['mean'] < doubled['bullets']['mean']
+
+    # Different loads aren’t compared.
+    assert compare_results({'scenarios': {'bullets-plain': default}},
+                           {'scenarios': {'bullets-plain': halved}}) == []
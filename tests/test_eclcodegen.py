@@ -0,0 +1,79 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+import pytest
+
+from support import SourceLoader, new_game, keystream, state_digest
+
+from pytouhou.game import NextStage, GameOver
+from pytouhou.vm.eclcodegen import GeneratedECLRunner, use_generated_code, vm_state
+
+
+STRESS = ['bullets-plain', 'bullets-speedup', 'bullets-launch',
+          'bullets-accelerate', 'bullets-rotate', 'bullets-redirect',
+          'bullets-aim', 'bullets-bounce', 'rings', 'lasers', 'star-items']
+
+
+class StressLoader(SourceLoader):
+    """Loader giving one of the stress ECLs of make_ecl.py as the stage’s."""
+
+    def __init__(self, name):
+        SourceLoader.__init__(self)
+        self.name = name
+
+
+    def get_ecl(self, name):
+        return SourceLoader.get_ecl(self, 'bench-%s.ecl' % self.name)
+
+
+
+def run_both(players, rank, frames, cache_dir, loader=None):
+    """Run a game on each backend with the same keystates, and check they
+    stay identical on every frame, returning the number of frames the
+    enemies of the second one ran generated code."""
+    interpreted = new_game(players, rank=rank, loader=loader)
+    generated = new_game(players, rank=rank, loader=loader)
+    use_generated_code(generated, cache_dir)
+    interpreted.hash_states = generated.hash_states = True
+
+    nb_generated = 0
+    for keystate in keystream(frames):
+        states = []
+        for game in (interpreted, generated):
+            try:
+                game.run_iter([keystate] * players)
+                end = None
+            except (NextStage, GameOver) as exception:
+                end = type(exception).__name__
+            states.append((end, game.frame, game.state_hash, vm_state(game),
+                           state_digest(game)))
+        assert states[0] == states[1]
+        nb_generated += any(isinstance(enemy.process, GeneratedECLRunner)
+                            for enemy in generated.enemies)
+        if end is not None:
+            break
+    return nb_generated
+
+
+@pytest.mark.parametrize('rank', [0, 3])
+@pytest.mark.parametrize('players', [1, 2])
+def test_sample_stage(players, rank, tmp_path):
+    assert run_both(players, rank, 3000, str(tmp_path)) > 1000
+
+
+@pytest.mark.parametrize('name', STRESS)
+def test_stress(name, tmp_path):
+    loader = StressLoader(name)
+    assert run_both(1, 0, 400, str(tmp_path), loader) > 300
+    assert len(list(tmp_path.iterdir())) == 1
@@ -0,0 +1,86 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+from random import Random
+
+import pytest
+
+from support import new_game, keystream, state_digest
+
+
+# Digests of the sample stage played by keystream(), recorded with the
+# engine as it was before bullets and items got moved in bulk, which every
+# change to the way they are updated has to reproduce.
+BASELINE = {1: {500: '57e59c9f3f4f1abfd80159582494c39a',
+                1000: '6d14a22d4920214859676ca21f26eeab',
+                1500: '6822153af9eab5b957f49e98c51bb04d',
+                2000: '924213b472b3b2ea47b1682dce15acfc',
+                2500: 'b0b296f76c748489728cd5fd988e4d97',
+                3000: '11ba1c88ccae185cd234a7f801e4d5ec'},
+            2: {500: '17232584389e7683b4d5316ed8dfdf71',
+                1000: '8eac64e0d77209002b131b576ac3b182',
+                1500: '0b8d6b9165dd745cc3508b4228832ba7',
+                2000: '6ed61efdfd7d5e923e2f74660882960a',
+                2500: 'c4eeb8926e75e0bd3ffa8ec4d1a5913c',
+                3000: '1380ec8d98cb117641b462f31ff0b96d'}}
+
+# Same, with ten items dropped every three frames.
+ITEMS_BASELINE = {300: '358d6dfa88567d24d6cb6d147d7effb9',
+                  600: '871a6ccb7576fff9dbb83481e618a2c2',
+                  900: '323b9cefeedfcba1e57dd63fdbe1de29',
+                  1200: '136a2d7cd3b8934a25e9ebbd975dfd90'}
+
+
+@pytest.mark.parametrize('players', [1, 2])
+def test_state_matches_baseline(players):
+    game = new_game(players)
+    digests = {}
+    for frame, keystate in enumerate(keystream(3000), 1):
+        game.run_iter([keystate] * players)
+        if frame in BASELINE[players]:
+            digests[frame] = state_digest(game)
+    assert digests == BASELINE[players]
+
+
+def test_items_match_baseline():
+    game = new_game()
+    random = Random(3)
+    digests = {}
+    for frame, keystate in enumerate(keystream(1200), 1):
+        if frame % 3 == 1:
+            for i in range(10):
+                game.drop_bonus(random.uniform(16., 368.),
+                                random.uniform(32., 300.), i % 3)
+        game.run_iter([keystate])
+        if frame in ITEMS_BASELINE:
+            digests[frame] = state_digest(game)
+    assert digests == ITEMS_BASELINE
+
+
+@pytest.mark.parametrize('convert', ['change_bullets_into_star_items',
+                                     'change_bullets_into_bonus'])
+def test_converted_bullets_go_back_to_their_pool(convert):
+    game = new_game()
+    for keystate in keystream(3000):
+        game.run_iter([keystate])
+        if len(game.bullets) >= 50:
+            break
+    nb_bullets = len(game.bullets)
+    assert nb_bullets >= 50
+    hits, misses, free = game.pools.stats()['bullets']
+
+    getattr(game, convert)()
+
+    assert len(game.bullets) == 0
+    assert game.pools.stats()['bullets'] == (hits, misses, free + nb_bullets)
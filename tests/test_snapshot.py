@@ -0,0 +1,102 @@
+# -*- encoding: utf-8 -*-
+##
+## Copyright (C) 2026 PyTouhou contributors
+##
+## This program is free software; you can redistribute it and/or modify
+## it under the terms of the GNU General Public License as published
+## by the Free Software Foundation; version 3 only.
+##
+## This program is distributed in the hope that it will be useful,
+## but WITHOUT ANY WARRANTY; without even the implied warranty of
+## MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+## GNU General Public License for more details.
+##
+
+import os
+import pickle
+
+import pytest
+
+from support import new_game, keystream, state_digest
+
+from pytouhou.vm.eclcodegen import get_generated_subs, use_generated_code
+
+
+def play(game, keystates):
+    digests = []
+    for keystate in keystates:
+        game.run_iter([keystate] * len(game.players))
+        digests.append((state_digest(game), game.players[0].score))
+    return digests
+
+
+# Frames with hundreds of bullets, an empty screen, and a boss with hundreds
+# of items, then of bullets.
+@pytest.mark.parametrize('frame', [400, 1500, 2500, 2900])
+@pytest.mark.parametrize('players', [1, 2])
+def test_restore_plays_the_same_frames(players, frame):
+    keystates = keystream(frame + 200)
+    game = new_game(players)
+    play(game, keystates[:frame])
+
+    data = game.snapshot()
+    expected = play(game, keystates[frame:])
+
+    # Twice, the first restore having filled the memo of the unpickler.
+    for _ in range(2):
+        game.restore(data)
+        assert game.snapshot() == data
+        assert play(game, keystates[frame:]) == expected
+
+    # On another game, not even started, with another seed.
+    other = new_game(players, seed=999)
+    other.restore(data)
+    assert play(other, keystates[frame:]) == expected
+
+
+def test_restore_rejects_another_stage():
+    game = new_game()
+    data = game.snapshot()
+    other = new_game(rank=3)
+    with pytest.raises(ValueError):
+        other.restore(data)
+
+
+def test_snapshot_checks_the_shared_objects():
+    game = new_game()
+    data = game.snapshot()
+    game.enm_anm = list(game.enm_anm)
+    with pytest.raises(ValueError):
+        game.snapshot()
+    with pytest.raises(ValueError):
+        game.restore(data)
+
+
+class Call:
+    def __init__(self, function, *args):
+        self.function = function
+        self.args = args
+
+    def __reduce__(self):
+        return self.function, self.args
+
+
+@pytest.mark.parametrize('payload', [Call(os.getcwd), Call(getattr, 1, '__class__'),
+                                     Call(get_generated_subs, [], 0)])
+def test_restore_refuses_other_calls(payload):
+    game = new_game()
+    game.snapshot()
+    with pytest.raises(pickle.UnpicklingError):
+        game.restore(pickle.dumps(payload, 3))
+
+
+def test_restore_plays_the_same_generated_code(tmp_path):
+    keystates = keystream(600)
+    game = new_game()
+    use_generated_code(game, str(tmp_path))
+    play(game, keystates[:400])
+
+    data = game.snapshot()
+    expected = play(game, keystates[400:])
+    game.restore(data)
+    assert play(game, keystates[400:]) == expected